@@ -0,0 +1,83 @@
+"""Benchmark engine auto-detection on a large synthetic monorepo.
+
+Builds a tree of ``--files`` empty files laid out like a monorepo (a .git
+object store, a .venv, node_modules, build output and nested packages with
+tests) and times the previous detection - three recursive globs plus a
+'**/*.robot' walk, none of them pruned - against EngineDetector's single
+pruned os.scandir walk, with and without a .feature file that allows an
+early exit, and with a warm scan cache (unchanged directories are only
+stat()ed).
+
+Usage:
+    python benchmarks/bench_detect.py --files 500000
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from hands.cache import CACHE_DIR_ENV
+from hands.engine_detector import EngineDetector
+
+from synthetic import build_tree  # benchmarks/synthetic.py, next to this script
+
+
+def _legacy_detect(folder: Path) -> str | None:
+    """Detection as done before the single-pass scan: unpruned globs."""
+    file_paths = []
+    for pattern in ["**/*.py", "**/*.robot", "**/*.feature"]:
+        file_paths.extend(folder.glob(pattern))
+    if any(path.suffix == ".feature" for path in file_paths):
+        return "behave"
+    if any(path.suffix == ".robot" for path in file_paths):
+        return "robot"
+    if any(path.suffix == ".py" and path.name.startswith("test_") for path in file_paths):
+        return "pytest"
+    if any(folder.glob("**/*.robot")):
+        return "robot"
+    return None
+
+
+def _time(label: str, function, *args) -> None:
+    began = time.perf_counter()
+    result = function(*args)
+    print(f"{label:<40} {time.perf_counter() - began:>8.2f}s  -> {result}")
+
+
+def main() -> None:
+    """Build the tree once and time each detection variant."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=500_000, help="Files in the synthetic tree")
+    parser.add_argument("--dir", help="Reuse/keep the tree in this directory instead of a temporary one")
+    options = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory(prefix="hands-bench-detect-") as tmp:
+        root = Path(options.dir or tmp)
+        if not (root / "packages").exists():
+            began = time.perf_counter()
+            build_tree(root, options.files)
+            print(f"Built {options.files} files in {time.perf_counter() - began:.1f}s")
+        os.environ[CACHE_DIR_ENV] = str(Path(tmp) / "cache")
+        unlimited = EngineDetector(max_depth=None, max_entries=None, use_cache=False)
+        cached = EngineDetector(max_depth=None, max_entries=None)
+
+        _time("legacy globs", _legacy_detect, root)
+        _time("single pruned scan", unlimited.detect_engine, root, [])
+        _time("single pruned scan, default budget", EngineDetector(use_cache=False).detect_engine, root, [])
+        _time("pruned scan, cold cache", cached.detect_engine, root, [])
+        _time("pruned scan, warm cache", cached.detect_engine, root, [])
+        feature = root / "packages" / "features" / "login.feature"
+        feature.parent.mkdir(exist_ok=True)
+        feature.touch()
+        _time("legacy globs, with .feature", _legacy_detect, root)
+        _time("single pruned scan, with .feature", unlimited.detect_engine, root, [])
+        os.remove(feature)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark the streaming output merger in hands.merge_xml.
+
+Writes synthetic output.xml shards with write_robot_output and merges a
+growing number of them, reporting wall time and tracemalloc peak. The peak
+should stay flat while the merged size grows linearly.
+
+Usage:
+    python benchmarks/bench_merge.py --tests 20000 --inputs 1 2 4 8 16
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from hands.merge_xml import merge_outputs
+from hands.report_xml import ResultBatch, write_robot_output
+
+
+def _write_shard(path: Path, index: int, tests: int) -> None:
+    """Write one synthetic shard with ``tests`` results."""
+    batch = ResultBatch()
+    base = time.time_ns()
+    for number in range(tests):
+        start = base + number * 1_000_000
+        status = "FAIL" if number % 50 == 0 else "PASS"
+        message = "AssertionError: " + "x" * 200 if status == "FAIL" else None
+        batch.append_row(f"tests/test_mod{index}.py::test_{number}", status, start, start + 500_000,
+                         message, ["bench", f"group{number % 10}"])
+    write_robot_output(f"Shard {index}", batch, str(path))
+
+
+def main() -> None:
+    """Run the benchmark and print one line per input count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tests", type=int, default=20000, help="Tests per input file")
+    parser.add_argument("--inputs", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    options = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory(prefix="hands-bench-merge-") as tmp:
+        tmp_dir = Path(tmp)
+        shards = []
+        for index in range(max(options.inputs)):
+            shard = tmp_dir / f"shard{index}.xml"
+            _write_shard(shard, index, options.tests)
+            shards.append(str(shard))
+
+        print(f"{'inputs':>6} {'tests':>9} {'input MB':>9} {'seconds':>8} {'peak MB':>8}")
+        for count in options.inputs:
+            inputs = shards[:count]
+            size = sum(Path(path).stat().st_size for path in inputs) / 1e6
+            tracemalloc.start()
+            began = time.perf_counter()
+            summary = merge_outputs(inputs, str(tmp_dir / "merged.xml"))
+            elapsed = time.perf_counter() - began
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{count:>6} {summary.total.total:>9} {size:>9.1f} {elapsed:>8.2f} {peak / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Benchmark the hands reporting pipeline stage by stage.
+
+Generates synthetic sessions (``--sizes`` results each, with ``--message-bytes``
+failure messages and ``--tags`` tags per test) and a synthetic source tree,
+then measures every stage:
+
+    write     write_robot_output from a ResultBatch
+    behave    RobotXmlFormatter fed scenario by scenario (needs behave)
+    read      output_reader.iter_tests over the written file
+    merge     merge_outputs of ``--shards`` shards of the session
+    detect    EngineDetector on a tree of ``size`` files (cold and warm cache)
+
+Wall time is the best of ``--repeat`` runs; peak memory comes from one
+extra run under tracemalloc. Results are written as JSON that a later run
+compares against with ``--compare``:
+
+    python benchmarks/bench_pipeline.py --output before.json
+    # ... change hands ...
+    python benchmarks/bench_pipeline.py --compare before.json
+
+Usage:
+    python benchmarks/bench_pipeline.py --sizes 1000 10000 100000 1000000 --stages write read
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from hands.cache import CACHE_DIR_ENV
+from hands.engine_detector import EngineDetector
+from hands.merge_xml import merge_outputs
+from hands.output_reader import iter_tests
+from hands.report_xml import write_robot_output
+
+from synthetic import build_tree, iter_scenarios, make_batch  # benchmarks/synthetic.py, next to this script
+
+STAGES = ("write", "behave", "read", "merge", "detect")
+FORMAT_VERSION = 1
+
+
+def _measure(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Return the best and median wall time of ``repeat`` runs and the tracemalloc peak of one more."""
+    times = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - began)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "median_seconds": statistics.median(times), "peak_mb": peak / 1e6}
+
+
+def _run_formatter(scenarios: list, path: Path) -> None:
+    """Feed pre-built scenarios through RobotXmlFormatter like behave's runner does."""
+    from types import SimpleNamespace
+
+    from behave.formatter.base import StreamOpener
+
+    from hands.behave_robot_xml import RobotXmlFormatter
+
+    formatter = RobotXmlFormatter(StreamOpener(filename=str(path)), SimpleNamespace())
+    formatter.feature(SimpleNamespace(name="Synthetic"))
+    for scenario in scenarios:
+        formatter.scenario(scenario)
+        for step in scenario.steps:
+            formatter.match(None)
+            formatter.result(step)
+    formatter.eof()
+    formatter.close()
+
+
+def _session_stages(size: int, options: argparse.Namespace, tmp_dir: Path) -> Dict[str, Callable[[], object]]:
+    """Build the inputs of one session size and return the stage callables."""
+    shape = {"message_bytes": options.message_bytes, "tags": options.tags}
+    batch = make_batch(size, **shape)
+    output = tmp_dir / f"output-{size}.xml"
+    write_robot_output("Synthetic", batch, str(output))
+    shards = []
+    per_shard = max(1, size // options.shards)
+    for index in range(options.shards):
+        shard = tmp_dir / f"shard-{size}-{index}.xml"
+        write_robot_output(f"Shard {index}", make_batch(per_shard, prefix=f"tests/test_mod{index}.py::test_",
+                                                          **shape), str(shard))
+        shards.append(str(shard))
+
+    stages = {
+        "write": lambda: write_robot_output("Synthetic", batch, str(tmp_dir / "write.xml")),
+        "read": lambda: sum(1 for _ in iter_tests(str(output))),
+        "merge": lambda: merge_outputs(shards, str(tmp_dir / "merged.xml")),
+    }
+    try:
+        import behave  # noqa: F401
+    except ImportError:
+        logging.getLogger(__name__).warning("behave is not installed; skipping the behave stage")
+    else:
+        scenarios = list(iter_scenarios(size, **shape))
+        stages["behave"] = lambda: _run_formatter(scenarios, tmp_dir / "behave.xml")
+    return stages
+
+
+def _detect_stages(size: int, tmp_dir: Path) -> Dict[str, Callable[[], object]]:
+    """Build a tree of ``size`` files and return cold/warm cache detection callables."""
+    root = tmp_dir / f"tree-{size}"
+    build_tree(root, size)
+    os.environ[CACHE_DIR_ENV] = str(tmp_dir / f"cache-{size}")
+    cached = EngineDetector(max_depth=None, max_entries=None)
+
+    def cold() -> Optional[str]:
+        for stale in Path(tmp_dir / f"cache-{size}").glob("**/*.json"):
+            stale.unlink()
+        return EngineDetector(max_depth=None, max_entries=None).detect_engine(root, [])
+
+    def warm() -> Optional[str]:
+        return cached.detect_engine(root, [])
+
+    cached.detect_engine(root, [])
+    return {"detect": cold, "detect (warm cache)": warm}
+
+
+def _compare(results: List[dict], baseline_file: str) -> None:
+    """Print the time and memory ratio of each result against a previous run."""
+    with open(baseline_file, encoding="utf-8") as source:
+        baseline = {(row["stage"], row["size"]): row for row in json.load(source)["results"]}
+    print(f"\n{'stage':<22} {'size':>9} {'time':>8} {'memory':>8}   vs {baseline_file}")
+    for row in results:
+        before = baseline.get((row["stage"], row["size"]))
+        if before is None:
+            continue
+        time_ratio = row["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+        memory_ratio = row["peak_mb"] / before["peak_mb"] if before["peak_mb"] else float("inf")
+        print(f"{row['stage']:<22} {row['size']:>9} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x")
+
+
+def main() -> None:
+    """Run the selected stages for every size and print/store the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="Results per session (and files per tree for 'detect')")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--message-bytes", type=int, default=2_000, help="Length of each failure message")
+    parser.add_argument("--tags", type=int, default=10, help="Tags per test")
+    parser.add_argument("--shards", type=int, default=8, help="Shards the session is split into for 'merge'")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is reported)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against the JSON results of an earlier run")
+    options = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    results: List[dict] = []
+    print(f"{'stage':<22} {'size':>9} {'seconds':>9} {'median':>9} {'peak MB':>9} {'per sec':>11}")
+    with tempfile.TemporaryDirectory(prefix="hands-bench-pipeline-") as tmp:
+        tmp_dir = Path(tmp)
+        for size in options.sizes:
+            stages: Dict[str, Callable[[], object]] = {}
+            if set(options.stages) - {"detect"}:
+                stages.update(_session_stages(size, options, tmp_dir))
+            if "detect" in options.stages:
+                stages.update(_detect_stages(size, tmp_dir))
+            for stage, function in stages.items():
+                if stage.split(" ")[0] not in options.stages:
+                    continue
+                measured = _measure(function, options.repeat)
+                row = {"stage": stage, "size": size, **measured,
+                       "per_second": size / measured["seconds"] if measured["seconds"] else None}
+                results.append(row)
+                print(f"{stage:<22} {size:>9} {row['seconds']:>9.3f} {row['median_seconds']:>9.3f} "
+                      f"{row['peak_mb']:>9.1f} {row['per_second'] or 0:>11.0f}")
+            for path in tmp_dir.glob("*.xml"):
+                path.unlink()
+
+    if options.output:
+        meta = {
+            "format": FORMAT_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "message_bytes": options.message_bytes,
+            "tags": options.tags,
+            "shards": options.shards,
+            "repeat": options.repeat,
+        }
+        with open(options.output, "w", encoding="utf-8") as target:
+            json.dump({"meta": meta, "results": results}, target, indent=2)
+        print(f"\nWrote {len(results)} results to {options.output}")
+    if options.compare:
+        _compare(results, options.compare)
+
+
+if __name__ == "__main__":
+    main()
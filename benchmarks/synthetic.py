@@ -0,0 +1,87 @@
+"""Synthetic inputs shared by the benchmarks: result sessions and source trees."""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator, List
+
+from hands.report_xml import ResultBatch
+
+# Share of the files in each top-level area of a synthetic monorepo
+LAYOUT = {
+    ".git/objects": (0.30, ""),
+    ".venv/lib/python3.11/site-packages": (0.25, ".py"),
+    "node_modules": (0.25, ".js"),
+    "build/lib": (0.05, ".py"),
+    "packages": (0.15, ".py"),
+}
+FILES_PER_DIR = 100
+
+
+def build_tree(root: Path, files: int) -> None:
+    """Create ``files`` empty files spread over the LAYOUT areas.
+
+    Every tenth file below 'packages' is a test_*.py, and build/ is
+    listed in a .gitignore.
+    """
+    for area, (share, suffix) in LAYOUT.items():
+        count = int(files * share)
+        for number in range(count):
+            directory = root / area / f"d{number // FILES_PER_DIR // 50}" / f"m{number // FILES_PER_DIR}"
+            if number % FILES_PER_DIR == 0:
+                directory.mkdir(parents=True, exist_ok=True)
+            name = f"test_{number}{suffix}" if area == "packages" and number % 10 == 0 else f"f{number}{suffix}"
+            (directory / name).touch()
+    (root / ".gitignore").write_text("build/\n")
+
+
+def _message(number: int, message_bytes: int) -> str:
+    head = f"AssertionError: case {number} failed\n"
+    return head + "x" * max(0, message_bytes - len(head))
+
+
+def _tags(number: int, tags: int) -> List[str]:
+    return [f"tag{(number + offset) % (tags * 4)}" for offset in range(tags)]
+
+
+def make_batch(
+    tests: int,
+    prefix: str = "tests/test_mod.py::test_",
+    fail_every: int = 20,
+    message_bytes: int = 200,
+    tags: int = 2,
+) -> ResultBatch:
+    """Return ``tests`` results, every ``fail_every``-th failing with a message of ``message_bytes``."""
+    batch = ResultBatch()
+    base = time.time_ns()
+    for number in range(tests):
+        start = base + number * 1_000_000
+        failed = fail_every and number % fail_every == 0
+        batch.append_row(f"{prefix}{number}", "FAIL" if failed else "PASS", start, start + 500_000,
+                         _message(number, message_bytes) if failed else None, _tags(number, tags))
+    return batch
+
+
+def iter_scenarios(tests: int, steps: int = 3, fail_every: int = 20, message_bytes: int = 200,
+                   tags: int = 2) -> Iterator[SimpleNamespace]:
+    """Yield stand-ins for executed behave scenarios, as the formatter reads them."""
+    from behave.model_core import Status
+
+    for number in range(tests):
+        failed = fail_every and number % fail_every == 0
+        scenario_steps = [
+            SimpleNamespace(keyword="Given", name=f"step {index} of scenario {number}",
+                            status=Status.failed if failed and index == steps - 1 else Status.passed,
+                            error_message=_message(number, message_bytes) if failed else None)
+            for index in range(steps)
+        ]
+        yield SimpleNamespace(
+            name=f"Scenario {number}",
+            status=Status.failed if failed else Status.passed,
+            tags=_tags(number, tags),
+            steps=scenario_steps,
+            all_steps=scenario_steps,
+            exception=None,
+            error_message=None,
+        )
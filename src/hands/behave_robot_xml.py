@@ -1,120 +1,169 @@
-"""Behave formatter that emits Robot-style output.xml."""
+"""Behave formatter that emits Robot-style output.xml.
+
+When ``hands run`` records test impact ($HANDS_IMPACT_DB), the step code
+each feature runs is attributed to its feature file (see hands.impact).
+"""
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timezone
-from typing import List
+import time
 
 from behave.formatter.base import Formatter
 from behave.model_core import Status
 
-from .report_xml import TestResult, write_robot_output
+from .impact import recorder_from_env
+from .report_xml import ResultBatch, RobotXmlWriter
 
 log = logging.getLogger(__name__)
 
+# Finished scenarios are buffered and written in chunks of this size.
+FLUSH_EVERY = 1000
+
+# Map behave status to Robot status
+STATUS_MAP = {
+    Status.passed: "PASS",
+    Status.failed: "FAIL",
+    Status.skipped: "SKIP",
+    Status.untested: "SKIP",
+}
+# Steps that never ran (after a failure, or in a skipped scenario) are NOT RUN keywords
+STEP_STATUS_MAP = {
+    Status.passed: "PASS",
+    Status.skipped: "NOT RUN",
+    Status.untested: "NOT RUN",
+}
+
 
 class RobotXmlFormatter(Formatter):
-    """Collects scenario results and writes Robot XML on close()."""
+    """Buffers finished scenarios in a ResultBatch and streams them to Robot XML."""
 
     def __init__(self, stream, config) -> None:
         """Initialize the formatter."""
         super().__init__(stream, config)
-        self.results: List[TestResult] = []
         self.suite_name = getattr(config, "robot_suite_name", "Behave Suite")
+        self.current_feature = None
+        self.current_scenario = None
+        self._step_start = None
+        self.results = ResultBatch()
         
         # Get output file from config or use default
         self.out_path = getattr(config, "output_file", "output.xml")
-        if hasattr(config, "outfile") and config.outfile:
+        if getattr(stream, "name", None) not in (None, "-"):
+            # behave hands us a stream opener for this formatter's --outfile
+            self.out_path = stream.name
+        elif hasattr(config, "outfile") and config.outfile:
             # Use the outfile if specified via --outfile
             self.out_path = config.outfile.name if hasattr(config.outfile, 'name') else str(config.outfile)
+        self.writer = RobotXmlWriter(self.suite_name, self.out_path)
+        self.impact = recorder_from_env("behave")
     
     def feature(self, feature) -> None:
         """Called when a feature starts."""
         self.current_feature = feature
+        if self.impact is not None:
+            self.impact.begin(feature.filename)
     
     def scenario(self, scenario) -> None:
-        """Record scenario start time."""
-        scenario._robotic_start = datetime.now(tz=timezone.utc)
+        """Flush the previous scenario and record the start time of this one."""
+        self._finish_scenario()
+        scenario._robotic_start = time.time_ns()
+        self.current_scenario = scenario
     
+    def match(self, match) -> None:
+        """Called right before a step runs: record its start time."""
+        self._step_start = time.time_ns()
+
     def result(self, step) -> None:
-        """Called when a step completes - not used in minimal model."""
-        pass
+        """Called when a step completes: record its start and end time."""
+        end = time.time_ns()
+        start = self._step_start if self._step_start is not None else end
+        step._robotic_times = (start, end)
+        self._step_start = None
     
     def scenario_outline(self, outline) -> None:
         """Handle scenario outlines - no special handling needed."""
         pass
     
     def eof(self) -> None:
-        """End of file reached."""
-        pass
+        """End of feature file: flush its last scenario."""
+        self._finish_scenario()
+        if self.impact is not None:
+            self.impact.end()
     
     def close(self) -> None:
-        """Convert all scenarios to TestResult and write XML."""
+        """Flush the last scenario and finish the XML file."""
         log.debug("RobotXmlFormatter.close() called")
+        self._finish_scenario()
+        if self.impact is not None:
+            self.impact.close()
+            self.impact = None
         
-        # Collect results from all features
         try:
-            # Try to access features from the formatter's stream context
-            if hasattr(self, 'features'):
-                features = self.features
-            elif hasattr(self.stream, 'features'):
-                features = self.stream.features
+            self.writer.add_batch(self.results)
+            self.results.clear()
+            if self.writer.count:
+                self.writer.close()
+                log.info("Wrote Robot XML with %d test results to %s", self.writer.count, self.out_path)
             else:
-                # Fallback: try to get from config
-                features = getattr(self.config, 'features', [])
-            
-            for feature in features:
-                for scenario in feature.scenarios:
-                    self._process_scenario(feature, scenario)
-                    
-        except (AttributeError, TypeError) as exc:
-            log.warning("Could not access features from formatter context: %s", exc)
-            # If we can't access features, try to use any accumulated results
-        
-        # Write the XML output
-        if self.results:
-            try:
-                write_robot_output(self.suite_name, self.results, self.out_path)
-                log.info("Wrote Robot XML with %d test results to %s", len(self.results), self.out_path)
-            except Exception as exc:
-                log.error("Failed writing Robot XML: %s", exc)
-        else:
-            log.warning("No test results collected for Robot XML output")
+                log.warning("No test results collected for Robot XML output")
+        except Exception as exc:
+            log.error("Failed writing Robot XML: %s", exc)
+        finally:
+            # Releases the history store when nothing was written or writing failed
+            self.writer.abort()
+    
+    def _finish_scenario(self) -> None:
+        """Record the scenario in progress, if any, and flush full batches."""
+        scenario, self.current_scenario = self.current_scenario, None
+        if scenario is None:
+            return
+        self._process_scenario(self.current_feature, scenario)
+        if len(self.results) >= FLUSH_EVERY:
+            self.writer.add_batch(self.results)
+            self.results.clear()
     
     def _process_scenario(self, feature, scenario) -> None:
-        """Process a single scenario into a TestResult."""
-        start = getattr(scenario, "_robotic_start", datetime.now(tz=timezone.utc))
-        end = datetime.now(tz=timezone.utc)
+        """Append a single scenario to the result batch."""
+        start = getattr(scenario, "_robotic_start", None) or time.time_ns()
+        keywords = self._step_keywords(scenario, start)
+        # End with the last step rather than now: hooks and formatters ran since
+        end = keywords[-1][3] if keywords else start
         
-        # Map behave status to Robot status
-        status_map = {
-            Status.passed: "PASS",
-            Status.failed: "FAIL",
-            Status.skipped: "SKIP",
-            Status.untested: "SKIP"
-        }
-        status = status_map.get(scenario.status, "FAIL")
+        status = STATUS_MAP.get(scenario.status, "FAIL")
         
         # Collect error message if failed
         message = None
         if scenario.status == Status.failed:
             if hasattr(scenario, 'exception') and scenario.exception:
                 message = str(scenario.exception)[:2000]
-            elif hasattr(scenario, 'error_message'):
-                message = scenario.error_message[:2000]
+            else:
+                # behave 1.3 keeps the error on the failing step, not the scenario
+                failed = [step for step in scenario.steps if step.status == Status.failed]
+                error = getattr(scenario, "error_message", None) or (
+                    failed and getattr(failed[0], "error_message", None))
+                message = error[:2000] if error else None
         
         # Collect tags
         tags = list(scenario.tags) if scenario.tags else None
         
-        # Create test result
-        test_result = TestResult(
-            name=f"{feature.name} :: {scenario.name}",
-            status=status,
-            start=start,
-            end=end,
-            message=message,
-            tags=tags
-        )
-        
-        self.results.append(test_result)
-        log.debug("Added test result: %s (%s)", test_result.name, test_result.status)
+        name = f"{feature.name} :: {scenario.name}"
+        self.results.append_row(name, status, start, end, message, tags, keywords)
+        log.debug("Added test result: %s (%s)", name, status)
+
+    def _step_keywords(self, scenario, start: int) -> list:
+        """Return the scenario's steps (background included) as timed keyword rows."""
+        keywords = []
+        last_end = start
+        for step in getattr(scenario, "all_steps", scenario.steps):
+            times = getattr(step, "_robotic_times", None)
+            if times is None:
+                # Never ran: zero-length keyword where the previous one ended
+                times = (last_end, last_end)
+                status = "NOT RUN"
+            else:
+                status = STEP_STATUS_MAP.get(step.status, "FAIL")
+            last_end = times[1]
+            message = getattr(step, "error_message", None) if status == "FAIL" else None
+            keywords.append((f"{step.keyword} {step.name}", status, times[0], times[1],
+                             message[:2000] if message else None, None))
+        return keywords
@@ -0,0 +1,54 @@
+"""Location and small helpers for the hands on-disk cache."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "HANDS_CACHE_DIR"
+DEFAULT_CACHE_DIR = ".hands_cache"
+
+
+def cache_dir(*parts: str) -> Path:
+    """Return (and create) a directory below the hands cache root.
+
+    The root is ``$HANDS_CACHE_DIR`` if set, else ``.hands_cache`` in the
+    current directory.
+    """
+    path = Path(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR), *parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def file_digest(path: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_json(path: Path, default: Any) -> Any:
+    """Load JSON from ``path``; a missing or corrupt file gives ``default``."""
+    try:
+        with open(path, encoding="utf-8") as source:
+            return json.load(source)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as exc:
+        log.warning("Ignoring unreadable cache file %s: %s", path, exc)
+        return default
+
+
+def save_json(path: Path, data: Any) -> None:
+    """Write JSON atomically, so concurrent readers never see a partial file."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as target:
+        json.dump(data, target, separators=(",", ":"))
+    os.replace(tmp_path, path)
@@ -0,0 +1,557 @@
+"""Warm worker daemon, so ``hands run`` skips interpreter start and framework imports.
+
+``hands daemon start`` imports the test frameworks of its engines (see
+BaseTestEngine.preload_modules) and any ``--preload`` modules once, then
+keeps a few idle workers forked from that warm parent. ``hands run`` finds
+the daemon of its working directory by its Unix socket and hands it the
+engine run - folder, output, arguments and targets, together with the
+client's working directory, environment, sys.path and its stdout and stderr
+file descriptors. An idle worker takes the run, writes straight to the
+client's terminal and sends the exit code back. It then exits, so every
+run starts from the warm state and imports the code under test afresh (as
+in hands.warm); the parent forks a replacement.
+
+The worker's stdin is /dev/null: it is not in the terminal's foreground
+process group, so reading the terminal (pdb, input()) would stop it with
+SIGTTIN. Interactive runs need ``hands run --no-daemon``.
+
+The parent watches the files of every module it imported, the project's
+dependency manifests (pyproject.toml, requirements and lock files) and the
+directories on sys.path outside the project. When one changes - a package
+was installed or upgraded, a preloaded module edited - it re-executes
+itself, so workers never run with stale imports.
+
+Messages are length-prefixed JSON; file descriptors travel with them as
+SCM_RIGHTS ancillary data. The daemon needs fork and Unix sockets; without
+them, or without a daemon, ``hands run`` runs the tests itself.
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import importlib
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from .warm import preload
+
+log = logging.getLogger(__name__)
+
+DAEMON_SOCKET_ENV = "HANDS_DAEMON_SOCKET"
+# Files in the working directory that declare the installed dependencies
+MANIFESTS = ("pyproject.toml", "setup.py", "setup.cfg", "requirements*.txt", "*.lock", "Pipfile")
+# Seconds between checks of the watched files
+CHECK_INTERVAL = 1.0
+_HEADER = struct.Struct("!I")
+# struct ucred (pid, uid, gid), the SO_PEERCRED option value
+_PEERCRED = struct.Struct("3i")
+# The client's stdout and stderr, passed on to the worker
+_STDIO = (1, 2)
+
+
+def supported() -> bool:
+    """Return whether this platform can run the daemon (fork and fd passing over Unix sockets)."""
+    return hasattr(os, "fork") and hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds")
+
+
+def _check_private(directory: Path) -> None:
+    """Refuse a socket directory that another user could have created or can write to.
+
+    Raises:
+        RuntimeError: If ``directory`` exists and is not a real directory of
+            this user with mode 0700
+    """
+    try:
+        info = os.lstat(directory)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700:
+        raise RuntimeError(f"{directory} is not a private directory of this user (owner uid {info.st_uid}, "
+                           f"mode {stat.filemode(info.st_mode)})")
+
+
+def socket_path(create: bool = False) -> str:
+    """Return ``$HANDS_DAEMON_SOCKET`` or the socket of the daemon for the working directory.
+
+    Sockets live in a private directory below the temp directory, as Unix
+    socket paths are limited to about 100 bytes. Only the daemon creates
+    that directory (``create``); clients just look for the socket in it.
+
+    Raises:
+        RuntimeError: If the directory is not private to this user
+    """
+    path = os.environ.get(DAEMON_SOCKET_ENV)
+    if path:
+        return path
+    directory = Path(tempfile.gettempdir()) / f"hands-{os.getuid()}"
+    if create:
+        directory.mkdir(mode=0o700, exist_ok=True)
+    _check_private(directory)
+    digest = hashlib.sha256(os.path.realpath(os.getcwd()).encode()).hexdigest()[:16]
+    return str(directory / f"{digest}.sock")
+
+
+class Channel:
+    """Length-prefixed JSON messages over a stream socket, with file descriptors attached."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self._buffer = b""
+        self._fds: List[int] = []
+
+    def send(self, message: dict, fds: Sequence[int] = ()) -> None:
+        frame = json.dumps(message).encode()
+        frame = _HEADER.pack(len(frame)) + frame
+        if fds:
+            frame = frame[socket.send_fds(self.sock, [frame], list(fds)):]
+        if frame:
+            self.sock.sendall(frame)
+
+    def receive(self) -> Tuple[dict, List[int]]:
+        """Return the next message and the file descriptors that came with it.
+
+        Raises:
+            ConnectionError: If the peer closed the connection
+        """
+        while True:
+            if len(self._buffer) >= _HEADER.size:
+                end = _HEADER.size + _HEADER.unpack_from(self._buffer)[0]
+                if len(self._buffer) >= end:
+                    message = json.loads(self._buffer[_HEADER.size:end])
+                    self._buffer = self._buffer[end:]
+                    fds, self._fds = self._fds, []
+                    return message, fds
+            data, fds, _, _ = socket.recv_fds(self.sock, 1024 * 1024, 8)
+            self._fds.extend(fds)
+            if not data:
+                raise ConnectionError("connection closed by the peer")
+            self._buffer += data
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def _peer_uid(sock: socket.socket, path: str) -> int:
+    """Return the uid of the process listening at the other end of ``sock``."""
+    if hasattr(socket, "SO_PEERCRED"):
+        _, uid, _ = _PEERCRED.unpack(sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size))
+        return uid
+    # Without peer credentials (macOS, BSD) trust the owner of the socket file, i.e. who bound it
+    return os.lstat(path).st_uid
+
+
+def _connect() -> Optional[Channel]:
+    """Return a channel to this user's daemon of the working directory, or None if none is running.
+
+    Runs send their environment and terminal to the daemon, so a socket in
+    a directory or served by a process of another user is never used.
+    """
+    if not supported():
+        return None
+    try:
+        path = socket_path()
+    except RuntimeError as exc:
+        log.warning("Not using a hands daemon: %s", exc)
+        return None
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        uid = _peer_uid(sock, path)
+    except OSError as exc:
+        log.debug("No daemon at %s: %s", path, exc)
+        sock.close()
+        return None
+    if uid != os.getuid():
+        log.warning("Not using the hands daemon at %s: it runs as uid %d", path, uid)
+        sock.close()
+        return None
+    return Channel(sock)
+
+
+def request(command: str) -> Optional[dict]:
+    """Send ``command`` ('status' or 'stop') to the daemon; returns its reply, None without a daemon."""
+    channel = _connect()
+    if channel is None:
+        return None
+    try:
+        channel.send({"command": command})
+        return channel.receive()[0]
+    except (OSError, ValueError) as exc:
+        log.warning("The hands daemon did not answer: %s", exc)
+        return None
+    finally:
+        channel.close()
+
+
+def run_in_daemon(
+    engine: str,
+    folder: Path,
+    output_file: str,
+    verbose: bool = False,
+    extra_args: Optional[List[str]] = None,
+    targets: Optional[List[str]] = None,
+) -> Optional[int]:
+    """
+    Hand a run to the daemon, like BaseTestEngine.run_tests.
+
+    Ctrl+C is passed on to the worker, which is not in the terminal's
+    foreground process group.
+
+    Returns:
+        The run's exit code (130 if interrupted), 3 if the worker was lost,
+        or None if no daemon took the run (run the tests locally then)
+    """
+    channel = _connect()
+    if channel is None:
+        return None
+    worker = None
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        channel.send({
+            "command": "run", "engine": engine, "folder": str(folder), "output": output_file,
+            "verbose": verbose, "args": list(extra_args or []), "targets": targets,
+            "cwd": os.getcwd(), "env": dict(os.environ), "path": sys.path,
+            "python": sys.executable, "prefix": sys.prefix,
+        }, _STDIO)
+        reply, _ = channel.receive()
+        if "error" in reply:
+            log.warning("The hands daemon cannot take this run: %s", reply["error"])
+            return None
+        worker = reply["pid"]
+        log.info("Running in hands daemon worker %d", worker)
+        while True:
+            try:
+                return int(channel.receive()[0]["rc"])
+            except KeyboardInterrupt:
+                os.kill(worker, signal.SIGINT)
+    except (OSError, ValueError, KeyError) as exc:
+        if worker is None:
+            log.warning("The hands daemon did not take the run: %s", exc)
+            return None
+        log.error("Lost hands daemon worker %d: %s", worker, exc)
+        return 3
+    finally:
+        channel.close()
+
+
+def _manifests() -> List[str]:
+    return [path for pattern in MANIFESTS for path in glob.glob(pattern)]
+
+
+def _watched_files() -> List[str]:
+    """Files and directories whose change makes the daemon restart (see module docstring)."""
+    root = os.path.join(os.path.realpath(os.getcwd()), "")
+    paths: Set[str] = set(_manifests())
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path:
+            paths.add(path)
+    # New or removed distributions change their directory's mtime; the project's own
+    # directories change with every file a run writes and are left out
+    for entry in sys.path:
+        entry = os.path.realpath(entry or ".")
+        if os.path.isdir(entry) and not os.path.join(entry, "").startswith(root):
+            paths.add(entry)
+    return sorted(paths)
+
+
+def _stamps(paths: Sequence[str]) -> Dict[str, Optional[int]]:
+    stamps: Dict[str, Optional[int]] = {}
+    for path in paths:
+        try:
+            stamps[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            stamps[path] = None
+    return stamps
+
+
+class Daemon:
+    """The warm parent: preloads, listens on the socket and keeps ``workers`` idle workers forked."""
+
+    def __init__(
+        self,
+        engines: Sequence[str],
+        modules: Sequence[str] = (),
+        workers: int = 2,
+        path: Optional[str] = None,
+        argv: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Args:
+            engines: Engines whose preload modules are imported
+            modules: More modules to import, e.g. heavy test dependencies
+            workers: Idle workers kept ready
+            path: Socket path (default: socket_path())
+            argv: Command line that restarts the daemon (default: this process's)
+        """
+        self.engines = list(engines)
+        self.modules = list(modules)
+        self.workers = max(1, workers)
+        self.path = path or socket_path(create=True)
+        self.argv = argv if argv is not None else [sys.executable, *sys.orig_argv[1:]]
+        self.idle: Deque[Tuple[int, Channel]] = deque()
+        self.busy: Set[int] = set()
+        self.runs = 0
+        self.started = time.time()
+        self.server: Optional[socket.socket] = None
+        self.stopping = False
+        self._stamps: Dict[str, Optional[int]] = {}
+
+    def warm_up(self) -> None:
+        """Import the engines' preload modules and ``modules`` and note the files to watch."""
+        from .engine_registry import TestEngineFactory
+
+        preload([TestEngineFactory.create_engine(name) for name in self.engines], self.modules)
+        self._stamps = _stamps(_watched_files())
+        log.info("Preloaded %d modules in %.2fs; watching %d files",
+                 len(sys.modules), time.time() - self.started, len(self._stamps))
+
+    def listen(self) -> None:
+        """Bind the socket, replacing a stale one.
+
+        Raises:
+            RuntimeError: If another daemon already serves this socket
+        """
+        if os.path.exists(self.path):
+            if _connect() is not None:
+                raise RuntimeError(f"A hands daemon is already running at {self.path}")
+            os.unlink(self.path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous = os.umask(0o177)
+        try:
+            self.server.bind(self.path)
+        finally:
+            os.umask(previous)
+        self.server.listen(16)
+
+    def serve(self) -> None:
+        """Warm up, listen and serve requests until stopped (``stop`` request, SIGTERM or Ctrl+C)."""
+        self.warm_up()
+        self.listen()
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "stopping", True))
+        log.info("hands daemon %d serving %s on %s", os.getpid(), os.getcwd(), self.path)
+        checked = time.monotonic()
+        try:
+            while not self.stopping:
+                self._fill()
+                ready, _, _ = select.select([self.server], [], [], CHECK_INTERVAL / 2)
+                self._reap()
+                if ready:
+                    self._accept()
+                if time.monotonic() - checked >= CHECK_INTERVAL:
+                    checked = time.monotonic()
+                    changed = self._changed()
+                    if changed:
+                        self._restart(changed)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+        log.info("hands daemon %d stopped after %d runs", os.getpid(), self.runs)
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(), "cwd": os.getcwd(), "python": sys.executable, "socket": self.path,
+            "engines": self.engines, "preload": self.modules, "started": self.started,
+            "idle": len(self.idle), "busy": len(self.busy), "runs": self.runs,
+        }
+
+    def _fill(self) -> None:
+        while len(self.idle) < self.workers:
+            self._fork_worker()
+
+    def _fork_worker(self) -> None:
+        parent_end, child_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                parent_end.close()
+                self.server.close()
+                for _, channel in self.idle:
+                    channel.close()
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+                code = _work(Channel(child_end))
+            except BaseException:  # noqa: BLE001 (never return into the parent's loop)
+                log.exception("hands daemon worker %d failed", os.getpid())
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        child_end.close()
+        self.idle.append((pid, Channel(parent_end)))
+
+    def _accept(self) -> None:
+        conn, _ = self.server.accept()
+        conn.settimeout(5)
+        channel = Channel(conn)
+        fds: List[int] = []
+        try:
+            message, fds = channel.receive()
+            conn.settimeout(None)
+            command = message.get("command")
+            if command == "run":
+                self._dispatch(channel, message, fds)
+            elif command == "status":
+                channel.send(self.status())
+            elif command == "stop":
+                channel.send({"stopped": os.getpid()})
+                self.stopping = True
+            else:
+                channel.send({"error": f"unknown command {command!r}"})
+        except (OSError, ValueError) as exc:
+            log.warning("Dropped a request: %s", exc)
+        finally:
+            for fd in fds:
+                os.close(fd)
+            channel.close()
+
+    def _dispatch(self, client: Channel, message: dict, fds: List[int]) -> None:
+        """Pass the client's connection and stdio to an idle worker."""
+        if (message.get("python"), message.get("prefix")) != (sys.executable, sys.prefix):
+            client.send({"error": f"the daemon runs {sys.executable} ({sys.prefix}), "
+                                  f"the client {message.get('python')} ({message.get('prefix')})"})
+            return
+        if len(fds) != len(_STDIO):
+            client.send({"error": "the client did not pass stdout and stderr"})
+            return
+        for _ in range(2):
+            if not self.idle:
+                self._fork_worker()
+            pid, worker = self.idle.popleft()
+            try:
+                worker.send(message, [client.sock.fileno(), *fds])
+            except OSError as exc:
+                log.warning("Idle worker %d is gone: %s", pid, exc)
+                continue
+            finally:
+                worker.close()
+            self.busy.add(pid)
+            self.runs += 1
+            return
+        client.send({"error": "no worker could be started"})
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.busy.discard(pid)
+            for entry in [entry for entry in self.idle if entry[0] == pid]:
+                self.idle.remove(entry)
+                entry[1].close()
+
+    def _changed(self) -> List[str]:
+        # Manifests may appear later; the imported modules are those of the warm-up
+        stamps = _stamps(sorted({*self._stamps, *_manifests()}))
+        return [path for path, stamp in stamps.items() if stamp != self._stamps.get(path)]
+
+    def _restart(self, changed: List[str]) -> None:
+        """Re-execute the daemon; busy workers finish their runs first on their own."""
+        more = f" and {len(changed) - 1} more" if len(changed) > 1 else ""
+        log.info("%s%s changed; restarting the hands daemon", changed[0], more)
+        self.close()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(self.argv[0], [arg for arg in self.argv if arg not in ("--detach", "-d")])
+
+    def close(self) -> None:
+        """Stop the idle workers and remove the socket."""
+        for _, channel in self.idle:
+            channel.close()  # an idle worker exits when its channel closes
+        self.idle.clear()
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def _work(channel: Channel) -> int:
+    """Worker process: wait for one run, execute it for the client and exit."""
+    try:
+        message, fds = channel.receive()
+    except ConnectionError:
+        return 0  # the daemon stopped or restarted before a run came
+    channel.close()
+    client = Channel(socket.socket(fileno=fds[0]))
+    for target, fd in zip(_STDIO, fds[1:]):
+        os.dup2(fd, target)
+        os.close(fd)
+    # Reading the client's terminal from outside its foreground process group would stop us
+    null = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null, 0)
+    os.close(null)
+    client.send({"pid": os.getpid()})
+    client.send({"rc": _run(message)})
+    return 0
+
+
+def _run(message: dict) -> int:
+    """Run the tests of a client's message in its working directory, environment and sys.path."""
+    from .engine_registry import TestEngineFactory
+
+    os.chdir(message["cwd"])
+    os.environ.clear()
+    os.environ.update(message["env"])
+    sys.path[:] = message["path"]
+    importlib.invalidate_caches()
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.reconfigure(line_buffering=stream.isatty())
+        except (AttributeError, ValueError, OSError):
+            pass
+    try:
+        engine = TestEngineFactory.create_engine(message["engine"])
+        if hasattr(engine, "in_process"):
+            engine.in_process = True  # behave: the worker is the warm interpreter
+        return engine.run_tests(Path(message["folder"]), message["output"], message["verbose"],
+                                message["args"], message["targets"])
+    except KeyboardInterrupt:
+        return 130
+    except Exception as exc:
+        log.error("Engine failed: %s", exc)
+        return 3
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def detach(log_path: Path) -> int:
+    """Fork the daemon into the background; returns its pid in the caller and 0 in the daemon.
+
+    The daemon starts a new session and logs to ``log_path``.
+    """
+    pid = os.fork()
+    if pid:
+        return pid
+    os.setsid()
+    null = os.open(os.devnull, os.O_RDONLY)
+    output = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    os.dup2(null, 0)
+    os.dup2(output, 1)
+    os.dup2(output, 2)
+    os.close(null)
+    os.close(output)
+    return 0
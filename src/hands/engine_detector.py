@@ -3,8 +3,12 @@ from __future__ import annotations
 
 import importlib.util
 import logging
+import os
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .engine_registry import engine_module, engine_names
+from .fs_scan import FileScanner, ScanCache
 
 log = logging.getLogger(__name__)
 
@@ -14,9 +18,34 @@ class EngineDetector:
     TODO: add robot.Gherkin and robot.python
     """
     
-    def __init__(self) -> None:
-        """Initialize the engine detector."""
+    # Scan budget: deepest directory level entered and directory entries read
+    MAX_DEPTH = 12
+    MAX_ENTRIES = 200_000
+    
+    # Files that can decide the engine
+    SUFFIXES = (".py", ".robot", ".feature")
+    
+    # Package each built-in engine runs; other engines need the package that defines them
+    ENGINE_PACKAGES = {"pytest": "pytest", "robot": "robot", "behave": "behave", "gherkin-pytest": "pytest"}
+    
+    def __init__(
+        self,
+        max_depth: Optional[int] = MAX_DEPTH,
+        max_entries: Optional[int] = MAX_ENTRIES,
+        use_cache: bool = True
+    ) -> None:
+        """
+        Initialize the engine detector.
+        
+        Args:
+            max_depth: Deepest folder level scanned (None: unlimited)
+            max_entries: Directory entries read at most (None: unlimited)
+            use_cache: Reuse listings of unchanged directories across runs (see hands.fs_scan.ScanCache)
+        """
         self.supported_engines = ["pytest", "robot", "behave"]
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.use_cache = use_cache
     
     def detect_engine(self, folder: Path, args: List[str]) -> str:
         """
@@ -35,10 +64,23 @@ class EngineDetector:
         log.debug("Detecting engine for folder: %s, args: %s", folder, args)
         
         # Collect all potential file paths from args and folder
-        file_paths = self._collect_file_paths(folder, args)
+        cache = ScanCache(folder, self.SUFFIXES) if self.use_cache and folder.is_dir() else None
+        # Paths given as arguments are not covered by the cache's directory signature
+        cache_key = None if any(not arg.startswith("-") for arg in args) else f"engine:{self.max_depth}:{self.max_entries}"
+        if cache is not None and cache_key is not None:
+            engine = cache.result(cache_key)
+            if engine:
+                log.info("Detected engine '%s' based on file extensions (cached)", engine)
+                return engine
+        file_paths = self._collect_file_paths(folder, args, cache)
         
         # Check for file-based hints
         engine = self._detect_by_file_extensions(file_paths)
+        if cache is not None:
+            log.debug("Scan cache: %d directories reused, %d listed", cache.hits, cache.misses)
+            if engine and cache_key is not None:
+                cache.set_result(cache_key, engine)
+            cache.save()
         if engine:
             log.info("Detected engine '%s' based on file extensions", engine)
             return engine
@@ -59,63 +101,67 @@ class EngineDetector:
     
     def get_available_engines(self) -> Dict[str, bool]:
         """
-        Get a dictionary of all supported engines and their availability.
+        Get a dictionary of all registered engines and their availability.
         
         Returns:
             Dictionary mapping engine names to their availability status
         """
         availability = {}
-        for engine in self.supported_engines:
-            availability[engine] = self._is_package_available(engine)
+        for engine in engine_names():
+            package = self.ENGINE_PACKAGES.get(engine) or engine_module(engine).split(".")[0]
+            availability[engine] = self._is_package_available(package)
         return availability
     
-    def _collect_file_paths(self, folder: Path, args: List[str]) -> List[Path]:
-        """Collect all file paths from folder and arguments."""
-        file_paths = []
+    def _collect_file_paths(
+        self, folder: Path, args: List[str], cache: Optional[ScanCache] = None
+    ) -> Iterator[str]:
+        """
+        Lazily yield candidate file paths from arguments and folder.
         
+        The folder is walked once with FileScanner, skipping VCS, virtualenv,
+        cache and build directories and .gitignore'd paths; the walk stops
+        early when the consumer stops iterating. With a ScanCache only
+        directories changed since the last walk are listed again.
+        """
         # Add paths from arguments that don't start with "-"
         for arg in args:
             if not arg.startswith("-"):
-                path = Path(arg)
-                if path.is_absolute():
-                    file_paths.append(path)
-                else:
-                    file_paths.append(folder / path)
+                yield arg if os.path.isabs(arg) else os.path.join(folder, arg)
         
         # Recursively collect files from the folder
-        if folder.exists() and folder.is_dir():
-            for pattern in ["**/*.py", "**/*.robot", "**/*.feature"]:
-                file_paths.extend(folder.glob(pattern))
-        
-        return file_paths
+        if folder.is_dir():
+            scanner = FileScanner(folder, self.SUFFIXES, max_depth=self.max_depth,
+                                  max_entries=self.max_entries, cache=cache)
+            yield from scanner
+            if scanner.truncated:
+                log.info("Stopped scanning %s at the budget (depth %s, %s entries)",
+                         folder, self.max_depth, self.max_entries)
     
-    def _detect_by_file_extensions(self, file_paths: List[Path]) -> str | None:
-        """Detect engine based on file extensions."""
-        extension_counts = {".feature": 0, ".robot": 0, ".py": 0}
-        test_py_files = 0
+    def _detect_by_file_extensions(self, file_paths: Iterable[str | Path]) -> str | None:
+        """Detect engine based on file extensions, stopping at the first .feature file."""
+        has_robot = False
+        has_test_py = False
+        test_dir = os.sep + "test" + os.sep
         
         for path in file_paths:
-            if path.suffix in extension_counts:
-                extension_counts[path.suffix] += 1
-                
-            # Count Python test files specifically
-            if path.suffix == ".py" and (
-                path.name.startswith("test_") or 
-                path.name.endswith("_test.py") or
-                "test" in path.parts
-            ):
-                test_py_files += 1
-        
-        # Behave has highest priority for .feature files
-        if extension_counts[".feature"] > 0:
-            return "behave"
+            path = os.fspath(path)
+            # Behave has highest priority for .feature files: nothing can change the decision
+            if path.endswith(".feature"):
+                return "behave"
+            if path.endswith(".robot"):
+                has_robot = True
+            elif not has_test_py and path.endswith(".py"):
+                # Count Python test files specifically
+                name = os.path.basename(path)
+                has_test_py = (name.startswith("test_") or name.endswith("_test.py")
+                               or test_dir in os.sep + path)
         
         # Robot Framework for .robot files
-        if extension_counts[".robot"] > 0:
+        if has_robot:
             return "robot"
         
         # Pytest for Python test files
-        if test_py_files > 0:
+        if has_test_py:
             return "pytest"
         
         return None
@@ -135,8 +181,8 @@ class EngineDetector:
         if tests_dir.exists() and any(tests_dir.glob("test_*.py")):
             return "pytest"
         
-        # Check for Robot Framework structure
-        if any(folder.glob("*.robot")) or any(folder.glob("**/*.robot")):
+        # Check for Robot Framework structure (the file scan already covered subfolders)
+        if any(folder.glob("*.robot")):
             return "robot"
         
         return None
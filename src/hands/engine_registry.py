@@ -0,0 +1,119 @@
+"""Registry of test engines, discovered through the 'hands.engines' entry points.
+
+Engines are referenced by 'module:Class' specs and imported only when one is
+selected, so neither startup nor engine selection pays for the engines (and
+frameworks) that are not used. Third-party packages add engines with:
+
+    [project.entry-points."hands.engines"]
+    my-engine = "my_package.engine:MyEngine"
+
+The built-in engines are also resolved without package metadata, so they work
+from a source checkout; a plugin cannot replace a built-in name.
+"""
+from __future__ import annotations
+
+import functools
+import importlib
+import logging
+from typing import TYPE_CHECKING, Dict, List, Type
+
+if TYPE_CHECKING:
+    from importlib.metadata import EntryPoint
+
+    from .test_engines import BaseTestEngine
+
+log = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "hands.engines"
+
+BUILTIN_ENGINES: Dict[str, str] = {
+    "pytest": "hands.test_engines:PytestEngine",
+    "robot": "hands.test_engines:RobotEngine",
+    "behave": "hands.test_engines:BehaveEngine",
+    "gherkin-pytest": "hands.test_engines:GherkinPytestEngine",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _plugin_engines() -> Dict[str, EntryPoint]:
+    """Scan installed package metadata for engine entry points (once per process)."""
+    from importlib.metadata import entry_points
+
+    plugins = {}
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in BUILTIN_ENGINES:
+            continue
+        plugins[entry_point.name] = entry_point
+    log.debug("Found %d plugin engines", len(plugins))
+    return plugins
+
+
+def _load_spec(spec: str) -> type:
+    """Import the class a 'module:Class' spec refers to."""
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def engine_names() -> List[str]:
+    """Return the names of all registered engines without importing any of them."""
+    return [*BUILTIN_ENGINES, *sorted(_plugin_engines())]
+
+
+def engine_module(name: str) -> str:
+    """
+    Return the module that defines engine ``name``, without importing it.
+
+    Raises:
+        ValueError: If no engine is registered under ``name``
+    """
+    if name in BUILTIN_ENGINES:
+        return BUILTIN_ENGINES[name].partition(":")[0]
+    if name in _plugin_engines():
+        return _plugin_engines()[name].module
+    raise ValueError(f"Unknown engine '{name}'. Available: {', '.join(engine_names())}")
+
+
+def load_engine_class(name: str) -> Type["BaseTestEngine"]:
+    """
+    Import and return the engine class registered as ``name``.
+
+    Raises:
+        ValueError: If no engine is registered under ``name`` or it is not a test engine
+    """
+    if name in BUILTIN_ENGINES:
+        engine_class = _load_spec(BUILTIN_ENGINES[name])
+    elif name in _plugin_engines():
+        engine_class = _plugin_engines()[name].load()
+    else:
+        available = ", ".join(engine_names())
+        raise ValueError(f"Unknown engine '{name}'. Available: {available}")
+
+    from .test_engines import BaseTestEngine
+    if not (isinstance(engine_class, type) and issubclass(engine_class, BaseTestEngine)):
+        raise ValueError(f"Engine '{name}' does not refer to a BaseTestEngine subclass: {engine_class!r}")
+    return engine_class
+
+
+class TestEngineFactory:
+    """Factory for creating test engine instances."""
+
+    @classmethod
+    def create_engine(cls, engine_name: str) -> "BaseTestEngine":
+        """
+        Create a test engine instance.
+
+        Args:
+            engine_name: Name of the engine to create
+
+        Returns:
+            Test engine instance
+
+        Raises:
+            ValueError: If engine name is not supported
+        """
+        return load_engine_class(engine_name)()
+
+    @classmethod
+    def get_available_engines(cls) -> List[str]:
+        """Get list of available engine names."""
+        return engine_names()
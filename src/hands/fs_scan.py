@@ -0,0 +1,321 @@
+"""Single-pass, pruned walk over a test tree.
+
+One os.scandir walk replaces repeated recursive globs: directories that never
+hold tests (VCS metadata, virtualenvs, caches, build output) and anything
+matched by a .gitignore are skipped without being entered, and the walk can be
+bounded by depth and by the number of entries looked at.
+"""
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Set, Tuple
+
+from .cache import cache_dir, load_json, save_json
+
+log = logging.getLogger(__name__)
+
+# Directory names that are never descended into
+DEFAULT_IGNORES = frozenset({
+    ".git", ".hg", ".svn", ".venv", "venv", ".tox", ".nox", "node_modules",
+    "__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".hands_cache",
+    ".eggs", "build", "dist", "site-packages",
+})
+# Directory name patterns that are never descended into
+DEFAULT_IGNORE_PATTERNS = ("*.egg-info",)
+
+
+class _GitIgnoreRule:
+    """One .gitignore pattern, relative to the directory holding the file."""
+    __slots__ = ("base", "regex", "negate", "dir_only", "anchored")
+
+    def __init__(self, base: str, pattern: str) -> None:
+        self.base = base
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # A slash anywhere but at the end anchors the pattern to its directory
+        self.anchored = "/" in pattern
+        self.regex = _glob_regex(pattern.lstrip("/"))
+
+    def matches(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        return bool(self.regex.match(rel_path if self.anchored else name))
+
+
+def _glob_regex(pattern: str) -> Pattern[str]:
+    """Translate a gitignore glob (with '**') into a regular expression."""
+    parts = []
+    for index, chunk in enumerate(pattern.split("**")):
+        if index:
+            parts.append(".*")
+        # fnmatch.translate wraps the result as (?s:...)\Z; keep the inner part
+        translated = fnmatch.translate(chunk)[4:-3] if chunk else ""
+        parts.append(translated.replace(".*", "[^/]*"))
+    regex = "".join(parts).replace(".*/", "(?:.*/)?")
+    return re.compile(f"(?s:{regex})\\Z")
+
+
+def read_gitignore(path: str, base: str = "") -> List[_GitIgnoreRule]:
+    """Parse the rules of one .gitignore; ``base`` is its directory relative to the scan root."""
+    rules = []
+    try:
+        with open(path, encoding="utf-8", errors="replace") as source:
+            for line in source:
+                line = line.rstrip("\n").rstrip()
+                if line and not line.startswith("#"):
+                    rules.append(_GitIgnoreRule(base, line))
+    except OSError as exc:
+        log.debug("Cannot read %s: %s", path, exc)
+    return rules
+
+
+# (entry count, matching file names, subdirectory names, .gitignore mtime or 0 if none)
+_Listing = Tuple[int, List[str], List[str], int]
+
+# Directories modified this recently are not cached: a change within the same
+# mtime tick would go unnoticed (git's "racy clean" problem).
+RACY_NS = 2_000_000_000
+
+
+class ScanCache:
+    """
+    Directory listings of earlier walks, keyed on each directory's mtime and inode.
+
+    Adding, removing or renaming an entry updates its directory's mtime, so a
+    directory with an unchanged (mtime, inode) still has the same entries and
+    only changed subtrees are listed again. Stored as JSON below the hands
+    cache (see hands.cache), one file per root and scan configuration.
+
+    Results derived from a complete walk (e.g. the detected engine) can be
+    stored too; they stay valid while ``unchanged()`` holds, which costs one
+    stat() per directory and no listing at all.
+    """
+
+    def __init__(self, root: str | os.PathLike, suffixes: Optional[Sequence[str]] = None,
+                 ignore: Iterable[str] = DEFAULT_IGNORES) -> None:
+        """Load the cache of ``root`` scanned for ``suffixes`` with ``ignore``."""
+        key = json.dumps([os.path.realpath(root), sorted(suffixes) if suffixes is not None else None,
+                          sorted(ignore), DEFAULT_IGNORE_PATTERNS])
+        self.root = os.path.realpath(root)
+        self.path = cache_dir("detect") / f"{hashlib.sha256(key.encode()).hexdigest()[:32]}.json"
+        data = load_json(self.path, {})
+        # rel_dir -> [mtime_ns, inode, *listing], or None while too recent to trust
+        self.dirs: Dict[str, Optional[list]] = data.get("dirs", {})
+        self.results: Dict[str, Any] = data.get("results", {})
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, rel_dir: str, stat: os.stat_result) -> Optional[_Listing]:
+        """Return the cached listing if the directory is unchanged."""
+        record = self.dirs.get(rel_dir)
+        if record is not None and record[0] == stat.st_mtime_ns and record[1] == stat.st_ino:
+            self.hits += 1
+            return record[2], record[3], record[4], record[5]
+        self.misses += 1
+        return None
+
+    def put(self, rel_dir: str, stat: os.stat_result, listing: _Listing) -> None:
+        """Remember a fresh listing (unless the directory changed too recently to trust)."""
+        if time.time_ns() - stat.st_mtime_ns < RACY_NS:
+            self.dirs[rel_dir] = None
+        else:
+            self.dirs[rel_dir] = [stat.st_mtime_ns, stat.st_ino, *listing]
+        self.results.clear()
+        self.dirty = True
+
+    def retain(self, rel_dirs: Set[str]) -> None:
+        """Drop directories that no longer exist."""
+        stale = self.dirs.keys() - rel_dirs
+        for rel_dir in stale:
+            del self.dirs[rel_dir]
+        if stale:
+            self.results.clear()
+            self.dirty = True
+
+    def unchanged(self) -> bool:
+        """Return True if no cached directory (or its .gitignore) changed since it was listed."""
+        if not self.dirs:
+            return False
+        for rel_dir, record in self.dirs.items():
+            if record is None:
+                return False
+            directory = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            try:
+                stat = os.stat(directory)
+                if record[0] != stat.st_mtime_ns or record[1] != stat.st_ino:
+                    return False
+                if record[5] and os.stat(os.path.join(directory, ".gitignore")).st_mtime_ns != record[5]:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def result(self, key: str) -> Any:
+        """Return a stored result if the tree is unchanged, else None."""
+        if key in self.results and self.unchanged():
+            return self.results[key]
+        return None
+
+    def set_result(self, key: str, value: Any) -> None:
+        """Store a result derived from the directories currently cached."""
+        self.results[key] = value
+        self.dirty = True
+
+    def save(self) -> None:
+        """Write the cache if a walk changed it; failures only cost speed."""
+        if not self.dirty:
+            return
+        try:
+            save_json(self.path, {"dirs": self.dirs, "results": self.results})
+            self.dirty = False
+        except OSError as exc:
+            log.warning("Cannot write scan cache %s: %s", self.path, exc)
+
+
+class FileScanner:
+    """
+    Walk ``root`` once with os.scandir, yielding matching file paths.
+
+    Iterating the scanner is lazy, so a caller that has seen enough can stop
+    early and the rest of the tree is never read. After iteration,
+    ``truncated`` tells whether a budget cut the walk short and
+    ``directories`` lists the directories entered.
+
+    Args:
+        root: Directory to walk
+        suffixes: File suffixes to yield (e.g. ('.py', '.robot')); None yields all files
+        max_depth: Deepest directory level to enter (root is 0); None for no limit
+        max_entries: Stop after looking at this many directory entries; None for no limit
+        ignore: Directory names never entered
+        use_gitignore: Skip paths matched by .gitignore files in the tree
+        cache: Reuse listings of unchanged directories from an earlier walk
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        suffixes: Optional[Sequence[str]] = None,
+        max_depth: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        ignore: Iterable[str] = DEFAULT_IGNORES,
+        use_gitignore: bool = True,
+        cache: Optional["ScanCache"] = None,
+    ) -> None:
+        """Configure the walk; nothing is read until iteration."""
+        self.root = os.fspath(root)
+        self.suffixes = tuple(suffixes) if suffixes is not None else None
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.ignore = frozenset(ignore)
+        self.use_gitignore = use_gitignore
+        self.cache = cache
+        self.entries = 0
+        self.truncated = False
+        self.directories: List[str] = []
+
+    def _ignored_dir(self, name: str) -> bool:
+        return name in self.ignore or any(fnmatch.fnmatchcase(name, pattern)
+                                          for pattern in DEFAULT_IGNORE_PATTERNS)
+
+    def _listing(self, directory: str, rel_dir: str) -> Optional[_Listing]:
+        """Return (entry count, matching files, subdirectories, .gitignore mtime) of a directory.
+
+        With a ScanCache, a directory whose mtime and inode are unchanged is
+        served from the cache with a single stat() instead of a scandir().
+        """
+        cache = self.cache
+        try:
+            if cache is not None:
+                stat = os.stat(directory)
+                listing = cache.get(rel_dir, stat)
+                if listing is not None:
+                    return listing
+            count = 0
+            files: List[str] = []
+            subdirs: List[str] = []
+            gitignore = 0
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    count += 1
+                    name = entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self._ignored_dir(name):
+                                subdirs.append(name)
+                            continue
+                    except OSError:
+                        continue
+                    if name == ".gitignore":
+                        gitignore = entry.stat().st_mtime_ns
+                    if self.suffixes is None or name.endswith(self.suffixes):
+                        files.append(name)
+        except OSError as exc:
+            log.debug("Cannot scan %s: %s", directory, exc)
+            return None
+        listing = (count, files, subdirs, gitignore)
+        if cache is not None:
+            cache.put(rel_dir, stat, listing)
+        return listing
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield the paths of matching files (root-joined, as os.path.join builds them)."""
+        self.entries = 0
+        self.truncated = False
+        self.directories = []
+        visited = set()
+        # (directory path, path relative to root, depth, gitignore rules in effect)
+        stack: List[Tuple[str, str, int, List[_GitIgnoreRule]]] = [(self.root, "", 0, [])]
+        while stack:
+            if self.max_entries is not None and self.entries >= self.max_entries:
+                self.truncated = True
+                log.debug("Scan of %s stopped after %d entries", self.root, self.entries)
+                return
+            directory, rel_dir, depth, rules = stack.pop()
+            listing = self._listing(directory, rel_dir)
+            if listing is None:
+                continue
+            visited.add(rel_dir)
+            self.directories.append(directory)
+            count, files, subdirs, gitignore = listing
+            self.entries += count
+            if self.use_gitignore and gitignore:
+                rules = rules + read_gitignore(os.path.join(directory, ".gitignore"), rel_dir)
+            prefix = directory if directory.endswith(os.sep) else directory + os.sep
+            for name in files:
+                if rules and _is_ignored(rules, f"{rel_dir}/{name}" if rel_dir else name, name, False):
+                    continue
+                yield prefix + name
+            if self.max_depth is not None and depth >= self.max_depth:
+                if subdirs:
+                    self.truncated = True
+                continue
+            for name in reversed(subdirs):
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                if not (rules and _is_ignored(rules, rel_path, name, True)):
+                    stack.append((os.path.join(directory, name), rel_path, depth + 1, rules))
+        if self.cache is not None and not self.truncated:
+            # A complete walk knows every directory that still exists
+            self.cache.retain(visited)
+
+
+def _is_ignored(rules: List[_GitIgnoreRule], rel_path: str, name: str, is_dir: bool) -> bool:
+    """Apply gitignore rules in order; the last matching rule wins."""
+    ignored = False
+    for rule in rules:
+        if rule.negate == ignored and rule.matches(rel_path, name, is_dir):
+            ignored = not rule.negate
+    return ignored
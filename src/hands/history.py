@@ -0,0 +1,317 @@
+"""Local SQLite store of past runs for fast trend queries.
+
+Every run becomes one row in ``runs`` and one row per test in ``results``;
+test names and tags are interned, so a result costs a few integers and two
+floats. Results are keyed by test long name ('Suite.Test', as in
+output_reader). Queries over the most recent runs read only those runs'
+entries of a covering index; per-run tag counters and per-test running
+totals answer the tag and all-time queries without touching the results.
+
+Writers record while they write output.xml: RobotXmlWriter appends to the
+store named by ``$HANDS_HISTORY_DB`` (set by ``hands run``), under the run
+named by ``$HANDS_RUN_ID`` so that parallel partitions share one run.
+Outputs produced without a writer (Robot Framework) are ingested afterwards.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .cache import cache_dir
+
+if TYPE_CHECKING:
+    from .report_xml import ResultBatch, TestResult
+
+log = logging.getLogger(__name__)
+
+HISTORY_DB_ENV = "HANDS_HISTORY_DB"
+RUN_ID_ENV = "HANDS_RUN_ID"
+DEFAULT_DB_NAME = "history.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    started REAL NOT NULL,
+    finished REAL,
+    engine TEXT,
+    output TEXT,
+    rc INTEGER
+);
+CREATE TABLE IF NOT EXISTS names (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, tag TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run INTEGER NOT NULL REFERENCES runs(id),
+    test INTEGER NOT NULL REFERENCES names(id),
+    status TEXT NOT NULL,
+    start REAL,
+    elapsed REAL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results(run, test, status, elapsed);
+CREATE INDEX IF NOT EXISTS results_test_run ON results(test, run);
+CREATE TABLE IF NOT EXISTS tag_counts (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    tag INTEGER NOT NULL REFERENCES tags(id),
+    results INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    PRIMARY KEY (run, tag)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS test_totals (
+    test INTEGER PRIMARY KEY REFERENCES names(id),
+    samples INTEGER NOT NULL,
+    total REAL NOT NULL,
+    longest REAL NOT NULL
+);
+"""
+
+# (long name, status, start epoch seconds, elapsed seconds, tags)
+Row = Tuple[str, str, Optional[float], Optional[float], Sequence[str]]
+
+
+def default_db_path() -> Path:
+    """Return ``$HANDS_HISTORY_DB`` or the history file below the hands cache."""
+    return Path(os.environ.get(HISTORY_DB_ENV) or cache_dir() / DEFAULT_DB_NAME)
+
+
+@dataclass
+class RunInfo:
+    """One recorded run."""
+    id: int
+    key: str
+    started: float
+    finished: Optional[float]
+    engine: Optional[str]
+    rc: Optional[int]
+    tests: int
+    failed: int
+
+
+class HistoryStore:
+    """Connection to a history database; the schema is created on first use."""
+
+    def __init__(self, path: str | os.PathLike | None = None) -> None:
+        """Open (or create) the store at ``path`` (default: default_db_path())."""
+        self.path = Path(path) if path is not None else default_db_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Parallel partitions append concurrently: wait for the lock instead of failing
+        self.db = sqlite3.connect(self.path, timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._name_ids: Dict[str, int] = {}
+        self._tag_ids: Dict[str, int] = {}
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # noqa: ANN001
+        self.close()
+
+    # -- recording ---------------------------------------------------------
+
+    def begin_run(self, key: Optional[str] = None, engine: Optional[str] = None) -> int:
+        """Return the id of the run ``key``, creating it if needed."""
+        key = key or uuid.uuid4().hex
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO runs (key, started, engine) VALUES (?, ?, ?)",
+                            (key, time.time(), engine))
+        return self.db.execute("SELECT id FROM runs WHERE key = ?", (key,)).fetchone()[0]
+
+    def finish_run(self, run_id: int, rc: Optional[int] = None, output: Optional[str] = None) -> None:
+        """Record the end of a run."""
+        with self.db:
+            self.db.execute("UPDATE runs SET finished = ?, rc = ?, output = COALESCE(?, output) WHERE id = ?",
+                            (time.time(), rc, output, run_id))
+
+    def result_count(self, run_id: int) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM results WHERE run = ?", (run_id,)).fetchone()[0]
+
+    def _intern(self, table: str, column: str, cache: Dict[str, int], values: Iterable[str]) -> None:
+        missing = {value for value in values if value not in cache}
+        if not missing:
+            return
+        self.db.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", ((v,) for v in missing))
+        for value in missing:
+            cache[value] = self.db.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,)).fetchone()[0]
+
+    def add_rows(self, run_id: int, rows: Sequence[Row]) -> None:
+        """Append test results to a run in one transaction."""
+        if not rows:
+            return
+        with self.db:
+            self._intern("names", "name", self._name_ids, (row[0] for row in rows))
+            self._intern("tags", "tag", self._tag_ids, (tag for row in rows for tag in row[4]))
+            self.db.executemany(
+                "INSERT INTO results (run, test, status, start, elapsed) VALUES (?, ?, ?, ?, ?)",
+                ((run_id, self._name_ids[name], status, start, elapsed) for name, status, start, elapsed, _ in rows))
+            self.db.executemany(
+                """INSERT INTO test_totals (test, samples, total, longest) VALUES (?, 1, ?, ?)
+                   ON CONFLICT (test) DO UPDATE SET samples = samples + 1, total = total + excluded.total,
+                                                    longest = MAX(longest, excluded.longest)""",
+                ((self._name_ids[row[0]], row[3], row[3]) for row in rows if row[3] is not None))
+            counts: Dict[int, List[int]] = {}
+            for _, status, _, _, tags in rows:
+                for tag in set(tags):
+                    count = counts.setdefault(self._tag_ids[tag], [0, 0])
+                    count[0] += 1
+                    count[1] += status == "FAIL"
+            self.db.executemany(
+                """INSERT INTO tag_counts (run, tag, results, failures) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (run, tag) DO UPDATE SET results = results + excluded.results,
+                                                        failures = failures + excluded.failures""",
+                ((run_id, tag, results, failures) for tag, (results, failures) in counts.items()))
+
+    def ingest_output(
+        self,
+        run_id: int,
+        output_file: str,
+        chunk: int = 1000,
+        replay_tag: Optional[str] = None,
+        replays_only: bool = False,
+    ) -> int:
+        """Stream an output.xml into a run; return the number of tests added.
+
+        Tests tagged ``replay_tag`` were replayed rather than run (see
+        hands.result_cache): they are recorded without a duration, so the
+        duration queries skip them. With ``replays_only`` only those are
+        added, as a writer already recorded the tests that ran.
+        """
+        from .output_reader import iter_tests
+
+        rows: List[Row] = []
+        count = 0
+        for test in iter_tests(output_file):
+            replayed = replay_tag is not None and replay_tag in test.tags
+            if replays_only and not replayed:
+                continue
+            rows.append((test.longname, test.status, test.start, None if replayed else test.elapsed, test.tags))
+            if len(rows) >= chunk:
+                self.add_rows(run_id, rows)
+                count += len(rows)
+                rows = []
+        self.add_rows(run_id, rows)
+        return count + len(rows)
+
+    # -- queries -----------------------------------------------------------
+
+    def _first_run(self, runs: Optional[int]) -> int:
+        """Lowest run id within the ``runs`` most recent runs (all runs for None)."""
+        if not runs:
+            return 0
+        row = self.db.execute("SELECT MIN(id) FROM (SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+                              (runs,)).fetchone()
+        return row[0] or 0
+
+    def recent_runs(self, limit: int = 20) -> List[RunInfo]:
+        """The most recent runs with their test counts, newest first."""
+        rows = self.db.execute(
+            """SELECT runs.id, key, started, finished, engine, rc,
+                      (SELECT COUNT(*) FROM results WHERE run = runs.id),
+                      (SELECT COUNT(*) FROM results WHERE run = runs.id AND status = 'FAIL')
+               FROM runs ORDER BY runs.id DESC LIMIT ?""", (limit,))
+        return [RunInfo(*row) for row in rows]
+
+    def slowest(self, top: int = 20, runs: Optional[int] = 50) -> List[Tuple[str, float, float, int]]:
+        """(name, mean seconds, max seconds, samples) of the slowest tests on average."""
+        if not runs:
+            return self.db.execute(
+                """SELECT names.name, total / samples AS mean, longest, samples
+                   FROM test_totals JOIN names ON names.id = test_totals.test
+                   ORDER BY mean DESC LIMIT ?""", (top,)).fetchall()
+        # Aggregate the window from the covering (run, ...) index, then name the top rows
+        return self.db.execute(
+            """SELECT names.name, mean, longest, samples FROM (
+                   SELECT test, AVG(elapsed) AS mean, MAX(elapsed) AS longest, COUNT(elapsed) AS samples
+                   FROM results INDEXED BY results_run
+                   WHERE run >= ? AND elapsed IS NOT NULL
+                   GROUP BY test ORDER BY mean DESC LIMIT ?
+               ) AS top JOIN names ON names.id = top.test ORDER BY mean DESC""",
+            (self._first_run(runs), top)).fetchall()
+
+    def trend(self, name: str, runs: Optional[int] = 50) -> List[Tuple[int, float, str, Optional[float]]]:
+        """(run id, run start, status, elapsed) of one test over the recent runs, oldest first."""
+        return self.db.execute(
+            """SELECT results.run, runs.started, status, elapsed
+               FROM results JOIN runs ON runs.id = results.run
+               WHERE results.test = (SELECT id FROM names WHERE name = ?) AND results.run >= ?
+               ORDER BY results.run""",
+            (name, self._first_run(runs))).fetchall()
+
+    def find_tests(self, pattern: str, limit: int = 20) -> List[str]:
+        """Test names matching a SQL LIKE pattern (e.g. '%login%')."""
+        return [row[0] for row in self.db.execute(
+            "SELECT name FROM names WHERE name LIKE ? ORDER BY name LIMIT ?", (pattern, limit))]
+
+    def failure_rates(self, top: int = 20, runs: Optional[int] = 50) -> List[Tuple[str, int, int]]:
+        """(tag, results, failures) of the tags with the highest failure rate."""
+        return self.db.execute(
+            """SELECT tags.tag, SUM(results) AS total, SUM(failures) AS failed
+               FROM tag_counts JOIN tags ON tags.id = tag_counts.tag
+               WHERE tag_counts.run >= ?
+               GROUP BY tag_counts.tag ORDER BY 1.0 * failed / total DESC, failed DESC LIMIT ?""",
+            (self._first_run(runs), top)).fetchall()
+
+
+class RunRecorder:
+    """Appends what a RobotXmlWriter writes to the history store.
+
+    Recording is best effort: a database error is logged once and stops
+    recording, but never fails the test run or the output file.
+    """
+
+    def __init__(self, path: str | os.PathLike, run_key: Optional[str], suite_name: str) -> None:
+        """Open the store and join (or start) run ``run_key``."""
+        self.prefix = f"{suite_name}." if suite_name else ""
+        self.store: Optional[HistoryStore] = None
+        try:
+            self.store = HistoryStore(path)
+            self.run_id = self.store.begin_run(run_key)
+        except sqlite3.Error as exc:
+            self._disable(exc)
+
+    def _disable(self, exc: Exception) -> None:
+        log.warning("Not recording history in %s: %s", os.environ.get(HISTORY_DB_ENV), exc)
+        if self.store is not None:
+            self.store.close()
+        self.store = None
+
+    def _add(self, rows: Sequence[Row]) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.add_rows(self.run_id, rows)
+        except sqlite3.Error as exc:
+            self._disable(exc)
+
+    def add(self, result: "TestResult") -> None:
+        start = result.start.timestamp()
+        self._add([(self.prefix + result.name, result.status, start, result.end.timestamp() - start,
+                    result.tags or ())])
+
+    def add_batch(self, batch: "ResultBatch") -> None:
+        starts, ends = batch._starts, batch._ends
+        self._add([(self.prefix + row.name, row.status, starts[index] / 1e9, (ends[index] - starts[index]) / 1e9,
+                    row.tags or ()) for index, row in enumerate(batch)])
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+
+def recorder_from_env(suite_name: str) -> Optional[RunRecorder]:
+    """Return a recorder if ``$HANDS_HISTORY_DB`` asks for one."""
+    path = os.environ.get(HISTORY_DB_ENV)
+    if not path:
+        return None
+    return RunRecorder(path, os.environ.get(RUN_ID_ENV), suite_name)
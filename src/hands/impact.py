@@ -0,0 +1,357 @@
+"""Test impact analysis: which source files each test file runs.
+
+While a test file runs, a tracer notes the file of every Python function
+that starts (test code, step definitions, Robot libraries, the code under
+test); Robot resource files are added from the keywords that run. The
+map from test file to those sources is kept in a local SQLite database,
+and a later run with a list of changed files - or a git revision to diff
+against - runs only the test files that depend on one of them, changed
+test files and test files the map has never seen.
+
+The map is file-level because hands selects work by file (as for shards
+and partitions). Paths are stored relative to the working directory of
+``hands run``, like the paths git reports with ``--relative``; code outside
+it (the standard library, site-packages) is not recorded.
+
+Writers record when ``$HANDS_IMPACT_DB`` names the database (set by
+``hands run``). All processes of one run share ``$HANDS_IMPACT_RUN``: a test
+file's dependencies from an earlier run are replaced, those from other
+processes of the same run (e.g. xdist workers) are merged.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from .cache import cache_dir
+
+log = logging.getLogger(__name__)
+
+IMPACT_DB_ENV = "HANDS_IMPACT_DB"
+IMPACT_RUN_ENV = "HANDS_IMPACT_RUN"
+DEFAULT_DB_NAME = "impact.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS tests (
+    file INTEGER PRIMARY KEY REFERENCES files(id),
+    run TEXT NOT NULL,
+    recorded REAL NOT NULL,
+    engine TEXT
+);
+CREATE TABLE IF NOT EXISTS deps (
+    test INTEGER NOT NULL REFERENCES files(id),
+    source INTEGER NOT NULL REFERENCES files(id),
+    PRIMARY KEY (test, source)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS deps_source ON deps(source, test);
+"""
+
+# Directories of installed packages; never part of the code under test
+_INSTALLED = ("site-packages", "dist-packages")
+
+
+def default_db_path() -> Path:
+    """Return ``$HANDS_IMPACT_DB`` or the impact map below the hands cache."""
+    return Path(os.environ.get(IMPACT_DB_ENV) or cache_dir() / DEFAULT_DB_NAME)
+
+
+def relative_path(path: str | os.PathLike, root: Optional[str] = None) -> Optional[str]:
+    """Return ``path`` relative to ``root`` (default: the working directory) in '/' form.
+
+    Returns None for paths outside ``root`` and for installed packages.
+    """
+    root = root or os.getcwd()
+    absolute = os.path.abspath(path)
+    if not absolute.startswith(os.path.join(root, "")):
+        return None
+    if absolute.startswith((os.path.join(sys.prefix, ""), os.path.join(sys.base_prefix, ""))):
+        return None
+    relative = Path(os.path.relpath(absolute, root))
+    if any(part in _INSTALLED for part in relative.parts):
+        return None
+    return relative.as_posix()
+
+
+def changed_files(since: str, cwd: str | os.PathLike | None = None) -> List[str]:
+    """Return the files changed since git revision ``since``, relative to ``cwd``.
+
+    Covers committed and uncommitted changes (the working tree against
+    ``since``) and untracked files, all below ``cwd``.
+
+    Raises:
+        ValueError: If git fails, e.g. outside a repository or for an unknown revision
+    """
+    commands = [
+        ["git", "diff", "--name-only", "--relative", "--no-renames", since, "--"],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    ]
+    paths: List[str] = []
+    for command in commands:
+        try:
+            result = subprocess.run(command, cwd=cwd, capture_output=True, text=True, check=False)
+        except OSError as exc:
+            raise ValueError(f"Cannot run git: {exc}") from exc
+        if result.returncode != 0:
+            raise ValueError(f"'{' '.join(command)}' failed: {result.stderr.strip()}")
+        paths.extend(line for line in result.stdout.splitlines() if line)
+    return paths
+
+
+class ImpactMap:
+    """Connection to an impact database; the schema is created on first use."""
+
+    def __init__(self, path: str | os.PathLike | None = None) -> None:
+        """Open (or create) the map at ``path`` (default: default_db_path())."""
+        self.path = Path(path) if path is not None else default_db_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Parallel partitions record concurrently: wait for the lock instead of failing
+        self.db = sqlite3.connect(self.path, timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "ImpactMap":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # noqa: ANN001
+        self.close()
+
+    def _file_ids(self, paths: Iterable[str]) -> Dict[str, int]:
+        paths = set(paths)
+        self.db.executemany("INSERT OR IGNORE INTO files (path) VALUES (?)", ((path,) for path in paths))
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (path TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM wanted")
+        self.db.executemany("INSERT INTO wanted VALUES (?)", ((path,) for path in paths))
+        return dict(self.db.execute("SELECT files.path, files.id FROM wanted JOIN files USING (path)"))
+
+    def record(self, run_key: str, deps: Dict[str, Set[str]], engine: Optional[str] = None) -> None:
+        """Store the sources each test file (the keys) ran during run ``run_key``.
+
+        Dependencies recorded by an earlier run are replaced; those recorded
+        by another process of the same run are kept.
+        """
+        with self.db:
+            ids = self._file_ids({*deps, *(source for sources in deps.values() for source in sources)})
+            now = time.time()
+            for test, sources in deps.items():
+                test_id = ids[test]
+                previous = self.db.execute("SELECT run FROM tests WHERE file = ?", (test_id,)).fetchone()
+                if previous and previous[0] != run_key:
+                    self.db.execute("DELETE FROM deps WHERE test = ?", (test_id,))
+                self.db.execute("INSERT OR REPLACE INTO tests (file, run, recorded, engine) VALUES (?, ?, ?, ?)",
+                                (test_id, run_key, now, engine))
+                self.db.executemany("INSERT OR IGNORE INTO deps (test, source) VALUES (?, ?)",
+                                    ((test_id, ids[source]) for source in sources))
+
+    def known_tests(self) -> Set[str]:
+        """Test files with recorded dependencies."""
+        return {path for path, in self.db.execute("SELECT path FROM tests JOIN files ON files.id = tests.file")}
+
+    def affected_tests(self, changed: Iterable[str]) -> Set[str]:
+        """Test files that ran one of the ``changed`` files."""
+        with self.db:
+            self.db.execute("CREATE TEMP TABLE IF NOT EXISTS changed (path TEXT PRIMARY KEY)")
+            self.db.execute("DELETE FROM changed")
+            self.db.executemany("INSERT OR IGNORE INTO changed VALUES (?)", ((path,) for path in changed))
+        return {path for path, in self.db.execute(
+            """SELECT DISTINCT tests.path FROM changed
+               JOIN files AS sources ON sources.path = changed.path
+               JOIN deps ON deps.source = sources.id
+               JOIN files AS tests ON tests.id = deps.test""")}
+
+    def dependencies(self, test: str) -> List[str]:
+        """Sources recorded for one test file."""
+        return [path for path, in self.db.execute(
+            """SELECT sources.path FROM files AS tests
+               JOIN deps ON deps.test = tests.id
+               JOIN files AS sources ON sources.id = deps.source
+               WHERE tests.path = ? ORDER BY 1""", (test,))]
+
+
+def select_tests(items: Sequence[str], impact: ImpactMap, changed: Iterable[str]) -> List[str]:
+    """Return the ``items`` (test files) to run for the ``changed`` files, in order.
+
+    A test file runs if it changed itself, depends on a changed file, or
+    has never been recorded (its dependencies are unknown).
+    """
+    changed = {path for path in map(relative_path, changed) if path}
+    affected = impact.affected_tests(changed) | changed
+    known = impact.known_tests()
+    selected = []
+    for item in items:
+        path = relative_path(item)
+        if path is None or path in affected or path not in known:
+            selected.append(item)
+    return selected
+
+
+class _Tracer:
+    """Collects the files of the Python functions that start while active.
+
+    Python 3.12+ uses sys.monitoring, where every code object reports once
+    and is then disabled until the next ``reset()``; older versions use a
+    global trace function that never traces lines. An existing trace
+    function (a debugger, coverage) is left alone and nothing is collected.
+    """
+
+    def __init__(self) -> None:
+        self.files: Set[str] = set()
+        self.active = False
+        self._monitoring = getattr(sys, "monitoring", None)
+        self._tool: Optional[int] = None
+
+    def _trace(self, frame, event, arg) -> None:  # noqa: ANN001 (sys.settrace signature)
+        self.files.add(frame.f_code.co_filename)
+
+    def _start_event(self, code, offset):  # noqa: ANN001, ANN202 (sys.monitoring signature)
+        self.files.add(code.co_filename)
+        return self._monitoring.DISABLE
+
+    def start(self) -> None:
+        monitoring = self._monitoring
+        if monitoring is not None:
+            for tool in (monitoring.COVERAGE_ID, monitoring.PROFILER_ID, monitoring.OPTIMIZER_ID):
+                if monitoring.get_tool(tool) is None:
+                    monitoring.use_tool_id(tool, "hands impact")
+                    monitoring.register_callback(tool, monitoring.events.PY_START, self._start_event)
+                    monitoring.set_events(tool, monitoring.events.PY_START)
+                    self._tool = tool
+                    self.active = True
+                    return
+            log.warning("No free sys.monitoring tool id; not recording test impact")
+            return
+        if sys.gettrace() is not None:
+            log.warning("A trace function is already set (debugger or coverage?); not recording test impact")
+            return
+        sys.settrace(self._trace)
+        threading.settrace(self._trace)
+        self.active = True
+
+    def reset(self) -> Set[str]:
+        """Return the files collected so far and start collecting anew."""
+        files, self.files = self.files, set()
+        if self._tool is not None:
+            self._monitoring.restart_events()
+        return files
+
+    def stop(self) -> None:
+        if not self.active:
+            return
+        self.active = False
+        if self._tool is not None:
+            self._monitoring.set_events(self._tool, 0)
+            self._monitoring.register_callback(self._tool, self._monitoring.events.PY_START, None)
+            self._monitoring.free_tool_id(self._tool)
+            self._tool = None
+        else:
+            sys.settrace(None)
+            threading.settrace(None)
+
+
+class ImpactRecorder:
+    """Attributes the sources that run between ``begin()`` and ``end()`` to a test file.
+
+    Recording is best effort: a database error is logged and drops this
+    process's records, but never fails the test run.
+    """
+
+    def __init__(self, path: str | os.PathLike, run_key: str, engine: Optional[str] = None) -> None:
+        self.path = path
+        self.run_key = run_key
+        self.engine = engine
+        self.root = os.getcwd()
+        self.deps: Dict[str, Set[str]] = {}
+        self._current: Optional[str] = None
+        self._extra: Set[str] = set()
+        self._tracer = _Tracer()
+        self._tracer.start()
+
+    def begin(self, test_file: str | os.PathLike) -> None:
+        """Attribute what runs from now on to ``test_file``."""
+        self.end()
+        self._tracer.reset()
+        self._current = relative_path(test_file, self.root)
+
+    def add(self, source: str | os.PathLike) -> None:
+        """Record a non-Python source (e.g. a Robot resource file) of the current test file."""
+        if self._current is not None:
+            self._extra.add(os.fspath(source))
+
+    def end(self) -> None:
+        """Attribute what ran since ``begin()``; a no-op if nothing is being attributed."""
+        current, self._current = self._current, None
+        names, self._extra = self._tracer.reset() | self._extra, set()
+        if current is None:
+            return
+        sources = self.deps.setdefault(current, {current})
+        for name in names:
+            if name.startswith("<"):
+                continue  # <frozen ...>, <string>
+            path = relative_path(os.path.join(self.root, name), self.root)
+            if path is not None:
+                sources.add(path)
+
+    def close(self) -> None:
+        """Stop tracing and store the dependencies."""
+        self.end()
+        self._tracer.stop()
+        if not self.deps:
+            return
+        try:
+            with ImpactMap(self.path) as impact:
+                impact.record(self.run_key, self.deps, self.engine)
+        except sqlite3.Error as exc:
+            log.warning("Could not record test impact in %s: %s", self.path, exc)
+        self.deps = {}
+
+
+def recorder_from_env(engine: Optional[str] = None) -> Optional[ImpactRecorder]:
+    """Return a recorder if ``$HANDS_IMPACT_DB`` asks for one."""
+    path = os.environ.get(IMPACT_DB_ENV)
+    if not path:
+        return None
+    return ImpactRecorder(path, os.environ.get(IMPACT_RUN_ENV) or "", engine)
+
+
+class RobotImpactListener:
+    """Robot Framework listener recording test impact per suite file.
+
+    Used with ``--listener hands.impact.RobotImpactListener``; Python
+    libraries are traced, resource files come from the keywords that run.
+    """
+
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self) -> None:
+        self.recorder = recorder_from_env("robot")
+
+    def start_suite(self, name: str, attributes: dict) -> None:
+        source = attributes.get("source")
+        if self.recorder is not None and source and os.path.isfile(source):
+            self.recorder.begin(source)
+
+    def end_suite(self, name: str, attributes: dict) -> None:
+        source = attributes.get("source")
+        if self.recorder is not None and source and os.path.isfile(source):
+            self.recorder.end()
+
+    def start_keyword(self, name: str, attributes: dict) -> None:
+        source = attributes.get("source")
+        if self.recorder is not None and source and not source.endswith(".py"):
+            self.recorder.add(source)
+
+    def close(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
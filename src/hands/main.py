@@ -1,21 +1,36 @@
-"""Unified CLI that can run with pytest/behave/robot and produce Robot XML."""
+"""Unified CLI that can run with pytest/behave/robot and produce Robot XML.
+
+Only typer is imported up front. rich, the engine modules and the test
+frameworks are imported by the commands that use them, so `hands --help`
+and `hands list-engines` start quickly (see tests/test_startup.py).
+"""
 from __future__ import annotations
 
+import functools
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
 import typer
-from rich.console import Console
 
-from .engine_detector import EngineDetector
-from .test_engines import TestEngineFactory
-from snark import snark_cite
+from .engine_registry import BUILTIN_ENGINES
+
+if TYPE_CHECKING:
+    from rich.console import Console
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)-5.5s] %(message)s")
 log = logging.getLogger(__name__)
-console = Console()
+
+
+@functools.lru_cache(maxsize=None)
+def _console() -> "Console":
+    """Return the shared rich console, importing rich on first use."""
+    from rich.console import Console
+    return Console()
+
+# Plugin names are left to `hands list-engines`: scanning entry points would slow every start
+_ENGINE_HELP = " | ".join(BUILTIN_ENGINES) + " | a plugin engine (see `hands list-engines`)"
 
 # Create CLI app
 app = typer.Typer(help="Unified test runner that can emit Robot-style output.xml")
@@ -23,7 +38,11 @@ app = typer.Typer(help="Unified test runner that can emit Robot-style output.xml
 
 def _exit(rc: int) -> None:
     """Exit helper to keep cyclomatic complexity low."""
-    quote = snark_cite()
+    try:
+        from snark import snark_cite
+        quote = snark_cite()
+    except ImportError:
+        quote = "Done"
     if rc == 0:
         log.info(quote)
     else:
@@ -31,67 +50,704 @@ def _exit(rc: int) -> None:
     raise typer.Exit(code=rc)
 
 
+def _expand_patterns(patterns: List[str]) -> List[str]:
+    """Expand glob patterns (including '**') in order, dropping duplicates.
+
+    Raises:
+        FileNotFoundError: If a pattern or path matches nothing
+    """
+    import glob
+    
+    paths: List[str] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern] if Path(pattern).exists() else []
+        if not matches:
+            raise FileNotFoundError(f"No output files match '{pattern}'")
+        paths.extend(match for match in matches if match not in paths)
+    return paths
+
+
 @app.command()
 def run(
-    engine: Optional[str] = typer.Option(None, "--engine", "-e", help="pytest | robot | behave"),
+    engine: Optional[str] = typer.Option(None, "--engine", "-e", help=_ENGINE_HELP),
     folder: str = typer.Option(".", "--folder", "-f", help="Test folder to run"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output"),
     output: str = typer.Option("output.xml", "--output", "-o", help="Output XML file"),
+    workers: int = typer.Option(1, "--workers", "-w", min=1, help="Split test files across N processes"),
+    shard: Optional[str] = typer.Option(None, "--shard", help="Run only shard i of n (e.g. 2/4)"),
+    durations: Optional[str] = typer.Option(
+        None, "--durations",
+        help="Previous output.xml with test durations (default without --shard: --output if present)"),
+    in_process: bool = typer.Option(
+        False, "--in-process", help="Run behave inside the hands process instead of a subprocess"),
+    history: bool = typer.Option(True, "--history/--no-history", help="Record the results in the run history"),
+    since: Optional[str] = typer.Option(
+        None, "--since", help="Run only test files affected by changes since this git revision"),
+    changed: Optional[List[str]] = typer.Option(
+        None, "--changed", help="Run only test files affected by this changed file (repeatable)"),
+    record_impact: bool = typer.Option(
+        False, "--record-impact", help="Record which source files each test file runs (implied by --since/--changed)"),
+    last_failed: bool = typer.Option(
+        False, "--last-failed", "--lf", help="Run only the tests that failed in the previous output"),
+    failed_first: bool = typer.Option(
+        False, "--failed-first", "--ff", help="Run the tests that failed in the previous output first"),
+    cache: bool = typer.Option(
+        False, "--cache", help="Replay the results of unchanged passing test files instead of running them"),
+    cache_dir: Optional[str] = typer.Option(
+        None, "--cache-dir", help="Result cache directory, may be shared (default: $HANDS_RESULT_CACHE or .hands_cache)"),
+    cache_inputs: Optional[List[str]] = typer.Option(
+        None, "--cache-input", help="Extra input file (or glob pattern) that invalidates cached results (repeatable)"),
+    cache_size: int = typer.Option(1024, "--cache-size", min=1, help="Evict cached results beyond this many MB"),
+    daemon: bool = typer.Option(
+        True, "--daemon/--no-daemon",
+        help="Hand the run to this user's `hands daemon` of this directory if one is running"),
     args: Optional[List[str]] = typer.Argument(None, help="Additional arguments passed to the engine"),
 ) -> None:
     """Run tests with the chosen or auto-detected engine."""
     log.debug("run(engine=%s, folder=%s, args=%s)", engine, folder, args)
     
+    from .engine_registry import TestEngineFactory
+    
     # Detect engine if not specified
     if not engine:
+        from .engine_detector import EngineDetector
         detector = EngineDetector()
         engine = detector.detect_engine(Path(folder), args or [])
-        console.print(f"[green]Auto-detected test engine: {engine}[/green]")
+        _console().print(f"[green]Auto-detected test engine: {engine}[/green]")
+    
+    shard_spec = None
+    if shard:
+        from .sharding import parse_shard
+        try:
+            shard_spec = parse_shard(shard)
+        except ValueError as exc:
+            _console().print(f"[red]{exc}[/red]")
+            _exit(2)
+    
+    if (last_failed or failed_first) and (shard or since or changed or cache):
+        _console().print("[red]--last-failed/--failed-first cannot be combined with "
+                         "--shard, --since, --changed or --cache[/red]")
+        _exit(2)
+    
+    changed_paths = None
+    if since or changed:
+        from .impact import changed_files
+        try:
+            changed_paths = [*(changed_files(since) if since else []), *(changed or [])]
+        except ValueError as exc:
+            _console().print(f"[red]{exc}[/red]")
+            _exit(2)
     
     # Create and configure the test engine
+    recording = None
+    cached = None
     try:
         test_engine = TestEngineFactory.create_engine(engine)
-        rc = test_engine.run_tests(
-            folder=Path(folder),
-            output_file=output,
-            verbose=verbose,
-            extra_args=args or []
-        )
+        if in_process:
+            if hasattr(test_engine, "in_process"):
+                test_engine.in_process = True
+            else:
+                log.warning("Engine '%s' always runs in-process; ignoring --in-process", engine)
+        
+        timings = None
+        # Every CI node must split on the same data, so shards only use an
+        # explicit --durations file, never this node's own previous output
+        durations_file = durations if shard_spec else durations or output
+        if (shard_spec or workers > 1) and durations_file and Path(durations_file).is_file():
+            from .sharding import Durations
+            timings = Durations.load(durations_file)
+        
+        targets = None
+        items = None
+        if shard_spec or changed_paths is not None or cache:
+            items = [str(path) for path in test_engine.collect_items(Path(folder))]
+        if changed_paths is not None:
+            affected = _select_affected(items, changed_paths)
+            if not affected:
+                _console().print("[yellow]No test files are affected by the changes[/yellow]")
+                _exit(0)
+            if len(affected) < len(items):
+                items = targets = affected
+        if shard_spec:
+            from .sharding import Durations, select_shard
+            index, total = shard_spec
+            targets = select_shard(items, index, total, timings or Durations())
+            _console().print(f"[green]Shard {index}/{total}: {len(targets)} of {len(items)} test files[/green]")
+            if not targets:
+                _console().print("[yellow]Nothing to run in this shard[/yellow]")
+                _exit(0)
+        
+        if last_failed or failed_first:
+            targets, rerun_args = _rerun_selection(test_engine, Path(folder), output, last_failed)
+            args = [*(args or []), *rerun_args]
+        
+        if cache:
+            cached = _cache_lookup(engine, items, args or [], cache_dir, cache_inputs or [], cache_size)
+            cached.name = test_engine.suite_name(Path(folder))
+            if cached.hits and len(cached.misses) < len(items):
+                targets = cached.misses
+        
+        if history:
+            recording = _begin_history(engine)
+        if record_impact or changed_paths is not None or cache:
+            _begin_impact()
+            args = [*(args or []), *test_engine.impact_args]
+        
+        if cached and not cached.misses:
+            rc = 0  # everything replayed from the cache below
+        elif workers > 1:
+            rc = test_engine.run_parallel(
+                folder=Path(folder),
+                output_file=output,
+                workers=workers,
+                verbose=verbose,
+                extra_args=args or [],
+                targets=targets,
+                durations=timings
+            )
+        else:
+            rc = None
+            if daemon:
+                from .daemon import run_in_daemon
+                rc = run_in_daemon(engine, Path(folder), output, verbose, args or [], targets)
+            if rc is None:
+                rc = test_engine.run_tests(
+                    folder=Path(folder),
+                    output_file=output,
+                    verbose=verbose,
+                    extra_args=args or [],
+                    targets=targets
+                )
+    except typer.Exit:
+        raise
     except Exception as exc:
         log.error("Engine failed: %s", exc)
         rc = 3
     
+    if cached:
+        _finish_cache(cached, test_engine.output_path(Path(folder), output))
+    if recording:
+        _finish_history(recording, test_engine.output_path(Path(folder), output), rc, replayed=bool(cached))
+    if last_failed or failed_first:
+        from .rerun import remove_names
+        remove_names()
     _exit(rc)
 
 
+def _cache_lookup(
+    engine: str, items: List[str], args: List[str], directory: Optional[str], inputs: List[str], size_mb: int
+):  # noqa: ANN202 (CachedRun, imported lazily)
+    """Look up every test file in the result cache (see hands.result_cache)."""
+    import time
+
+    from .impact import ImpactMap
+    from .result_cache import CachedRun, CacheKeys, ResultCache
+
+    result_cache = ResultCache(directory, size_mb * 1024 * 1024)
+    impact = ImpactMap()
+    keys = CacheKeys(engine, args, impact, _expand_patterns(inputs))
+    cached = CachedRun(result_cache, keys, started=time.time())
+    for item in items:
+        key = keys.key(item)
+        entry = result_cache.get(key) if key else None
+        if entry is None:
+            cached.misses.append(item)
+        else:
+            cached.hits.append(entry)
+    _console().print(f"[green]Result cache: {len(cached.hits)} of {len(items)} test files cached[/green]")
+    return cached
+
+
+def _finish_cache(cached, output_path: Path) -> None:  # noqa: ANN001 (CachedRun)
+    """Store the passing results of this run and replay the cached ones into its output."""
+    try:
+        ran = bool(cached.misses) and output_path.is_file() and output_path.stat().st_mtime >= cached.started
+        if ran:
+            stored = cached.store(str(output_path))
+            log.info("Stored the results of %d test files in the result cache", stored)
+        if cached.hits:
+            cached.replay(str(output_path), merge_with_output=ran)
+        cached.cache.evict()
+    except Exception as exc:
+        log.error("Result cache failed: %s", exc)
+    finally:
+        cached.keys.impact.close()
+
+
+def _rerun_selection(test_engine, folder: Path, output: str, last_failed: bool) -> tuple:  # noqa: ANN001
+    """Return (targets, extra args) for --last-failed/--failed-first from the previous output.
+
+    Exits when --last-failed has nothing to rerun.
+    """
+    from .rerun import failed_tests
+
+    previous = test_engine.output_path(folder, output)
+    if not previous.is_file():
+        _console().print(f"[yellow]No previous output at {previous}; running all tests[/yellow]")
+        return None, []
+    failed = failed_tests(previous)
+    if not failed:
+        if last_failed:
+            _console().print(f"[green]No failed tests in {previous}; nothing to rerun[/green]")
+            _exit(0)
+        return None, []
+    if not last_failed:
+        _console().print(f"[green]Running {len(failed)} failed tests from {previous} first[/green]")
+        return test_engine.order_failed_first(folder, failed)
+    targets, args = test_engine.select_failed(folder, failed)
+    if targets == []:
+        _console().print("[yellow]None of the failed tests can be found any more[/yellow]")
+        _exit(0)
+    _console().print(f"[green]Rerunning {len(failed)} failed tests from {previous}[/green]")
+    return targets, args
+
+
+def _select_affected(items: List[str], changed: List[str]) -> List[str]:
+    """Return the test files in ``items`` the impact map relates to the ``changed`` files."""
+    from .impact import ImpactMap, select_tests
+
+    with ImpactMap() as impact:
+        affected = select_tests(items, impact, changed)
+    _console().print(f"[green]{len(affected)} of {len(items)} test files affected by "
+                     f"{len(changed)} changed files[/green]")
+    return affected
+
+
+def _begin_impact() -> None:
+    """Point the engine's impact recorders at the impact map (see hands.impact)."""
+    import os
+    import uuid
+
+    from .impact import IMPACT_DB_ENV, IMPACT_RUN_ENV, default_db_path
+
+    # Inherited by engine subprocesses, which record into the same run
+    os.environ[IMPACT_DB_ENV] = str(default_db_path().resolve())
+    os.environ[IMPACT_RUN_ENV] = uuid.uuid4().hex
+
+
+def _begin_history(engine: str) -> Optional[tuple]:
+    """Start a run in the history store and point the engine's writers at it.
+
+    Returns (store, run id, start time), or None if the store cannot be opened.
+    """
+    import os
+    import sqlite3
+    import time
+    import uuid
+
+    from .history import HISTORY_DB_ENV, RUN_ID_ENV, HistoryStore
+
+    started = time.time()
+    key = uuid.uuid4().hex
+    try:
+        store = HistoryStore()
+        run_id = store.begin_run(key, engine)
+    except sqlite3.Error as exc:
+        log.warning("Not recording history: %s", exc)
+        return None
+    # Inherited by engine subprocesses; their RobotXmlWriter records into this run
+    os.environ[HISTORY_DB_ENV] = str(store.path.resolve())
+    os.environ[RUN_ID_ENV] = key
+    return store, run_id, started
+
+
+def _finish_history(recording: tuple, output_path: Path, rc: int, replayed: bool = False) -> None:
+    """Close the history run, ingesting the output if no writer recorded it (e.g. Robot).
+
+    With ``replayed`` (--cache) the output may hold cached results no writer
+    saw; they are recorded without a duration.
+    """
+    store, run_id, started = recording
+    try:
+        recorded = store.result_count(run_id)
+        if (replayed or not recorded) and output_path.is_file() and output_path.stat().st_mtime >= started:
+            replay_tag = None
+            if replayed:
+                from .result_cache import CACHED_TAG as replay_tag
+            added = store.ingest_output(run_id, str(output_path), replay_tag=replay_tag, replays_only=bool(recorded))
+            log.debug("Ingested %d results from %s into history", added, output_path)
+        store.finish_run(run_id, rc, str(output_path.resolve()))
+    except Exception as exc:
+        log.warning("Could not record run history: %s", exc)
+    finally:
+        store.close()
+
+
+@app.command()
+def watch(
+    engine: Optional[str] = typer.Option(None, "--engine", "-e", help=_ENGINE_HELP),
+    folder: str = typer.Option(".", "--folder", "-f", help="Test folder to run"),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output"),
+    output: str = typer.Option("output.xml", "--output", "-o", help="Output XML file of the latest run"),
+    debounce: float = typer.Option(0.2, "--debounce", min=0.0, help="Seconds without changes before rerunning"),
+    poll: bool = typer.Option(False, "--poll", help="Poll for changes instead of using inotify"),
+    poll_interval: float = typer.Option(0.5, "--poll-interval", min=0.05, help="Seconds between polls"),
+    preload: Optional[List[str]] = typer.Option(
+        None, "--preload", help="Module to import once in the warm process, e.g. a heavy dependency (repeatable)"),
+    args: Optional[List[str]] = typer.Argument(None, help="Additional arguments passed to the engine"),
+) -> None:
+    """Rerun the tests affected by every change, in processes forked from a warm one.
+
+    Test files without recorded dependencies run first; after that each
+    batch of changed files reruns only the test files that depend on them
+    (see `hands run --changed`). Stop with Ctrl+C.
+    """
+    log.debug("watch(engine=%s, folder=%s, args=%s)", engine, folder, args)
+
+    from .engine_registry import TestEngineFactory
+    from .warm import preload as preload_modules
+    from .watch import create_watcher, wait_for_changes
+
+    if not engine:
+        from .engine_detector import EngineDetector
+        engine = EngineDetector().detect_engine(Path(folder), args or [])
+        _console().print(f"[green]Auto-detected test engine: {engine}[/green]")
+    try:
+        test_engine = TestEngineFactory.create_engine(engine)
+    except Exception as exc:
+        _console().print(f"[red]{exc}[/red]")
+        _exit(2)
+    preload_modules([test_engine], preload or [])
+    output_path = test_engine.output_path(Path(folder), output).resolve()
+    # The run's own writes never trigger a rerun
+    ignore = [str(output_path), str(output_path.parent / f"{output_path.stem}_suites")]
+
+    changed = None
+    try:
+        with create_watcher(".", polling=poll, interval=poll_interval) as watcher:
+            while True:
+                _watch_round(test_engine, Path(folder), output, output_path, verbose, args or [], changed)
+                _console().print("[dim]Watching for changes (Ctrl+C to stop)[/dim]")
+                changed = sorted(wait_for_changes(watcher, debounce, ignore))
+    except KeyboardInterrupt:
+        _console().print("[yellow]Stopped watching[/yellow]")
+    _exit(0)
+
+
+def _watch_round(
+    test_engine, folder: Path, output: str, output_path: Path, verbose: bool,  # noqa: ANN001
+    args: List[str], changed: Optional[List[str]]
+) -> None:
+    """Run the test files affected by ``changed`` (None: those never recorded) and print the results."""
+    import time
+
+    from .impact import ImpactMap, relative_path, select_tests
+    from .warm import run_forked
+
+    items = [str(path) for path in test_engine.collect_items(folder)]
+    with ImpactMap() as impact:
+        targets = select_tests(items, impact, changed or [])
+    if changed is not None:
+        names = [relative_path(path) or path for path in changed]
+        more = f" and {len(names) - 3} more" if len(names) > 3 else ""
+        _console().print(f"[bold]Changed: {', '.join(names[:3])}{more}[/bold]")
+    if not targets:
+        _console().print("[dim]No test files to run[/dim]")
+        return
+    _console().print(f"[bold]Running {len(targets)} of {len(items)} test files[/bold]")
+
+    _begin_impact()
+    started = time.time()
+    rc = run_forked(test_engine.name, folder, output, verbose,
+                    [*args, *test_engine.worker_args, *test_engine.impact_args], targets)
+    elapsed = time.time() - started
+    if not output_path.is_file() or output_path.stat().st_mtime < started:
+        _console().print(f"[red]The run wrote no output (RC={rc}) after {elapsed:.2f}s[/red]")
+        return
+    _print_run_summary(str(output_path), elapsed)
+
+
+def _print_run_summary(output_path: str, elapsed: float, limit: int = 20) -> None:
+    """Print the counts and the failures of one output."""
+    from rich.markup import escape
+
+    from .merge_xml import Counts
+    from .output_reader import iter_tests
+
+    counts = Counts()
+    failed = []
+    for test in iter_tests(output_path):
+        counts.add(test.status)
+        if test.status == "FAIL":
+            failed.append(test)
+    for test in failed[:limit]:
+        # Tracebacks are on the console already; one-line messages (Robot, behave) are worth repeating
+        message = (test.message or "").strip()
+        line = test.longname + (f": {message}" if message and "\n" not in message else "")
+        _console().print(f"  [red]FAIL[/red] {escape(line)}")
+    if len(failed) > limit:
+        _console().print(f"  ... and {len(failed) - limit} more failures")
+    color = "red" if counts.failed else "green"
+    _console().print(f"[{color}]{counts.passed} passed, {counts.failed} failed, {counts.skipped} skipped "
+                     f"in {elapsed:.2f}s[/{color}]")
+
+
+history_app = typer.Typer(help="Query the history of recorded runs")
+app.add_typer(history_app, name="history")
+
+
+def _history_store(db: Optional[str]):  # noqa: ANN202 (HistoryStore, imported lazily)
+    from .history import HistoryStore, default_db_path
+
+    path = Path(db) if db else default_db_path()
+    if not path.is_file():
+        _console().print(f"[yellow]No history at {path}; runs are recorded by 'hands run'[/yellow]")
+        _exit(1)
+    return HistoryStore(path)
+
+
+_DB_OPTION = typer.Option(None, "--db", help="History database (default: $HANDS_HISTORY_DB or .hands_cache)")
+_RUNS_OPTION = typer.Option(50, "--runs", "-r", min=0, help="Look at the N most recent runs (0 for all)")
+
+
+@history_app.command("runs")
+def history_runs(
+    limit: int = typer.Option(20, "--limit", "-n", min=1, help="Number of runs to show"),
+    db: Optional[str] = _DB_OPTION,
+) -> None:
+    """List the most recent runs."""
+    from datetime import datetime
+
+    from rich.table import Table
+
+    with _history_store(db) as store:
+        runs = store.recent_runs(limit)
+    table = Table(title="Recent runs", title_justify="left")
+    for column in ("Run", "Started", "Engine", "Tests", "Failed", "Seconds", "RC"):
+        table.add_column(column, justify="left" if column in ("Started", "Engine") else "right")
+    for run in runs:
+        seconds = "-" if run.finished is None else f"{run.finished - run.started:.1f}"
+        table.add_row(str(run.id), datetime.fromtimestamp(run.started).isoformat(" ", "seconds"), run.engine or "-",
+                      str(run.tests), str(run.failed), seconds, "-" if run.rc is None else str(run.rc))
+    _console().print(table)
+
+
+@history_app.command("slowest")
+def history_slowest(
+    top: int = typer.Option(20, "--top", "-n", min=1, help="Number of tests to show"),
+    runs: int = _RUNS_OPTION,
+    db: Optional[str] = _DB_OPTION,
+) -> None:
+    """Show the tests with the longest average duration."""
+    from rich.table import Table
+
+    with _history_store(db) as store:
+        rows = store.slowest(top, runs or None)
+    table = Table(title=f"Slowest tests (last {runs or 'all'} runs)", title_justify="left")
+    for column in ("Test", "Mean", "Max", "Runs"):
+        table.add_column(column, justify="left" if column == "Test" else "right")
+    for name, mean, longest, count in rows:
+        table.add_row(name, f"{mean:.3f}s", f"{longest:.3f}s", str(count))
+    _console().print(table)
+
+
+@history_app.command("trend")
+def history_trend(
+    test: str = typer.Argument(..., help="Test long name ('Suite.Test'), or a pattern with % wildcards"),
+    runs: int = _RUNS_OPTION,
+    db: Optional[str] = _DB_OPTION,
+) -> None:
+    """Show the status and duration of one test over the recent runs."""
+    from datetime import datetime
+
+    from rich.table import Table
+
+    with _history_store(db) as store:
+        names = store.find_tests(test, limit=2) if "%" in test else [test]
+        if len(names) != 1:
+            _console().print(f"[red]'{test}' matches {'no' if not names else 'several'} tests; "
+                             f"see 'hands history slowest' for names[/red]")
+            _exit(2)
+        rows = store.trend(names[0], runs or None)
+    if not rows:
+        _console().print(f"[yellow]No results for '{names[0]}'[/yellow]")
+        _exit(1)
+    table = Table(title=names[0], title_justify="left")
+    for column in ("Run", "Started", "Status", "Seconds"):
+        table.add_column(column, justify="right" if column in ("Run", "Seconds") else "left")
+    for run_id, started, status, elapsed in rows:
+        color = {"PASS": "green", "FAIL": "red"}.get(status, "yellow")
+        table.add_row(str(run_id), datetime.fromtimestamp(started).isoformat(" ", "seconds"),
+                      f"[{color}]{status}[/{color}]", "-" if elapsed is None else f"{elapsed:.3f}")
+    _console().print(table)
+
+
+@history_app.command("tags")
+def history_tags(
+    top: int = typer.Option(20, "--top", "-n", min=1, help="Number of tags to show"),
+    runs: int = _RUNS_OPTION,
+    db: Optional[str] = _DB_OPTION,
+) -> None:
+    """Show the failure rate by tag."""
+    from rich.table import Table
+
+    with _history_store(db) as store:
+        rows = store.failure_rates(top, runs or None)
+    table = Table(title=f"Failure rate by tag (last {runs or 'all'} runs)", title_justify="left")
+    for column in ("Tag", "Failed", "Results", "Rate"):
+        table.add_column(column, justify="left" if column == "Tag" else "right")
+    for tag, total, failed in rows:
+        table.add_row(tag, str(failed), str(total), f"{failed / total:.1%}")
+    _console().print(table)
+
+
+@history_app.command("ingest")
+def history_ingest(
+    output_files: List[str] = typer.Argument(..., help="output.xml files (or glob patterns), one run each"),
+    db: Optional[str] = _DB_OPTION,
+) -> None:
+    """Add existing output files to the history, e.g. to backfill it."""
+    from .history import HistoryStore
+
+    try:
+        paths = _expand_patterns(output_files)
+        with HistoryStore(db) as store:
+            for path in paths:
+                run_id = store.begin_run()
+                count = store.ingest_output(run_id, path)
+                store.finish_run(run_id, output=str(Path(path).resolve()))
+                _console().print(f"[green]Run {run_id}: {count} tests from {path}[/green]")
+    except Exception as exc:
+        log.error("Ingest failed: %s", exc)
+        _exit(3)
+    _exit(0)
+
+
+daemon_app = typer.Typer(help="Keep warm workers that `hands run` hands its runs to")
+app.add_typer(daemon_app, name="daemon")
+
+
+@daemon_app.command("start")
+def daemon_start(
+    engines: Optional[List[str]] = typer.Option(
+        None, "--engine", "-e", help="Engine to preload (repeatable; default: all installed)"),
+    preload: Optional[List[str]] = typer.Option(
+        None, "--preload", help="Module to import once for all runs, e.g. a heavy dependency (repeatable)"),
+    workers: int = typer.Option(2, "--workers", "-w", min=1, help="Idle workers kept ready"),
+    detach: bool = typer.Option(False, "--detach", "-d", help="Run in the background, logging to .hands_cache"),
+) -> None:
+    """Start the daemon for the current directory, in the foreground unless --detach."""
+    import time
+
+    from .cache import cache_dir
+    from .daemon import Daemon, detach as detach_daemon, request, supported
+
+    if not supported():
+        _console().print("[red]The hands daemon needs fork and Unix sockets, which this platform lacks[/red]")
+        _exit(2)
+    running = request("status")
+    if running:
+        _console().print(f"[yellow]A hands daemon is already running (pid {running['pid']})[/yellow]")
+        _exit(0)
+    if not engines:
+        from .engine_detector import EngineDetector
+        engines = [name for name, available in EngineDetector().get_available_engines().items() if available]
+    if detach:
+        log_path = cache_dir() / "daemon.log"
+        pid = detach_daemon(log_path)
+        if pid:
+            # Return once the daemon answers, so a following `hands run` uses it
+            deadline = time.monotonic() + 60
+            while time.monotonic() < deadline and request("status") is None:
+                time.sleep(0.1)
+            _console().print(f"[green]hands daemon {pid} started; logging to {log_path}[/green]")
+            _exit(0)
+    try:
+        Daemon(engines, preload or [], workers).serve()
+    except RuntimeError as exc:
+        _console().print(f"[red]{exc}[/red]")
+        _exit(2)
+    raise typer.Exit(code=0)
+
+
+@daemon_app.command("status")
+def daemon_status() -> None:
+    """Show the daemon of the current directory; exits with code 1 if none is running."""
+    import time
+
+    from .daemon import request
+
+    status = request("status")
+    if status is None:
+        _console().print("[yellow]No hands daemon is running for this directory[/yellow]")
+        raise typer.Exit(code=1)
+    _console().print(f"[green]hands daemon {status['pid']}[/green] up {time.time() - status['started']:.0f}s, "
+                     f"{status['runs']} runs, {status['idle']} idle and {status['busy']} busy workers")
+    _console().print(f"  engines: {', '.join(status['engines']) or '-'}; "
+                     f"preloaded: {', '.join(status['preload']) or '-'}")
+    _console().print(f"  python: {status['python']}; socket: {status['socket']}")
+
+
+@daemon_app.command("stop")
+def daemon_stop() -> None:
+    """Stop the daemon of the current directory."""
+    from .daemon import request
+
+    reply = request("stop")
+    if reply is None:
+        _console().print("[yellow]No hands daemon is running for this directory[/yellow]")
+    else:
+        _console().print(f"[green]Stopped hands daemon {reply['stopped']}[/green]")
+    raise typer.Exit(code=0)
+
+
 @app.command()
 def report(
-    output_files: List[str] = typer.Argument(..., help="Robot XML output files to combine"),
+    output_files: List[str] = typer.Argument(..., help="Robot XML output files (or glob patterns) to combine"),
     report_file: str = typer.Option("report.html", "--report", "-r", help="Combined HTML report file"),
     log_file: str = typer.Option("log.html", "--log", "-l", help="Combined log file"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Also keep the merged output.xml here"),
+    cache: bool = typer.Option(True, "--cache/--no-cache", help="Reuse parsed results of unchanged inputs"),
 ) -> None:
-    """Generate combined HTML reports from Robot XML output files using rebot.
-    TODO: allow passing in wild cards.
+    """Generate combined HTML reports from Robot XML output files.
+
+    Multiple inputs are merged by the streaming merger in hands.merge_xml;
+    rebot only renders the single merged file to HTML. Patterns such as
+    'shards/*.xml' or 'results/**/output.xml' are expanded.
     """
     log.debug("report(output_files=%s, report_file=%s)", output_files, report_file)
     
     try:
+        import tempfile
+
         from robot import rebot_cli
-        
-        # Build rebot arguments
-        rebot_args = [
-            "--report", report_file,
-            "--log", log_file,
-            "--outputdir", ".",
-        ] + output_files
-        
-        console.print(f"[blue]Generating combined report from {len(output_files)} files...[/blue]")
-        rc = rebot_cli(rebot_args, exit=False)
+
+        from .merge_xml import MergeCache, merge_outputs
+
+        output_files = _expand_patterns(output_files)
+        if output:
+            # A pattern like '*.xml' must not pick up the previous merge result
+            output_files = [path for path in output_files if Path(path).resolve() != Path(output).resolve()]
+
+        with tempfile.TemporaryDirectory(prefix="hands-report-") as tmp_dir:
+            source = output_files[0]
+            if len(output_files) > 1 or output:
+                source = output or str(Path(tmp_dir) / "output.xml")
+                _console().print(f"[blue]Merging {len(output_files)} files...[/blue]")
+                summary = merge_outputs(output_files, source, cache=MergeCache() if cache else None)
+                _console().print(f"[blue]Merged {summary.total.total} tests "
+                                 f"({summary.total.passed} passed, {summary.total.failed} failed, "
+                                 f"{summary.total.skipped} skipped; "
+                                 f"{summary.cached}/{len(output_files)} inputs from cache)[/blue]")
+
+            # Build rebot arguments
+            rebot_args = [
+                "--report", report_file,
+                "--log", log_file,
+                "--outputdir", ".",
+                source,
+            ]
+
+            _console().print(f"[blue]Generating combined report from {len(output_files)} files...[/blue]")
+            rc = rebot_cli(rebot_args, exit=False)
         
         if rc == 0:
-            console.print(f"[green]Combined report generated: {report_file}[/green]")
+            _console().print(f"[green]Combined report generated: {report_file}[/green]")
         else:
-            console.print(f"[red]Report generation failed with exit code: {rc}[/red]")
+            _console().print(f"[red]Report generation failed with exit code: {rc}[/red]")
             
     except Exception as exc:
         log.error("rebot failed: %s", exc)
@@ -100,16 +756,146 @@ def report(
     _exit(rc)
 
 
+def _print_changes(title: str, changes: list, top: int) -> None:
+    """Print a table of duration changes (see hands.perf_diff.Change)."""
+    from rich.table import Table
+
+    table = Table(title=f"{title} ({len(changes)})", title_justify="left")
+    for column in ("Kind", "Name", "Baseline", "Current", "Change", "p", "Runs"):
+        table.add_column(column, justify="left" if column in ("Kind", "Name") else "right")
+    for change in changes[:top] if top else changes:
+        table.add_row(
+            change.kind,
+            change.name,
+            f"{change.baseline:.3f}s",
+            f"{change.current:.3f}s",
+            f"{change.delta:+.3f}s ({change.ratio:+.0%})",
+            "-" if change.p_value is None else f"{change.p_value:.3g}",
+            f"{change.runs[0]}/{change.runs[1]}",
+        )
+    _console().print(table)
+
+
+@app.command()
+def perf_diff(
+    baseline: str = typer.Argument(..., help="Baseline output.xml (or glob pattern for several runs)"),
+    current: str = typer.Argument(..., help="Current output.xml (or glob pattern for several runs)"),
+    threshold: float = typer.Option(0.2, "--threshold", "-t", min=0.0, help="Relative change to report (0.2 = 20%)"),
+    min_delta: float = typer.Option(0.05, "--min-delta", min=0.0, help="Absolute change to report, in seconds"),
+    alpha: float = typer.Option(
+        0.05, "--alpha", min=0.0, max=1.0, help="Significance level when both sides have several runs"),
+    top: int = typer.Option(20, "--top", "-n", min=0, help="Rows per table (0 for all)"),
+    json_file: Optional[str] = typer.Option(None, "--json", help="Also write all compared tests and suites as JSON"),
+) -> None:
+    """Compare test and suite durations of two runs; exit 1 on a regression.
+
+    With several files per side (e.g. 'baseline/*.xml'), a change must also
+    pass Welch's t-test at --alpha.
+    """
+    log.debug("perf_diff(baseline=%s, current=%s)", baseline, current)
+
+    try:
+        from .perf_diff import Thresholds
+        from .perf_diff import perf_diff as compare_outputs
+
+        baseline_files = _expand_patterns([baseline])
+        current_files = _expand_patterns([current])
+        diff = compare_outputs(baseline_files, current_files, Thresholds(threshold, min_delta, alpha))
+    except Exception as exc:
+        log.error("perf-diff failed: %s", exc)
+        _exit(3)
+
+    _console().print(f"[blue]Compared {len(diff.tests)} tests and {len(diff.suites)} suites "
+                     f"({len(baseline_files)} baseline / {len(current_files)} current files; "
+                     f"{diff.only_baseline} tests only in baseline, {diff.only_current} only in current)[/blue]")
+    regressions, improvements = diff.regressions, diff.improvements
+    if improvements:
+        _print_changes("Faster", improvements, top)
+    if regressions:
+        _print_changes("Slower", regressions, top)
+
+    if json_file:
+        import json
+        from dataclasses import asdict
+
+        with open(json_file, "w", encoding="utf-8") as target:
+            json.dump({"tests": [asdict(change) for change in diff.tests],
+                       "suites": [asdict(change) for change in diff.suites]}, target, indent=2)
+
+    if regressions:
+        _console().print(f"[red]{len(regressions)} performance regressions[/red]")
+        _exit(1)
+    _console().print("[green]No performance regressions[/green]")
+    _exit(0)
+
+
+@app.command()
+def stats(
+    output_files: List[str] = typer.Argument(..., help="Robot XML output files (or glob patterns)"),
+    top: int = typer.Option(10, "--top", "-n", min=1, help="Number of slowest tests to show"),
+    tags: int = typer.Option(10, "--tags", min=0, help="Number of failing tags to show (0 for all)"),
+    workers: int = typer.Option(1, "--workers", "-w", min=1, help="Scan files in N processes"),
+    json_file: Optional[str] = typer.Option(None, "--json", help="Write the statistics as JSON ('-' for stdout)"),
+) -> None:
+    """Summarize output files: counts, slowest tests and failures by tag.
+
+    Files are streamed, so memory stays small for outputs of any size.
+    """
+    log.debug("stats(output_files=%s, workers=%s)", output_files, workers)
+
+    try:
+        from .stats import collect_stats
+
+        paths = _expand_patterns(output_files)
+        summary = collect_stats(paths, top=top, workers=workers)
+    except Exception as exc:
+        log.error("stats failed: %s", exc)
+        _exit(3)
+
+    if json_file:
+        import json
+
+        text = json.dumps(summary.to_dict(), indent=2)
+        if json_file == "-":
+            typer.echo(text)
+            raise typer.Exit(code=0)
+        Path(json_file).write_text(text + "\n", encoding="utf-8")
+
+    from rich.table import Table
+
+    counts = summary.counts
+    _console().print(f"[bold]{counts.total} tests in {summary.files} files[/bold]: "
+                     f"[green]{counts.passed} passed[/green], [red]{counts.failed} failed[/red], "
+                     f"[yellow]{counts.skipped} skipped[/yellow]; {summary.elapsed:.1f}s test time")
+    slowest = Table(title="Slowest tests", title_justify="left")
+    slowest.add_column("Test")
+    slowest.add_column("Seconds", justify="right")
+    for name, seconds in summary.slowest():
+        slowest.add_row(name, f"{seconds:.3f}")
+    _console().print(slowest)
+    failing = summary.failures_by_tag(tags)
+    if failing:
+        by_tag = Table(title="Failures by tag", title_justify="left")
+        for column in ("Tag", "Failed", "Total", "Rate"):
+            by_tag.add_column(column, justify="left" if column == "Tag" else "right")
+        for tag, tag_counts in failing:
+            by_tag.add_row(tag, str(tag_counts.failed), str(tag_counts.total),
+                           f"{tag_counts.failed / tag_counts.total:.1%}")
+        _console().print(by_tag)
+
+
 @app.command()
 def list_engines() -> None:
     """List available test engines and their status."""
+    from .engine_detector import EngineDetector
+    
     detector = EngineDetector()
     available_engines = detector.get_available_engines()
     
-    console.print("[bold]Available Test Engines:[/bold]")
+    _console().print("[bold]Available Test Engines:[/bold]")
     for engine_name, is_available in available_engines.items():
         status = "[green]✓[/green]" if is_available else "[red]✗[/red]"
-        console.print(f"  {status} {engine_name}")
+        _console().print(f"  {status} {engine_name}")
 
 
 def cli() -> None:
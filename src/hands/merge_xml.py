@@ -0,0 +1,441 @@
+"""Streaming merger that combines Robot-style output.xml files into one.
+
+Each input is read incrementally with a pull parser; suite start/end tags are copied as
+they are seen and every other suite child (tests, setup/teardown keywords,
+status) is serialized as soon as it is complete and then dropped. Memory
+therefore depends on the nesting depth and on the number of suites, not on
+the number of tests or the size of the inputs.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, TextIO
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+from .cache import cache_dir, file_digest, load_json, save_json
+from .output_reader import format_epoch, iter_events, status_times, tags_of
+from .report_xml import _rf_timestamp, _start_tag
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Counts:
+    """Pass/fail/skip counters."""
+    passed: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.passed + self.failed + self.skipped
+
+    @property
+    def status(self) -> str:
+        """Suite status following Robot's rules."""
+        if self.failed:
+            return "FAIL"
+        if self.passed or not self.skipped:
+            return "PASS"
+        return "SKIP"
+
+    def add(self, status: Optional[str]) -> None:
+        if status == "PASS":
+            self.passed += 1
+        elif status in ("SKIP", "NOT RUN"):
+            self.skipped += 1
+        else:
+            self.failed += 1
+
+    def update(self, other: "Counts") -> None:
+        self.passed += other.passed
+        self.failed += other.failed
+        self.skipped += other.skipped
+
+    def attrib(self) -> Dict[str, str]:
+        return {"pass": str(self.passed), "fail": str(self.failed), "skip": str(self.skipped)}
+
+
+@dataclass
+class SuiteStat:
+    """Statistics of one suite in the merged tree."""
+    id: str
+    name: str
+    longname: str
+    counts: Counts = field(default_factory=Counts)
+
+
+@dataclass
+class InputSummary:
+    """Statistics of one merged input, independent of the other inputs.
+
+    Suite long names are relative to the combined suite; ids are the ones
+    written for the input's position in the merge.
+    """
+    name: str
+    total: Counts = field(default_factory=Counts)
+    tags: Dict[str, Counts] = field(default_factory=dict)
+    suites: List[SuiteStat] = field(default_factory=list)
+    start: Optional[float] = None
+    end: Optional[float] = None
+    errors: List[str] = field(default_factory=list)
+
+    def add_bounds(self, start: Optional[float], end: Optional[float]) -> None:
+        """Widen the time bounds to include [start, end]."""
+        if start is not None and (self.start is None or start < self.start):
+            self.start = start
+        if end is not None and (self.end is None or end > self.end):
+            self.end = end
+
+    def reindexed(self, index: int) -> "InputSummary":
+        """Return a copy with ids moved from position 1 to position ``index``."""
+        suites = [SuiteStat(_reindex_id(s.id, index), s.name, s.longname, s.counts) for s in self.suites]
+        return InputSummary(self.name, self.total, self.tags, suites, self.start, self.end, self.errors)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Convert to plain JSON data."""
+        return asdict(self)
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "InputSummary":
+        """Rebuild from to_json() data."""
+        return cls(
+            name=data["name"],
+            total=Counts(**data["total"]),
+            tags={tag: Counts(**counts) for tag, counts in data["tags"].items()},
+            suites=[SuiteStat(s["id"], s["name"], s["longname"], Counts(**s["counts"]))
+                    for s in data["suites"]],
+            start=data["start"],
+            end=data["end"],
+            errors=data["errors"],
+        )
+
+
+@dataclass
+class MergeSummary(InputSummary):
+    """What merge_outputs learned while streaming the inputs."""
+    cached: int = 0
+
+    def add_input(self, summary: InputSummary) -> None:
+        """Fold the statistics of one input into the combined ones."""
+        self.total.update(summary.total)
+        self.suites[0].counts.update(summary.total)
+        for tag, counts in summary.tags.items():
+            self.tags.setdefault(tag, Counts()).update(counts)
+        for suite in summary.suites:
+            self.suites.append(SuiteStat(suite.id, suite.name, f"{self.name}.{suite.longname}", suite.counts))
+        self.add_bounds(summary.start, summary.end)
+        self.errors.extend(summary.errors)
+
+
+def _root_suite_name(path: str) -> str:
+    """Read the name of the top-level suite without parsing the whole file."""
+    for _, elem in iter_events(path, ("start",)):
+        if elem.tag == "suite":
+            return elem.get("name", "")
+    raise ValueError(f"No suite found in {path}")
+
+
+def _reindex_id(value: str, index: int) -> str:
+    """Move an id written for input position 1 to position ``index``."""
+    return f"s1-s{index}{value[5:]}" if value.startswith("s1-s1") else value
+
+
+def _id_first(attrib: Dict[str, str], new_id: str) -> Dict[str, str]:
+    """Copy ``attrib`` with ``new_id`` as its first attribute, as Robot writes it."""
+    return {"id": new_id, **{key: value for key, value in attrib.items() if key != "id"}}
+
+
+_ATTR_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+
+
+def _append_xml(elem: ET.Element, parts: List[str]) -> None:
+    """Append the serialization of ``elem`` (without its tail) to ``parts``.
+
+    A trimmed-down ElementTree serializer: output files carry no namespaces,
+    which saves most of the per-element cost of ET.tostring.
+    """
+    tag = elem.tag
+    attrs = "".join(f' {key}="{escape(value, _ATTR_ENTITIES)}"' for key, value in elem.items())
+    text = elem.text
+    if text or len(elem):
+        parts.append(f"<{tag}{attrs}>")
+        if text:
+            parts.append(escape(text))
+        for child in elem:
+            _append_xml(child, parts)
+            if child.tail:
+                parts.append(escape(child.tail))
+        parts.append(f"</{tag}>")
+    else:
+        parts.append(f"<{tag}{attrs}/>")
+
+
+def _serialize(elem: ET.Element) -> str:
+    """Serialize a complete element without its tail text."""
+    parts: List[str] = []
+    _append_xml(elem, parts)
+    return "".join(parts)
+
+
+_COPIED, _FLATTENED = 1, 2
+
+
+def _merge_input(path: str, out: TextIO, top: List[int], flatten: bool = False) -> InputSummary:
+    """Stream the suites of one input into ``out`` below the combined suite.
+
+    ``top`` holds how many suites and tests were already placed directly in
+    the combined suite and is advanced in place. Suite and test ids are
+    recomputed the way Robot numbers them, so inputs without ids (e.g. from
+    write_robot_output) get them too. With ``flatten`` the input's top-level
+    suite itself is dropped and its tests and child suites are placed
+    directly in the combined suite.
+    """
+    log.debug("_merge_input(path=%s, top=%s, flatten=%s)", path, top, flatten)
+    summary = InputSummary(name="")
+    stack: List[ET.Element] = []
+    kinds: List[int] = []  # parallel to stack: 0, _COPIED or _FLATTENED suite
+    frames = [SuiteStat("s1", "", "")]  # suite stats of the open suites, below the combined one
+    children = [top]  # parallel to frames: suites/tests numbered so far
+    for event, elem in iter_events(path, ("start", "end")):
+        if event == "start":
+            kind = 0
+            if elem.tag == "suite" and stack and (len(stack) == 1 or kinds[-1]):
+                kind = _FLATTENED if flatten and len(stack) == 1 else _COPIED
+                if len(stack) == 1:
+                    summary.name = elem.get("name", "")
+            stack.append(elem)
+            kinds.append(kind)
+            if kind == _COPIED:
+                children[-1][0] += 1
+                suite_id = f"{frames[-1].id}-s{children[-1][0]}"
+                out.write(_start_tag("suite", _id_first(elem.attrib, suite_id)) + "\n")
+                suite_name = elem.get("name", "")
+                longname = f"{frames[-1].longname}.{suite_name}" if len(frames) > 1 else suite_name
+                frame = SuiteStat(suite_id, suite_name, longname)
+                frames.append(frame)
+                children.append([0, 0])
+                summary.suites.append(frame)
+            continue
+
+        stack.pop()
+        kind = kinds.pop()
+        if not stack:
+            continue
+        parent = stack[-1]
+        if kind == _COPIED:
+            out.write("</suite>\n")
+            frames.pop()
+            children.pop()
+        elif kind == _FLATTENED:
+            pass
+        elif kinds[-1]:
+            if elem.tag == "status" and len(stack) == 2:
+                summary.add_bounds(*status_times(elem))
+            if elem.tag == "test":
+                children[-1][1] += 1
+                elem.attrib = _id_first(elem.attrib, f"{frames[-1].id}-t{children[-1][1]}")
+                status_el = elem.find("status")
+                status = status_el.get("status") if status_el is not None else None
+                for frame in frames[1:]:
+                    frame.counts.add(status)
+                summary.total.add(status)
+                for tag in tags_of(elem):
+                    summary.tags.setdefault(tag, Counts()).add(status)
+                out.write(_serialize(elem) + "\n")
+            elif kinds[-1] == _COPIED:
+                out.write(_serialize(elem) + "\n")
+            # Other children of a flattened suite (doc, status, ...) are dropped
+        elif len(stack) == 1:
+            # <statistics> is recomputed; <errors> messages are carried over
+            if elem.tag == "errors":
+                summary.errors.extend(_serialize(msg) for msg in elem)
+        else:
+            # Nested deeper: serialized together with its suite child
+            continue
+        elem.clear()
+        parent.remove(elem)
+    return summary
+
+
+def _copy_fragment(fragment: Path, index: int, out: TextIO) -> None:
+    """Copy a cached fragment written for position 1 to position ``index``.
+
+    Suite and test start tags are written on their own line with the id
+    first, and text content never contains a raw '<', so only lines that
+    start with such a tag need their id prefix rewritten.
+    """
+    old, new = 'id="s1-s1', f'id="s1-s{index}'
+    with open(fragment, encoding="UTF-8", newline="") as source:
+        if index == 1:
+            shutil.copyfileobj(source, out)
+            return
+        for line in source:
+            if line.startswith(("<suite id=", "<test id=")):
+                line = line.replace(old, new, 1)
+            out.write(line)
+
+
+class MergeCache:
+    """On-disk cache of merged input fragments, keyed by content hash.
+
+    For every input digest the cache keeps the input's suites as written by
+    the merger (ids for position 1) and its InputSummary, so unchanged
+    inputs are copied into the combined output without being parsed again.
+    A path index remembers each input's size/mtime and digest, so unchanged
+    files are not even re-hashed.
+    """
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        """Open the cache in ``directory`` (default: the 'merge' cache dir)."""
+        self.directory = Path(directory) if directory else cache_dir("merge")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.directory / "index.json"
+        self._index: Dict[str, Dict[str, Any]] = load_json(self._index_path, {})
+        self.hits = 0
+        self.misses = 0
+
+    def digest(self, path: str) -> str:
+        """Return the content digest of ``path``, re-hashing only changed files."""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = self._index.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["digest"]
+        digest = file_digest(path)
+        self._index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}
+        return digest
+
+    def fragment_path(self, digest: str) -> Path:
+        return self.directory / f"{digest}.xml"
+
+    def get(self, digest: str) -> Optional[InputSummary]:
+        """Return the cached summary for ``digest`` if its fragment exists."""
+        data = load_json(self.directory / f"{digest}.json", None)
+        if data is None or not self.fragment_path(digest).exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return InputSummary.from_json(data)
+
+    def put(self, path: str, digest: str) -> InputSummary:
+        """Parse ``path`` into a fragment for ``digest`` and return its summary."""
+        fragment = self.fragment_path(digest)
+        tmp_path = fragment.with_name(f".{fragment.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="UTF-8", newline="") as out:
+            summary = _merge_input(path, out, [0, 0])
+        os.replace(tmp_path, fragment)
+        save_json(self.directory / f"{digest}.json", summary.to_json())
+        return summary
+
+    def save(self) -> None:
+        """Persist the path index and drop entries no index path refers to."""
+        self._index = {key: entry for key, entry in self._index.items() if os.path.exists(key)}
+        save_json(self._index_path, self._index)
+        live = {entry["digest"] for entry in self._index.values()}
+        for entry in self.directory.glob("*.json"):
+            if entry.stem not in live and entry != self._index_path:
+                entry.unlink(missing_ok=True)
+                self.fragment_path(entry.stem).unlink(missing_ok=True)
+
+
+def _write_statistics(out: TextIO, summary: MergeSummary) -> None:
+    """Write the recomputed <statistics> block."""
+    out.write("<statistics>\n<total>\n")
+    out.write(_start_tag("stat", summary.total.attrib()) + "All Tests</stat>\n")
+    out.write("</total>\n<tag>\n")
+    for tag in sorted(summary.tags):
+        out.write(_start_tag("stat", summary.tags[tag].attrib()) + f"{escape(tag)}</stat>\n")
+    out.write("</tag>\n<suite>\n")
+    for suite in summary.suites:
+        attrib = {**suite.counts.attrib(), "id": suite.id, "name": suite.name}
+        out.write(_start_tag("stat", attrib) + f"{escape(suite.longname)}</stat>\n")
+    out.write("</suite>\n</statistics>\n")
+
+
+def merge_outputs(
+    inputs: Sequence[str],
+    out_file: str,
+    name: Optional[str] = None,
+    cache: Optional[MergeCache] = None,
+    flatten: bool | Sequence[bool] = False,
+    source: Optional[str] = None,
+) -> MergeSummary:
+    """Merge Robot output.xml files into one output with recomputed statistics.
+
+    The top-level suite of every input becomes a child suite of a new
+    top-level suite named ``name`` (default: the input suite names joined
+    with ' & ', as rebot does). Suite and test ids are renumbered to match.
+    With a MergeCache, only inputs whose content changed are parsed.
+
+    With ``flatten`` the inputs are taken as partial runs of one suite (e.g.
+    parallel workers): their top-level suites are dissolved and the tests
+    and child suites are placed directly in the combined suite, which is
+    named after the first input by default. The cache is not used then.
+    ``flatten`` may also be given per input, to keep some top-level suites.
+
+    ``source`` is recorded on the combined suite, e.g. the folder whose
+    sub-suites were run separately.
+
+    Error handling: raises ValueError without inputs; propagates parse and IO errors.
+    """
+    log.debug("merge_outputs(inputs=%d, out_file=%s)", len(inputs), out_file)
+    if not inputs:
+        raise ValueError("No output files to merge")
+
+    flags = [flatten] * len(inputs) if isinstance(flatten, bool) else list(flatten)
+    if any(flags):
+        cache = None
+        if name is None:
+            name = _root_suite_name(inputs[0])
+    cached: List[Optional[InputSummary]] = [None] * len(inputs)
+    digests: List[str] = []
+    if cache is not None:
+        digests = [cache.digest(path) for path in inputs]
+        cached = [cache.get(digest) for digest in digests]
+    if name is None:
+        name = " & ".join(summary.name if summary else _root_suite_name(path)
+                          for path, summary in zip(inputs, cached))
+
+    summary = MergeSummary(name=name)
+    summary.suites.append(SuiteStat("s1", name, name))
+    generated = _rf_timestamp(datetime.now(timezone.utc))
+    with open(out_file, "w", encoding="UTF-8", newline="") as out:
+        out.write("<?xml version='1.0' encoding='UTF-8'?>\n")
+        out.write(_start_tag("robot", {"generator": "hands merge", "generated": generated}) + "\n")
+        root = {"id": "s1", "name": name}
+        if source:
+            root["source"] = source
+        out.write(_start_tag("suite", root) + "\n")
+        top = [0, 0]
+        for index, path in enumerate(inputs, start=1):
+            if cache is None:
+                summary.add_input(_merge_input(path, out, top, flags[index - 1]))
+                continue
+            digest = digests[index - 1]
+            input_summary = cached[index - 1]
+            if input_summary is None:
+                input_summary = cache.put(path, digest)
+            else:
+                summary.cached += 1
+            _copy_fragment(cache.fragment_path(digest), index, out)
+            summary.add_input(input_summary.reindexed(index))
+
+        status = {"status": summary.total.status,
+                  "starttime": format_epoch(summary.start) if summary.start is not None else "N/A",
+                  "endtime": format_epoch(summary.end) if summary.end is not None else "N/A"}
+        out.write(_start_tag("status", status) + "</status>\n</suite>\n")
+        _write_statistics(out, summary)
+        out.write("<errors>\n" + "".join(msg + "\n" for msg in summary.errors) + "</errors>\n")
+        out.write("</robot>\n")
+    if cache is not None:
+        cache.save()
+    log.info("Merged %d outputs (%d tests, %d from cache) into %s",
+             len(inputs), summary.total.total, summary.cached, out_file)
+    return summary
@@ -0,0 +1,242 @@
+"""Helpers to read Robot-style output.xml files without loading them whole."""
+from __future__ import annotations
+
+import functools
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+import xml.etree.ElementTree as ET
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_events(path: str, events: Sequence[str] = ("end",)) -> Iterator[Tuple[str, ET.Element]]:
+    """Yield (event, element) pairs while reading ``path`` in chunks.
+
+    Works like ET.iterparse, but without the reference cycle iterparse keeps
+    around its parser, so a finished file is freed immediately instead of at
+    the next garbage collection. Callers are expected to clear elements they
+    are done with.
+    """
+    parser = ET.XMLPullParser(events=events)
+    with open(path, "rb") as source:
+        while True:
+            data = source.read(CHUNK_SIZE)
+            if not data:
+                break
+            parser.feed(data)
+            yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+@functools.lru_cache(maxsize=256)
+def _utc_midnight(day: str) -> float:
+    """Epoch seconds of 00:00 UTC on a 'YYYYMMDD' day."""
+    return datetime(int(day[:4]), int(day[4:6]), int(day[6:8]), tzinfo=timezone.utc).timestamp()
+
+
+def parse_rf_timestamp(value: Optional[str]) -> Optional[float]:
+    """Parse a Robot timestamp into epoch seconds.
+
+    Both the legacy 'YYYYMMDD HH:MM:SS.mmm' format (Robot < 7 and
+    write_robot_output) and ISO 8601 (Robot >= 7) are accepted. Timestamps
+    without a zone are read as UTC; 'N/A' and empty values give None.
+    """
+    if not value or value == "N/A":
+        return None
+    if len(value) == 21 and value[8] == " " and value[11] == ":":
+        # Legacy format, on every <status>: slicing is ~10x faster than strptime
+        try:
+            return (_utc_midnight(value[:8]) + int(value[9:11]) * 3600 + int(value[12:14]) * 60
+                    + float(value[15:]))
+        except ValueError:
+            pass
+    try:
+        if "-" in value:
+            dt = datetime.fromisoformat(value)
+        else:
+            dt = datetime.strptime(value, "%Y%m%d %H:%M:%S.%f")
+    except ValueError:
+        log.debug("Unparseable Robot timestamp: %s", value)
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def status_times(status: Optional[ET.Element]) -> Tuple[Optional[float], Optional[float]]:
+    """Return (start, end) epoch seconds of a <status> element.
+
+    Handles both 'starttime'/'endtime' and the Robot 7 'start'/'elapsed'
+    attribute pairs.
+    """
+    if status is None:
+        return None, None
+    return _attrib_times(status.attrib)
+
+
+def _attrib_times(attrib: Mapping[str, str]) -> Tuple[Optional[float], Optional[float]]:
+    """status_times() of a <status> element's attributes."""
+    if "start" in attrib:
+        start = parse_rf_timestamp(attrib.get("start"))
+        try:
+            elapsed = float(attrib.get("elapsed", "0"))
+        except ValueError:
+            elapsed = 0.0
+        return start, None if start is None else start + elapsed
+    return parse_rf_timestamp(attrib.get("starttime")), parse_rf_timestamp(attrib.get("endtime"))
+
+
+def elapsed_seconds(status: Optional[ET.Element]) -> Optional[float]:
+    """Return the elapsed time of a <status> element in seconds."""
+    start, end = status_times(status)
+    if start is None or end is None:
+        return None
+    return max(0.0, end - start)
+
+
+def tags_of(test: ET.Element) -> List[str]:
+    """Return the tags of a <test> element (Robot 6 and Robot 7 layouts)."""
+    tags = test.find("tags")
+    holder = tags if tags is not None else test
+    return [tag.text or "" for tag in holder.findall("tag")]
+
+
+def format_epoch(seconds: float) -> str:
+    """Format epoch seconds as a legacy Robot timestamp (UTC)."""
+    dt = datetime(1970, 1, 1) + timedelta(seconds=seconds)
+    return dt.strftime("%Y%m%d %H:%M:%S.%f")[:-3]
+
+
+@dataclass
+class TestRecord:
+    """One <test> of an output.xml, as yielded by iter_tests."""
+    __test__ = False  # not a pytest test class
+
+    name: str
+    suite: str  # long name of the enclosing suite, e.g. 'Top.Child'
+    source: Optional[str]  # source of the nearest enclosing suite that has one
+    status: str
+    start: Optional[float] = None
+    elapsed: Optional[float] = None
+    tags: List[str] = field(default_factory=list)
+    message: Optional[str] = None
+    # Long names of all enclosing suites, outermost first; suite names may contain dots
+    suites: Tuple[str, ...] = ()
+
+    @property
+    def longname(self) -> str:
+        return f"{self.suite}.{self.name}" if self.suite else self.name
+
+
+class _TestCollector:
+    """XMLParser target that turns <test> elements into TestRecords.
+
+    Only the fields of a TestRecord are kept - no Element is ever built -
+    and finished records wait in ``ready`` until the caller takes them.
+    Inside a test only the nesting depth is tracked: the test's own
+    <status> and tags (in <tags> for Robot < 7) are the children that matter.
+    """
+
+    def __init__(self) -> None:
+        self.ready: List[TestRecord] = []
+        # (long names from the outermost suite down, source) of open suites
+        self.suites: List[Tuple[Tuple[str, ...], Optional[str]]] = []
+        self.name: Optional[str] = None  # of the open test, None outside tests
+        self.depth = 0  # below the open test
+        self.in_tags = False
+        self.status: Optional[Mapping[str, str]] = None
+        self.tags: List[str] = []
+        self.message: Optional[str] = None
+        self.text: Optional[List[str]] = None  # text of the test's <status> or a <tag>
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if self.name is None:
+            if tag == "suite":
+                outer, source = self.suites[-1] if self.suites else ((), None)
+                name = attrib.get("name", "")
+                self.suites.append(((*outer, f"{outer[-1]}.{name}" if outer else name),
+                                    attrib.get("source") or source))
+            elif tag == "test" and self.suites:
+                self.name = attrib.get("name", "")
+                self.status = self.message = None
+                self.tags = []
+            return
+        self.depth += 1
+        if self.depth == 1:
+            if tag == "status":
+                self.status = attrib
+                self.text = []
+            elif tag == "tag":
+                self.text = []
+            elif tag == "tags":
+                self.in_tags = True
+        elif self.depth == 2 and self.in_tags:
+            self.text = []
+
+    def data(self, text: str) -> None:
+        if self.text is not None:
+            self.text.append(text)
+
+    def end(self, tag: str) -> None:
+        if self.name is None:
+            if tag == "suite":
+                self.suites.pop()
+            return
+        if self.depth:
+            self.depth -= 1
+            if self.text is not None:
+                text = "".join(self.text)
+                self.text = None
+                if tag == "status":
+                    self.message = text or None
+                else:
+                    self.tags.append(text)
+            elif tag == "tags" and not self.depth:
+                self.in_tags = False
+            return
+        status = self.status
+        start, end = _attrib_times(status) if status is not None else (None, None)
+        suites, source = self.suites[-1]
+        self.ready.append(TestRecord(
+            name=self.name,
+            suite=suites[-1],
+            source=source,
+            status=status.get("status", "FAIL") if status is not None else "FAIL",
+            start=start,
+            elapsed=None if start is None or end is None else max(0.0, end - start),
+            tags=self.tags,
+            message=self.message,
+            suites=suites,
+        ))
+        self.name = None
+
+    def close(self) -> None:
+        return None
+
+
+def iter_tests(path: str) -> Iterator[TestRecord]:
+    """Yield every test of an output.xml with bounded memory.
+
+    The file is fed to the parser in chunks and only the records of the
+    tests completed in each chunk are held, so files of any size can be
+    scanned. No element tree is built at all, which makes this several
+    times faster than walking iter_events().
+    """
+    collector = _TestCollector()
+    parser = ET.XMLParser(target=collector)
+    with open(path, "rb") as source:
+        while True:
+            data = source.read(CHUNK_SIZE)
+            if not data:
+                break
+            parser.feed(data)
+            if collector.ready:
+                yield from collector.ready
+                collector.ready = []
+    parser.close()
+    yield from collector.ready
@@ -0,0 +1,193 @@
+"""Run one test engine over partitions of the test files in a process pool."""
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence
+
+from .merge_xml import merge_outputs
+
+if TYPE_CHECKING:
+    from .test_engines import BaseTestEngine
+
+log = logging.getLogger(__name__)
+
+
+def _file_size(item: str) -> float:
+    """Default partition weight: the file size, a cheap proxy for runtime."""
+    try:
+        return float(os.path.getsize(item))
+    except OSError:
+        return 1.0
+
+
+def partition(
+    items: Sequence[str],
+    count: int,
+    weight: Optional[Callable[[str], float]] = None,
+) -> List[List[str]]:
+    """
+    Split ``items`` into at most ``count`` groups of near-equal total weight.
+    
+    Greedy longest-processing-time-first: the heaviest remaining item goes to
+    the lightest group. Items keep their original order within a group and
+    empty groups are dropped.
+    
+    Args:
+        items: Test files (or ids) to split
+        count: Number of groups wanted
+        weight: Expected cost of an item (default: file size)
+        
+    Returns:
+        The non-empty groups
+    """
+    weight = weight or _file_size
+    count = max(1, min(count, len(items)))
+    order = {item: position for position, item in enumerate(items)}
+    groups: List[List[str]] = [[] for _ in range(count)]
+    loads = [(0.0, index) for index in range(count)]
+    for item in sorted(items, key=lambda item: (-weight(item), order[item])):
+        load, index = heapq.heappop(loads)
+        groups[index].append(item)
+        heapq.heappush(loads, (load + weight(item), index))
+    return [sorted(group, key=order.__getitem__) for group in groups if group]
+
+
+def partition_in_order(
+    items: Sequence[str],
+    count: int,
+    weight: Optional[Callable[[str], float]] = None,
+) -> List[List[str]]:
+    """
+    Split ``items`` into at most ``count`` consecutive groups with the lightest heaviest group.
+    
+    Unlike partition(), the groups concatenated give ``items`` back, so
+    outputs merged group by group keep the order of a serial run. The
+    smallest load limit for which a greedy fill needs no more than
+    ``count`` groups is found by bisection.
+    
+    Returns:
+        The non-empty groups, in order
+    """
+    if not items:
+        return []
+    weight = weight or _file_size
+    costs = [weight(item) for item in items]
+    count = max(1, min(count, len(items)))
+    
+    def fill(limit: float) -> List[List[str]]:
+        groups: List[List[str]] = [[]]
+        load = 0.0
+        for item, cost in zip(items, costs):
+            if groups[-1] and load + cost > limit:
+                groups.append([])
+                load = 0.0
+            groups[-1].append(item)
+            load += cost
+        return groups
+    
+    low, high = max(costs), sum(costs)
+    for _ in range(60):
+        if high - low <= 1e-9 * high:
+            break
+        middle = (low + high) / 2
+        if len(fill(middle)) <= count:
+            high = middle
+        else:
+            low = middle
+    return fill(high)
+
+
+def _run_partition(
+    engine_name: str,
+    folder: Path,
+    targets: List[str],
+    output_file: str,
+    verbose: bool,
+    extra_args: List[str],
+) -> int:
+    """Process-pool entry point: run one partition with a fresh engine."""
+    from .engine_registry import TestEngineFactory
+
+    engine = TestEngineFactory.create_engine(engine_name)
+    return engine.run_tests(folder, output_file, verbose, [*extra_args, *engine.worker_args], targets)
+
+
+def run_partitioned(
+    engine: "BaseTestEngine",
+    folder: Path,
+    partitions: List[List[str]],
+    output_file: str,
+    verbose: bool = False,
+    extra_args: List[str] | None = None,
+    workers: Optional[int] = None,
+    partition_args: Optional[List[List[str]]] = None,
+    priority: Optional[Sequence[float]] = None,
+    flatten: bool = True,
+    name: Optional[str] = None,
+    source: Optional[str] = None,
+) -> int:
+    """
+    Run every partition in its own process and merge the outputs.
+    
+    Each worker process runs exactly one partition (pytest and robot keep
+    module state between in-process runs) and writes its own output.xml
+    into a temporary directory; the outputs are then merged into
+    ``output_file`` as one flat suite, or with ``flatten=False`` with each
+    partition's top-level suite kept as a child suite.
+    
+    Args:
+        workers: Processes to run at once (default: one per partition)
+        partition_args: Extra arguments for each partition's run
+        priority: Partitions with a higher value are started first (e.g.
+            expected runtime); outputs are still merged in the given order
+        flatten, name, source: Passed on to merge_outputs
+    
+    Returns:
+        The partitions' exit codes combined by the engine
+    """
+    log.info("Running %d %s partitions in parallel", len(partitions), engine.name)
+    partition_args = partition_args or [[] for _ in partitions]
+    with tempfile.TemporaryDirectory(prefix="hands-workers-") as tmp_dir:
+        outputs = [str(Path(tmp_dir) / f"worker{index}.xml") for index in range(len(partitions))]
+        start_order = range(len(partitions))
+        if priority is not None:
+            start_order = sorted(start_order, key=lambda index: -priority[index])
+        with ProcessPoolExecutor(max_workers=workers or len(partitions), max_tasks_per_child=1) as pool:
+            futures = {
+                index: pool.submit(_run_partition, engine.name, folder, partitions[index], outputs[index],
+                                   verbose, [*(extra_args or []), *partition_args[index]])
+                for index in start_order
+            }
+            codes = [futures[index].result() for index in range(len(partitions))]
+        return merge_partitions(engine, outputs, codes, output_file, flatten, name, source)
+
+
+def merge_partitions(
+    engine: "BaseTestEngine",
+    outputs: List[str],
+    codes: List[int],
+    output_file: str,
+    flatten: bool = True,
+    name: Optional[str] = None,
+    source: Optional[str] = None,
+) -> int:
+    """
+    Merge the outputs the partitions wrote into ``output_file``.
+    
+    Outputs are merged as one flat suite unless ``flatten`` is False.
+    
+    Returns:
+        The partitions' exit codes combined by the engine, or 3 if no
+        partition wrote an output
+    """
+    written = [path for path in outputs if os.path.exists(path)]
+    if not written:
+        log.error("No %s worker wrote an output file", engine.name)
+        return engine.combine_exit_codes(codes) or 3
+    merge_outputs(written, output_file, name=name, flatten=flatten, source=source)
+    return engine.combine_exit_codes(codes)
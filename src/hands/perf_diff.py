@@ -0,0 +1,171 @@
+"""Compare test durations of two sets of Robot-style output.xml files.
+
+Both sides are streamed with hands.output_reader, so only one duration per
+test and input file is kept in memory. Tests are matched by long name; a
+suite's duration in one input is the sum of its tests' (sub-suites included).
+
+With at least two inputs on each side, a change only counts if Welch's
+t-test finds it significant; with a single input per side only the
+thresholds apply.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import statistics
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from .output_reader import iter_tests
+
+log = logging.getLogger(__name__)
+
+# Samples per test/suite long name, one per input file
+Samples = Dict[str, List[float]]
+
+
+def load_samples(paths: Sequence[str]) -> tuple[Samples, Samples]:
+    """Stream ``paths`` and return (test samples, suite samples)."""
+    tests: Samples = {}
+    suites: Samples = {}
+    for path in paths:
+        suite_totals: Dict[str, float] = {}
+        for test in iter_tests(path):
+            if test.elapsed is None:
+                continue
+            tests.setdefault(test.longname, []).append(test.elapsed)
+            for suite in test.suites:
+                suite_totals[suite] = suite_totals.get(suite, 0.0) + test.elapsed
+        for suite, total in suite_totals.items():
+            suites.setdefault(suite, []).append(total)
+    log.debug("Read %d tests and %d suites from %d files", len(tests), len(suites), len(paths))
+    return tests, suites
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """Continued fraction of the incomplete beta function (modified Lentz)."""
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((a + m2 - 1.0) * (a + m2)),
+                          -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1.0))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1e-12:
+            break
+    return h
+
+
+def betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def welch_p_value(baseline: Sequence[float], current: Sequence[float]) -> Optional[float]:
+    """Two-sided p-value of Welch's t-test; None with fewer than two samples on a side."""
+    if len(baseline) < 2 or len(current) < 2:
+        return None
+    var_base = statistics.variance(baseline) / len(baseline)
+    var_cur = statistics.variance(current) / len(current)
+    spread = var_base + var_cur
+    difference = statistics.fmean(current) - statistics.fmean(baseline)
+    if spread == 0.0:
+        return 1.0 if difference == 0.0 else 0.0
+    t = difference / math.sqrt(spread)
+    df = spread ** 2 / (var_base ** 2 / (len(baseline) - 1) + var_cur ** 2 / (len(current) - 1))
+    return betainc(df / 2.0, 0.5, df / (df + t * t))
+
+
+@dataclass
+class Change:
+    """Duration change of one test or suite."""
+    kind: str  # "test" | "suite"
+    name: str
+    baseline: float  # mean seconds
+    current: float
+    runs: tuple[int, int]  # samples on each side
+    p_value: Optional[float] = None
+    verdict: str = "unchanged"  # "regression" | "improvement" | "unchanged"
+
+    @property
+    def delta(self) -> float:
+        return self.current - self.baseline
+
+    @property
+    def ratio(self) -> float:
+        """Relative change, e.g. 0.25 for 25% slower; inf for a change from zero."""
+        if self.baseline == 0.0:
+            return math.inf if self.current > 0.0 else 0.0
+        return self.delta / self.baseline
+
+
+@dataclass
+class Thresholds:
+    """When a duration change counts as a regression or an improvement."""
+    ratio: float = 0.2  # relative change
+    min_delta: float = 0.05  # absolute change, seconds
+    alpha: float = 0.05  # significance level of the t-test
+
+
+def compare(baseline: Samples, current: Samples, kind: str, thresholds: Thresholds) -> List[Change]:
+    """Compare the names present on both sides, largest absolute change first."""
+    changes = []
+    for name in baseline.keys() & current.keys():
+        before, after = baseline[name], current[name]
+        change = Change(kind, name, statistics.fmean(before), statistics.fmean(after), (len(before), len(after)),
+                        welch_p_value(before, after))
+        significant = change.p_value is None or change.p_value < thresholds.alpha
+        if significant and abs(change.delta) >= thresholds.min_delta and abs(change.ratio) >= thresholds.ratio:
+            change.verdict = "regression" if change.delta > 0 else "improvement"
+        changes.append(change)
+    changes.sort(key=lambda change: (-abs(change.delta), change.name))
+    return changes
+
+
+@dataclass
+class PerfDiff:
+    """Result of comparing a baseline against a current set of outputs."""
+    tests: List[Change]
+    suites: List[Change]
+    only_baseline: int
+    only_current: int
+
+    def changes(self, verdict: str) -> List[Change]:
+        return [change for change in (*self.suites, *self.tests) if change.verdict == verdict]
+
+    @property
+    def regressions(self) -> List[Change]:
+        return self.changes("regression")
+
+    @property
+    def improvements(self) -> List[Change]:
+        return self.changes("improvement")
+
+
+def perf_diff(baseline_paths: Sequence[str], current_paths: Sequence[str],
+              thresholds: Optional[Thresholds] = None) -> PerfDiff:
+    """Compare test and suite durations of two sets of output files."""
+    thresholds = thresholds or Thresholds()
+    base_tests, base_suites = load_samples(baseline_paths)
+    cur_tests, cur_suites = load_samples(current_paths)
+    return PerfDiff(
+        tests=compare(base_tests, cur_tests, "test", thresholds),
+        suites=compare(base_suites, cur_suites, "suite", thresholds),
+        only_baseline=len(base_tests.keys() - cur_tests.keys()),
+        only_current=len(cur_tests.keys() - base_tests.keys()),
+    )
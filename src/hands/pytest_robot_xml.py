@@ -1,17 +1,50 @@
-"""Pytest plugin that emits Robot-style output.xml at session end."""
+"""Pytest plugin that streams a Robot-style output.xml while the session runs.
+
+Each test is written once its teardown report arrives: its time spans setup
+to teardown, and the setup, call and teardown phases become Robot keywords
+(setup/teardown typed) with their own status and elapsed time. Tests still
+waiting for their teardown at session end (a crashed xdist worker, an
+aborted session) are written as failed. Fixture setup times are recorded
+too and summarized with --robot-fixture-durations.
+
+Under pytest-xdist only the controller writes: the phase times are already
+part of the reports xdist ships to the controller, and workers attach their
+fixture timings to the same reports, so no extra channel or per-worker files
+are needed.
+
+When ``hands run`` records test impact ($HANDS_IMPACT_DB), what each test
+module runs on import and in its tests is attributed to its file (see
+hands.impact); every process records the tests it ran.
+"""
 from __future__ import annotations
 
 import logging  # https://docs.python.org/3/library/logging.html
-from datetime import datetime, timezone  # https://docs.python.org/3/library/datetime.html
-from typing import Dict, List  # https://docs.python.org/3/library/typing.html
+import os  # https://docs.python.org/3/library/os.html
+import time  # https://docs.python.org/3/library/time.html
+from typing import Dict, List, Optional, Tuple  # https://docs.python.org/3/library/typing.html
 import pytest  # https://docs.pytest.org/  # noqa: F401
 
-from .report_xml import TestResult, write_robot_output  # local util
+from .impact import ImpactRecorder, recorder_from_env  # local util
+from .report_xml import ResultBatch, RobotXmlWriter  # local util
 
 S_LOG_MSG_FORMAT = "%(asctime)s [%(levelname)-5.5s]  %(message)s"
 logging.basicConfig(level=logging.INFO, format=S_LOG_MSG_FORMAT)
 logger = logging.getLogger(__name__)
 
+# Results are buffered in a compact ResultBatch and handed to the writer in
+# chunks of this size, so timestamps are formatted in bulk.
+FLUSH_EVERY = 1000
+
+# Report attribute carrying [[argname, scope, baseid, duration_ns], ...] for the
+# fixtures set up during that phase; plain lists survive xdist's report
+# serialization.
+FIXTURES_ATTR = "robot_xml_fixtures"
+
+# Keyword type of each phase (the call is a plain body keyword)
+_PHASE_TYPES = {"setup": "SETUP", "call": None, "teardown": "TEARDOWN"}
+# Robot's prefixes for failures outside the test body
+_PHASE_PREFIXES = {"setup": "Setup failed:\n", "teardown": "Teardown failed:\n"}
+
 
 def pytest_addoption(parser) -> None:
     """Add --robot-output to configure where to write output.xml."""
@@ -30,51 +63,226 @@ def pytest_addoption(parser) -> None:
         default="Pytest Suite",
         help="Suite name in Robot XML"
     )
+    group.addoption(
+        "--robot-fixture-durations",
+        action="store",
+        type=int,
+        dest="robot_fixture_durations",
+        default=None,
+        metavar="N",
+        help="Show the N fixtures with the longest total setup time (N=0 for all)"
+    )
+    group.addoption(
+        "--robot-run-first",
+        action="store",
+        dest="robot_run_first",
+        default=None,
+        metavar="FILE",
+        help="Run the node ids listed in this JSON file first (hands run --failed-first)"
+    )
 
 
 class _Store:
-    """Collects per-test timing and results."""
+    """Collects per-test timing and streams results to the Robot XML writer."""
     def __init__(self) -> None:
-        self.starts: Dict[str, datetime] = {}
-        self.results: List[TestResult] = []
+        # Phase reports of tests whose teardown has not been reported yet
+        self.phases: Dict[str, list] = {}
+        # Fixture timings not yet attached to a report (this process)
+        self.fixture_times: List[list] = []
+        # (argname, scope, baseid) -> [setups, total ns, longest ns]
+        self.fixtures: Dict[Tuple[str, str, str], List[int]] = {}
+        self.results = ResultBatch()
+        self.writer: Optional[RobotXmlWriter] = None
+        self.impact: Optional[ImpactRecorder] = None
+        self.worker = False
+
+    def flush(self) -> None:
+        """Hand the buffered results to the writer."""
+        if self.writer is None:
+            return
+        try:
+            self.writer.add_batch(self.results)
+        except OSError as exc:
+            logger.error("Failed writing Robot XML: %s", exc)
+            self.writer = None
+        self.results.clear()
 
 
 _store = _Store()
 
 
-def pytest_runtest_protocol(item, nextitem) -> None:  # noqa: ANN001 (pytest signature)
-    """Capture start times for every test item."""
-    _store.starts[item.nodeid] = datetime.now(tz=timezone.utc)
+def _is_xdist_worker(config) -> bool:  # noqa: ANN001 (pytest config)
+    """Return True inside a pytest-xdist worker process."""
+    return hasattr(config, "workerinput")
 
 
-def pytest_runtest_logreport(report) -> None:  # noqa: ANN001 (pytest signature)
-    """Collect outcome and end time for call phase."""
-    if report.when != "call":
+def pytest_sessionstart(session) -> None:  # noqa: ANN001 (pytest signature)
+    """Reset the store and prepare a streaming writer for this session."""
+    _store.phases.clear()
+    _store.fixture_times.clear()
+    _store.fixtures.clear()
+    _store.results.clear()
+    _store.writer = None
+    _store.worker = _is_xdist_worker(session.config)
+    _store.impact = recorder_from_env("pytest")
+    if _store.worker:
+        # The controller receives our reports and writes the only output.xml
         return
-    start = _store.starts.get(report.nodeid, datetime.now(tz=timezone.utc))
-    end = datetime.now(tz=timezone.utc)
-    status = "PASS" if report.passed else ("SKIP" if report.skipped else "FAIL")
-    message = None
-    if report.failed and hasattr(report, "longrepr"):
-        # Trim longrepr to a shorter message; full traceback remains in pytest artifacts
-        message = str(report.longrepr)[:2000]
-    _store.results.append(
-        TestResult(
-            name=report.nodeid,
-            status=status,
-            start=start,
-            end=end,
-            message=message,
-            tags=None
-        )
+    _store.writer = RobotXmlWriter(
+        session.config.getoption("robot_suite_name"),
+        session.config.getoption("robot_output"),
     )
 
 
+def pytest_collection_modifyitems(session, config, items) -> None:  # noqa: ANN001 (pytest signature)
+    """Move the tests listed by --robot-run-first to the front, keeping the order otherwise."""
+    path = config.getoption("robot_run_first")
+    if not path:
+        return
+    from .rerun import read_names
+
+    first = read_names(path)
+    items.sort(key=lambda item: item.nodeid not in first)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_make_collect_report(collector):  # noqa: ANN001 (pytest signature)
+    """Attribute what a test module runs on import to its file (impact recording only)."""
+    if _store.impact is None or not isinstance(collector, pytest.Module):
+        return (yield)
+    _store.impact.begin(collector.path)
+    # conftest.py files are imported before collection; their fixtures are traced when they run
+    for plugin in collector.config.pluginmanager.get_plugins():
+        conftest = getattr(plugin, "__file__", None) or ""
+        if os.path.basename(conftest) == "conftest.py" and collector.path.is_relative_to(os.path.dirname(conftest)):
+            _store.impact.add(conftest)
+    try:
+        return (yield)
+    finally:
+        _store.impact.end()
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_protocol(item, nextitem):  # noqa: ANN001 (pytest signature)
+    """Attribute what a test runs, fixtures included, to its file (impact recording only)."""
+    if _store.impact is None:
+        return (yield)
+    _store.impact.begin(item.path)
+    try:
+        return (yield)
+    finally:
+        _store.impact.end()
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_fixture_setup(fixturedef, request):  # noqa: ANN001 (pytest signature)
+    """Time each fixture setup; the fixtures it depends on are set up (and timed) before."""
+    start = time.perf_counter_ns()
+    try:
+        return (yield)
+    finally:
+        _store.fixture_times.append(
+            [fixturedef.argname, fixturedef.scope, fixturedef.baseid, time.perf_counter_ns() - start])
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):  # noqa: ANN001 (pytest signature)
+    """Attach the fixture timings of this phase to its report."""
+    report = yield
+    if _store.fixture_times:
+        setattr(report, FIXTURES_ATTR, _store.fixture_times)
+        _store.fixture_times = []
+    return report
+
+
+def _ns(seconds: float) -> int:
+    return round(seconds * 1_000_000_000)
+
+
+def _status(report) -> str:  # noqa: ANN001 (pytest report)
+    return "PASS" if report.passed else ("SKIP" if report.skipped else "FAIL")
+
+
+# Message of a test whose teardown was never reported
+_INCOMPLETE = "Test did not finish: no teardown was reported"
+
+
+def _append_test(nodeid: str, reports: list, complete: bool = True) -> None:
+    """Append one test built from its setup/call/teardown reports (FAIL unless ``complete``)."""
+    keywords = []
+    messages = []
+    status = "SKIP"
+    for report in reports:
+        phase_status = _status(report)
+        message = None
+        if report.failed and report.longrepr is not None:
+            # Trim longrepr to a shorter message; full traceback remains in pytest artifacts
+            message = str(report.longrepr)[:2000]
+            prefix = _PHASE_PREFIXES.get(report.when, "")
+            if messages and prefix:
+                prefix = "\n\nAlso " + prefix[0].lower() + prefix[1:]
+            messages.append(prefix + message)
+        if report.when == "call" or phase_status == "FAIL":
+            status = "FAIL" if "FAIL" in (status, phase_status) else phase_status
+        keywords.append((report.when, phase_status, _ns(report.start), _ns(report.stop), message,
+                         _PHASE_TYPES.get(report.when)))
+    if not complete:
+        status = "FAIL"
+        messages.append(("\n\n" if messages else "") + _INCOMPLETE)
+    start = keywords[0][2]
+    end = keywords[-1][3]
+    _store.results.append_row(nodeid, status, start, end, "".join(messages) or None, None, keywords)
+    if len(_store.results) >= FLUSH_EVERY:
+        _store.flush()
+
+
+def pytest_runtest_logreport(report) -> None:  # noqa: ANN001 (pytest signature)
+    """Collect phase outcomes and fixture timings (local or from xdist workers)."""
+    if _store.worker:
+        return
+    for argname, scope, baseid, duration in getattr(report, FIXTURES_ATTR, ()):
+        stats = _store.fixtures.setdefault((argname, scope, baseid), [0, 0, 0])
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] = max(stats[2], duration)
+    if _store.writer is None:
+        return
+    phases = _store.phases.setdefault(report.nodeid, [])
+    phases.append(report)
+    if report.when == "teardown":
+        del _store.phases[report.nodeid]
+        _append_test(report.nodeid, phases)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config) -> None:  # noqa: ANN001 (pytest signature)
+    """Report the fixtures with the longest total setup time (--robot-fixture-durations)."""
+    count = config.getoption("robot_fixture_durations")
+    if count is None or _store.worker or not _store.fixtures:
+        return
+    slowest = sorted(_store.fixtures.items(), key=lambda item: item[1][1], reverse=True)
+    if count > 0:
+        slowest = slowest[:count]
+    terminalreporter.write_sep("=", f"slowest {count} fixture setups" if count > 0 else "slowest fixture setups")
+    for (argname, scope, baseid), (setups, total, longest) in slowest:
+        location = f" in {baseid}" if baseid else ""
+        terminalreporter.write_line(
+            f"{total / 1e9:8.3f}s total {setups:6d}x  max {longest / 1e9:.3f}s  {argname} ({scope}){location}")
+
+
 def pytest_sessionfinish(session, exitstatus) -> None:  # noqa: ANN001 (pytest signature)
-    """Write Robot XML at session end."""
+    """Finish the Robot XML (suite status and statistics) and store the test impact at session end."""
+    impact, _store.impact = _store.impact, None
+    if impact is not None:
+        impact.close()
+    if _store.writer is not None:
+        for nodeid, phases in _store.phases.items():
+            _append_test(nodeid, phases, complete=False)
+    _store.phases.clear()
+    _store.flush()
+    writer, _store.writer = _store.writer, None
+    if writer is None:
+        return
     try:
-        path = session.config.getoption("robot_output")
-        suite_name = session.config.getoption("robot_suite_name")
-        write_robot_output(suite_name, _store.results, path)
+        writer.close()
     except Exception as exc:  # noqa: BLE001
         logger.error("Failed writing Robot XML: %s", exc)
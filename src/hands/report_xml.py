@@ -2,15 +2,42 @@
 from __future__ import annotations
 
 import logging  # https://docs.python.org/3/library/logging.html
+import time  # https://docs.python.org/3/library/time.html
+from array import array  # https://docs.python.org/3/library/array.html
 from dataclasses import dataclass  # https://docs.python.org/3/library/dataclasses.html
-from datetime import datetime, timezone  # https://docs.python.org/3/library/datetime.html
-from typing import List, Optional  # https://docs.python.org/3/library/typing.html
-import xml.etree.ElementTree as ET  # https://docs.python.org/3/library/xml.etree.elementtree.html
+from datetime import datetime, timedelta, timezone  # https://docs.python.org/3/library/datetime.html
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple  # https://docs.python.org/3/library/typing.html
+from xml.sax.saxutils import escape, quoteattr  # https://docs.python.org/3/library/xml.sax.utils.html
 
 S_LOG_MSG_FORMAT = "%(asctime)s [%(levelname)-5.5s]  %(message)s"
 logging.basicConfig(level=logging.INFO, format=S_LOG_MSG_FORMAT)
 logger = logging.getLogger(__name__)
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_STATUSES = ("PASS", "FAIL", "SKIP")
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+# Keywords may also be NOT RUN (e.g. steps after a failed one)
+_KW_STATUSES = (*_STATUSES, "NOT RUN")
+_KW_STATUS_CODES = {status: code for code, status in enumerate(_KW_STATUSES)}
+# Keyword 'type' attribute: body keyword (none), setup or teardown
+_KW_TYPES = ("", "SETUP", "TEARDOWN")
+_KW_TYPE_CODES = {kw_type: code for code, kw_type in enumerate(_KW_TYPES)}
+
+# Plain-value keyword row accepted by ResultBatch.append_row:
+# (name, status, start_ns, end_ns, message, type) with type None, "SETUP" or "TEARDOWN"
+KeywordRow = Tuple[str, str, int, int, Optional[str], Optional[str]]
+
+
+@dataclass
+class KeywordResult:
+    """A timed step of a test, written as a Robot <kw> inside the <test>."""
+    name: str
+    status: str  # "PASS"|"FAIL"|"SKIP"|"NOT RUN"
+    start: datetime
+    end: datetime
+    message: Optional[str] = None
+    type: Optional[str] = None  # None for body keywords, "SETUP" or "TEARDOWN"
+
 
 @dataclass
 class TestResult:
@@ -21,6 +48,7 @@ class TestResult:
     end: datetime
     message: Optional[str] = None
     tags: Optional[List[str]] = None
+    keywords: Optional[List[KeywordResult]] = None
 
 
 def _rf_timestamp(dt: datetime) -> str:
@@ -30,81 +58,435 @@ def _rf_timestamp(dt: datetime) -> str:
     return dt.strftime("%Y%m%d %H:%M:%S.%f")[:-3]
 
 
+def _rf_timestamps(values: Iterable[int]) -> List[str]:
+    """Convert epoch nanoseconds to Robot timestamps in bulk.
+
+    The date/time prefix is only rendered once per distinct second, which is
+    what makes this much cheaper than calling _rf_timestamp per element.
+    """
+    stamps = []
+    last_second = None
+    prefix = ""
+    for ns in values:
+        second, rest = divmod(ns, 1_000_000_000)
+        if second != last_second:
+            prefix = time.strftime("%Y%m%d %H:%M:%S", time.gmtime(second))
+            last_second = second
+        stamps.append(f"{prefix}.{rest // 1_000_000:03d}")
+    return stamps
+
+
+def _epoch_ns(dt: datetime) -> int:
+    """Convert a datetime (naive means local time) to epoch nanoseconds."""
+    return (dt.astimezone(timezone.utc) - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def _from_epoch_ns(ns: int) -> datetime:
+    """Convert epoch nanoseconds back to a UTC datetime."""
+    return _EPOCH + timedelta(microseconds=ns // 1000)
+
+
+def _rf_status(status: str) -> str:
+    """Normalize a result status to one of Robot's PASS/FAIL/SKIP."""
+    return status if status in ("PASS", "FAIL") else "SKIP"
+
+
+def _kw_status(status: str) -> str:
+    """Normalize a keyword status to one of Robot's PASS/FAIL/SKIP/NOT RUN."""
+    return status if status in _KW_STATUS_CODES else "SKIP"
+
+
+def _start_tag(tag: str, attrib: Dict[str, str]) -> str:
+    """Render an opening XML tag with escaped attributes."""
+    attrs = "".join(f" {key}={quoteattr(value)}" for key, value in attrib.items())
+    return f"<{tag}{attrs}>"
+
+
+def _test_xml(
+    name: str,
+    status: str,
+    starttime: str,
+    endtime: str,
+    message: Optional[str],
+    tags: Optional[Sequence[str]],
+    keywords: Sequence[Tuple[str, str, str, str, Optional[str], Optional[str]]] = (),
+) -> str:
+    """Render the <test> element for a single result.
+
+    ``keywords`` are (name, status, starttime, endtime, message, type) with
+    formatted timestamps, written in order before the test's tags.
+    """
+    parts = [_start_tag("test", {"name": name})]
+    for kw_name, kw_status, kw_start, kw_end, kw_message, kw_type in keywords:
+        attrib = {"name": kw_name}
+        if kw_type:
+            attrib["type"] = kw_type
+        parts.append(_start_tag("kw", attrib))
+        parts.append(f'<status status="{_kw_status(kw_status)}" starttime="{kw_start}" endtime="{kw_end}"')
+        parts.append(f">{escape(kw_message)}</status></kw>" if kw_message else "/></kw>")
+    if tags:
+        # No regex used; simple XML tag
+        parts.append("<tags>")
+        parts.extend(f"<tag>{escape(tag)}</tag>" for tag in tags)
+        parts.append("</tags>")
+    parts.append(f'<status status="{_rf_status(status)}" starttime="{starttime}" endtime="{endtime}"')
+    parts.append(f">{escape(message)}</status>" if message else "/>")
+    parts.append("</test>\n")
+    return "".join(parts)
+
+
+class _TextColumn:
+    """Append-only string column: one UTF-8 buffer plus an offset index."""
+
+    __slots__ = ("_data", "_offsets")
+
+    def __init__(self) -> None:
+        self._data = bytearray()
+        self._offsets = array("Q", [0])
+
+    def append(self, text: Optional[str]) -> None:
+        if text:
+            self._data += text.encode("utf-8")
+        self._offsets.append(len(self._data))
+
+    def __getitem__(self, index: int) -> str:
+        return self._data[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def clear(self) -> None:
+        self._data = bytearray()
+        self._offsets = array("Q", [0])
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+
+class ResultRow:
+    """Read-only view of one row of a ResultBatch."""
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "ResultBatch", index: int) -> None:
+        self._batch = batch
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        return self._batch._names[self._index]
+
+    @property
+    def status(self) -> str:
+        return _STATUSES[self._batch._status[self._index]]
+
+    @property
+    def start_ns(self) -> int:
+        return self._batch._starts[self._index]
+
+    @property
+    def end_ns(self) -> int:
+        return self._batch._ends[self._index]
+
+    @property
+    def start(self) -> datetime:
+        return _from_epoch_ns(self.start_ns)
+
+    @property
+    def end(self) -> datetime:
+        return _from_epoch_ns(self.end_ns)
+
+    @property
+    def message(self) -> Optional[str]:
+        return self._batch._messages[self._index] or None
+
+    @property
+    def tags(self) -> Optional[List[str]]:
+        return self._batch._row_tags(self._index) or None
+
+    @property
+    def keywords(self) -> List[KeywordRow]:
+        """The row's keywords as plain (name, status, start_ns, end_ns, message, type) tuples."""
+        return self._batch._row_keywords(self._index)
+
+    def to_result(self) -> TestResult:
+        """Materialize the row as a TestResult."""
+        keywords = [KeywordResult(name, status, _from_epoch_ns(start), _from_epoch_ns(end), message, kw_type)
+                    for name, status, start, end, message, kw_type in self.keywords]
+        return TestResult(self.name, self.status, self.start, self.end, self.message, self.tags,
+                          keywords or None)
+
+    def __repr__(self) -> str:
+        return f"ResultRow(name={self.name!r}, status={self.status!r})"
+
+
+class ResultBatch:
+    """Columnar, array-backed store for many test results.
+
+    Start/end times are epoch-nanosecond int arrays, statuses and tags are
+    interned to small integer codes, and names/messages live in UTF-8
+    buffers indexed by offsets. Keywords (timed steps) of all rows share
+    the same kind of columns, indexed by a per-row offset. Rows are exposed through ResultRow views, so
+    a large session costs a few dozen bytes per test instead of a dataclass
+    with two datetimes, a string and a list.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty batch."""
+        self._names = _TextColumn()
+        self._messages = _TextColumn()
+        self._status = array("B")
+        self._starts = array("q")
+        self._ends = array("q")
+        self._tag_ids = array("I")
+        self._tag_offsets = array("Q", [0])
+        self._tag_table: List[str] = []
+        self._tag_codes: Dict[str, int] = {}
+        self._init_keywords()
+
+    def _init_keywords(self) -> None:
+        self._kw_names = _TextColumn()
+        self._kw_messages = _TextColumn()
+        self._kw_status = array("B")
+        self._kw_types = array("B")
+        self._kw_starts = array("q")
+        self._kw_ends = array("q")
+        self._kw_offsets = array("Q", [0])
+
+    def __len__(self) -> int:
+        return len(self._status)
+
+    def __getitem__(self, index: int) -> ResultRow:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ResultBatch index out of range")
+        return ResultRow(self, index)
+
+    def __iter__(self) -> Iterator[ResultRow]:
+        for index in range(len(self)):
+            yield ResultRow(self, index)
+
+    def append(self, result: TestResult) -> None:
+        """Append a TestResult."""
+        keywords = [(kw.name, kw.status, _epoch_ns(kw.start), _epoch_ns(kw.end), kw.message, kw.type)
+                    for kw in result.keywords or ()]
+        self.append_row(result.name, result.status, _epoch_ns(result.start), _epoch_ns(result.end),
+                        result.message, result.tags, keywords)
+
+    def append_row(
+        self,
+        name: str,
+        status: str,
+        start_ns: int,
+        end_ns: int,
+        message: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        keywords: Optional[Iterable[KeywordRow]] = None,
+    ) -> None:
+        """Append a result given as plain values; times are epoch nanoseconds.
+
+        ``keywords`` are (name, status, start_ns, end_ns, message, type) tuples.
+        """
+        self._names.append(name)
+        self._messages.append(message)
+        self._status.append(_STATUS_CODES[_rf_status(status)])
+        self._starts.append(start_ns)
+        self._ends.append(end_ns)
+        for tag in tags or ():
+            code = self._tag_codes.get(tag)
+            if code is None:
+                code = self._tag_codes[tag] = len(self._tag_table)
+                self._tag_table.append(tag)
+            self._tag_ids.append(code)
+        self._tag_offsets.append(len(self._tag_ids))
+        for kw_name, kw_status, kw_start, kw_end, kw_message, kw_type in keywords or ():
+            self._kw_names.append(kw_name)
+            self._kw_messages.append(kw_message)
+            self._kw_status.append(_KW_STATUS_CODES[_kw_status(kw_status)])
+            self._kw_types.append(_KW_TYPE_CODES[kw_type or ""])
+            self._kw_starts.append(kw_start)
+            self._kw_ends.append(kw_end)
+        self._kw_offsets.append(len(self._kw_status))
+
+    def extend(self, results: Iterable[TestResult]) -> None:
+        """Append several TestResults."""
+        for result in results:
+            self.append(result)
+
+    def clear(self) -> None:
+        """Drop all rows; the interned tag table is kept for reuse."""
+        self._names.clear()
+        self._messages.clear()
+        self._status = array("B")
+        self._starts = array("q")
+        self._ends = array("q")
+        self._tag_ids = array("I")
+        self._tag_offsets = array("Q", [0])
+        self._init_keywords()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the row columns."""
+        arrays = (self._status, self._starts, self._ends, self._tag_ids, self._tag_offsets,
+                  self._kw_status, self._kw_types, self._kw_starts, self._kw_ends, self._kw_offsets)
+        return (self._names.nbytes + self._messages.nbytes + self._kw_names.nbytes + self._kw_messages.nbytes
+                + sum(a.itemsize * len(a) for a in arrays))
+
+    def _row_tags(self, index: int) -> List[str]:
+        ids = self._tag_ids[self._tag_offsets[index]:self._tag_offsets[index + 1]]
+        return [self._tag_table[code] for code in ids]
+
+    def _row_keywords(self, index: int) -> List[KeywordRow]:
+        return [
+            (self._kw_names[kw], _KW_STATUSES[self._kw_status[kw]], self._kw_starts[kw], self._kw_ends[kw],
+             self._kw_messages[kw] or None, _KW_TYPES[self._kw_types[kw]] or None)
+            for kw in range(self._kw_offsets[index], self._kw_offsets[index + 1])
+        ]
+
+
+class RobotXmlWriter:
+    """Streams a single-suite Robot output.xml to disk as results arrive.
+
+    Every <test> is serialized on add()/add_batch(); only the status
+    counters and the suite time bounds stay in memory. The suite <status>
+    and <statistics> blocks are appended by close(). The file is opened
+    lazily on the first result, so a writer that never receives one leaves
+    nothing behind. With ``$HANDS_HISTORY_DB`` set, every result is also
+    appended to that history store (see hands.history).
+    """
+
+    def __init__(self, suite_name: str, out_file: str) -> None:
+        """Prepare a writer for ``suite_name`` targeting ``out_file``."""
+        self.suite_name = suite_name
+        self.out_file = out_file
+        self.stats: Dict[str, int] = {"PASS": 0, "FAIL": 0, "SKIP": 0}
+        self.start_ns: Optional[int] = None
+        self.end_ns: Optional[int] = None
+        self._fh: Optional[TextIO] = None
+        from .history import recorder_from_env
+        self._history = recorder_from_env(suite_name)
+
+    @property
+    def count(self) -> int:
+        """Number of tests written so far."""
+        return sum(self.stats.values())
+
+    def __enter__(self) -> "RobotXmlWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # noqa: ANN001
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def abort(self) -> None:
+        """Close the file and the history store without finishing the XML (no-op after close())."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._history is not None:
+            self._history.close()
+
+    def _open(self) -> TextIO:
+        """Open the output file and write everything up to the first test."""
+        logger.debug("RobotXmlWriter._open(out_file=%s)", self.out_file)
+        generated = _rf_timestamp(datetime.now(timezone.utc))
+        fh = open(self.out_file, "w", encoding="UTF-8")
+        fh.write("<?xml version='1.0' encoding='UTF-8'?>\n")
+        fh.write(_start_tag("robot", {"generator": "robotic-adapter", "generated": generated}))
+        fh.write("\n" + _start_tag("suite", {"name": self.suite_name}) + "\n")
+        # <doc> optional
+        fh.write(f"<doc>{escape(f'Suite generated by robotic adapter for {self.suite_name}')}</doc>\n")
+        self._fh = fh
+        return fh
+
+    def _track(self, status: str, start_ns: int, end_ns: int) -> None:
+        """Update counters and the suite time bounds."""
+        self.stats[_rf_status(status)] += 1
+        # Suite start/end derive from first/last test
+        if self.start_ns is None or start_ns < self.start_ns:
+            self.start_ns = start_ns
+        if self.end_ns is None or end_ns > self.end_ns:
+            self.end_ns = end_ns
+
+    def add(self, t: TestResult) -> None:
+        """Serialize one test result to disk."""
+        fh = self._fh or self._open()
+        keywords = [(kw.name, kw.status, _rf_timestamp(kw.start), _rf_timestamp(kw.end), kw.message, kw.type)
+                    for kw in t.keywords or ()]
+        fh.write(_test_xml(t.name, t.status, _rf_timestamp(t.start), _rf_timestamp(t.end),
+                           t.message, t.tags, keywords))
+        self._track(t.status, _epoch_ns(t.start), _epoch_ns(t.end))
+        if self._history is not None:
+            self._history.add(t)
+
+    def add_batch(self, batch: ResultBatch) -> None:
+        """Serialize every row of ``batch``, formatting its timestamps in bulk."""
+        if not len(batch):
+            return
+        fh = self._fh or self._open()
+        starts = _rf_timestamps(batch._starts)
+        ends = _rf_timestamps(batch._ends)
+        kw_starts = _rf_timestamps(batch._kw_starts)
+        kw_ends = _rf_timestamps(batch._kw_ends)
+        kw_offsets = batch._kw_offsets
+        for index, row in enumerate(batch):
+            status = row.status
+            keywords = [
+                (batch._kw_names[kw], _KW_STATUSES[batch._kw_status[kw]], kw_starts[kw], kw_ends[kw],
+                 batch._kw_messages[kw] or None, _KW_TYPES[batch._kw_types[kw]] or None)
+                for kw in range(kw_offsets[index], kw_offsets[index + 1])
+            ]
+            fh.write(_test_xml(row.name, status, starts[index], ends[index], row.message, row.tags, keywords))
+            self._track(status, batch._starts[index], batch._ends[index])
+        if self._history is not None:
+            self._history.add_batch(batch)
+
+    def close(self) -> None:
+        """Append suite status and statistics and close the file.
+
+        Error handling: raises ValueError if no test was added; propagates IO errors.
+        """
+        if self._history is not None:
+            self._history.close()
+        if self._fh is None:
+            raise ValueError("No tests to write")
+        fh, self._fh = self._fh, None
+        try:
+            suite_status = "PASS" if self.stats["FAIL"] == 0 else "FAIL"
+            starttime, endtime = _rf_timestamps((self.start_ns, self.end_ns))
+            fh.write(f'<status status="{suite_status}" starttime="{starttime}" endtime="{endtime}"/>\n')
+            fh.write("</suite>\n")
+
+            # <statistics> (very small summary to keep rebot happy)
+            stat = _start_tag("stat", {"pass": str(self.stats["PASS"]),
+                                       "fail": str(self.stats["FAIL"]),
+                                       "skip": str(self.stats["SKIP"]),
+                                       "id": "s1",
+                                       "label": self.suite_name})
+            fh.write(f"<statistics><total>{stat}{escape(self.suite_name)}</stat></total></statistics>\n")
+            fh.write("</robot>\n")
+        finally:
+            fh.close()
+        logger.info("Wrote Robot XML: %s", self.out_file)
+
+
 def write_robot_output(
     suite_name: str,
-    tests: List[TestResult],
+    tests: Iterable[TestResult] | ResultBatch,
     out_file: str,
 ) -> None:
     """Write a Robot-style output.xml file for a single suite.
 
+    Results are streamed through RobotXmlWriter, so ``tests`` may be any
+    iterable (including a generator) or a ResultBatch.
+
     Error handling: raises ValueError on empty suite; propagates IO errors.
     """
-    logger.debug("write_robot_output(suite_name=%s, tests=%d, out_file=%s)",
-                 suite_name, len(tests), out_file)
-    if not tests:
-        raise ValueError("No tests to write")
-
-    generated = _rf_timestamp(datetime.now(timezone.utc))
-    root = ET.Element(
-        "robot",
-        attrib={"generator": "robotic-adapter", "generated": generated}
-    )
-
-    suite = ET.SubElement(
-        root,
-        "suite",
-        attrib={"name": suite_name},
-    )
-
-    # Suite start/end derive from first/last test
-    start = min(t.start for t in tests)
-    end = max(t.end for t in tests)
-
-    # <doc> optional
-    ET.SubElement(suite, "doc").text = f"Suite generated by robotic adapter for {suite_name}"
-
-    # Body: tests
-    for t in tests:
-        test_el = ET.SubElement(suite, "test", attrib={"name": t.name})
-        if t.tags:
-            tags_el = ET.SubElement(test_el, "tags")
-            for tag in t.tags:
-                # No regex used; simple XML tag
-                ET.SubElement(tags_el, "tag").text = tag
-        # Robot puts setup/teardown/keywords in body; we omit for minimal schema
-        status_el = ET.SubElement(
-            test_el,
-            "status",
-            attrib={"status": "PASS" if t.status == "PASS" else "FAIL" if t.status == "FAIL" else "SKIP",
-                    "starttime": _rf_timestamp(t.start),
-                    "endtime": _rf_timestamp(t.end)}
-        )
-        if t.message:
-            status_el.text = t.message
-
-    # Suite status
-    stats = {"PASS": 0, "FAIL": 0, "SKIP": 0}
-    for t in tests:
-        stats[t.status] = stats.get(t.status, 0) + 1
-
-    suite_status = "PASS" if stats["FAIL"] == 0 else "FAIL"
-    ET.SubElement(
-        suite, "status",
-        attrib={"status": suite_status,
-                "starttime": _rf_timestamp(start),
-                "endtime": _rf_timestamp(end)}
-    )
-
-    # <statistics> (very small summary to keep rebot happy)
-    statistics = ET.SubElement(root, "statistics")
-    total = ET.SubElement(statistics, "total")
-    ET.SubElement(  total, "stat",
-                    attrib={    "pass": str(stats["PASS"]),
-                                "fail": str(stats["FAIL"]),
-                                "skip": str(stats["SKIP"]),
-                                "id": "s1",
-                                "label": suite_name}).text = suite_name
-
-    tree = ET.ElementTree(root)
-    tree.write(out_file, encoding="UTF-8", xml_declaration=True)
-    logger.info("Wrote Robot XML: %s", out_file)
+    logger.debug("write_robot_output(suite_name=%s, out_file=%s)", suite_name, out_file)
+    with RobotXmlWriter(suite_name, out_file) as writer:
+        if isinstance(tests, ResultBatch):
+            writer.add_batch(tests)
+        else:
+            for t in tests:
+                writer.add(t)
@@ -0,0 +1,118 @@
+"""Rerun the failures of a previous run: ``--last-failed`` and ``--failed-first``.
+
+The failed tests are read from the previous output.xml (streamed with
+output_reader.iter_tests) and every engine translates them into its own
+selectors (see BaseTestEngine.select_failed and order_failed_first):
+
+    pytest   node ids as targets; a plugin option moves them to the front
+    robot    --test with each long name; a pre-run modifier reorders suites
+    behave   feature-file:line targets; failing feature files first
+
+Selectors that do not fit on a command line are passed as a file of names,
+written below the hands cache for the duration of the run.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Set
+
+from .cache import cache_dir, load_json, save_json
+from .output_reader import TestRecord, iter_tests
+
+log = logging.getLogger(__name__)
+
+
+def failed_tests(output: str | os.PathLike) -> List[TestRecord]:
+    """Return the failed tests of ``output``, in output order."""
+    return [test for test in iter_tests(str(output)) if test.status == "FAIL"]
+
+
+def names_file() -> Path:
+    """Return this process's file of test names (see write_names)."""
+    return cache_dir("rerun") / f"failed-{os.getpid()}.json"
+
+
+def write_names(names: Iterable[str]) -> str:
+    """Write ``names`` for an engine-side hook to read with read_names; returns the path."""
+    path = names_file()
+    save_json(path, list(names))
+    return str(path.resolve())
+
+
+def read_names(path: str | os.PathLike) -> Set[str]:
+    """Return the names written by write_names (empty if the file is gone)."""
+    return set(load_json(Path(path), []))
+
+
+def remove_names() -> None:
+    """Remove this process's file of names after the run."""
+    names_file().unlink(missing_ok=True)
+
+
+def robot_pattern(name: str) -> str:
+    """Escape a test name for Robot's --test, where '*', '?' and '[' are wildcards."""
+    return "".join(f"[{char}]" if char in "*?[" else char for char in name)
+
+
+def robot_names(longname: str) -> List[str]:
+    """Return ``longname`` with and without its top-level suite.
+
+    Parallel runs execute every top-level sub-suite on its own, where the
+    sub-suite is the top and the folder suite is missing from long names.
+    """
+    names = [longname]
+    _, dot, rest = longname.partition(".")
+    if dot and "." in rest:
+        names.append(rest)
+    return names
+
+
+class RobotFailedFirst:
+    """Robot Framework pre-run modifier that runs the given tests first.
+
+    Used as ``--prerunmodifier hands.rerun.RobotFailedFirst;NAMES`` with a
+    file from write_names. Tests keep their suites: inside every suite, tests
+    and child suites with failures move to the front, otherwise in order.
+    """
+
+    def __init__(self, names_path: str) -> None:
+        self.names = set()
+        for name in read_names(names_path):
+            self.names.update(robot_names(name))
+
+    def visit_suite(self, suite) -> None:  # noqa: ANN001 (robot.running.TestSuite)
+        self._reorder(suite)
+
+    def _reorder(self, suite) -> bool:  # noqa: ANN001 (robot.running.TestSuite)
+        """Reorder ``suite`` and return whether it contains a listed test."""
+        failed_suites = {id(child) for child in suite.suites if self._reorder(child)}
+        failed_tests = {id(test) for test in suite.tests if getattr(test, "full_name", None) in self.names
+                        or getattr(test, "longname", None) in self.names}
+        suite.suites.sort(key=lambda child: id(child) not in failed_suites)
+        suite.tests.sort(key=lambda test: id(test) not in failed_tests)
+        return bool(failed_suites or failed_tests)
+
+
+def behave_scenarios(paths: Iterable[str]) -> dict:
+    """Map 'Feature :: Scenario' (the test names of behave outputs) to 'file:line' of ``paths``.
+
+    Scenario outlines contribute each generated scenario, named and
+    located as behave runs them.
+    """
+    from behave.parser import parse_file
+
+    locations = {}
+    for path in paths:
+        try:
+            feature = parse_file(path)
+        except Exception as exc:  # noqa: BLE001 (behave raises ParserError and friends)
+            log.warning("Cannot parse %s: %s", path, exc)
+            continue
+        if feature is None:
+            continue
+        for scenario in feature.walk_scenarios():
+            locations.setdefault(f"{feature.name} :: {scenario.name}", f"{path}:{scenario.line}")
+    return locations
+
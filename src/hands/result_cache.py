@@ -0,0 +1,282 @@
+"""Content-addressed cache of test results, so unchanged test files are not run again.
+
+A test file's key hashes everything its results can depend on: the
+engine, the run's extra arguments and Python version, the file itself,
+the source files it ran according to the impact map (see hands.impact)
+and the declared input files of the run. Files without recorded
+dependencies have no key and always run.
+
+After a run, the results of every test file whose tests all passed (or
+were skipped) are stored under its key; failures are never cached. On a
+hit the stored results are replayed into output.xml instead of running
+the file: zero-length tests at the time of the replay, tagged
+``hands:cached``, with the original duration in the message.
+
+Entries are small JSON files, ``<key[:2]>/<key>.json``, written atomically,
+so the cache directory can be shared by CI nodes over a plain filesystem
+path. A hit refreshes the entry's mtime; once the directory grows beyond
+its size limit the least recently used entries are evicted.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .cache import cache_dir, file_digest, load_json, save_json
+from .impact import ImpactMap, relative_path
+from .merge_xml import Counts, _root_suite_name, merge_outputs
+from .output_reader import TestRecord, iter_events, iter_tests
+from .report_xml import _rf_timestamp, _start_tag, _test_xml
+from .sharding import feature_name
+
+log = logging.getLogger(__name__)
+
+RESULT_CACHE_ENV = "HANDS_RESULT_CACHE"
+CACHED_TAG = "hands:cached"
+DEFAULT_MAX_MB = 1024
+# Bump when the key or the entry format changes
+FORMAT_VERSION = 1
+
+
+def default_cache_dir() -> Path:
+    """Return ``$HANDS_RESULT_CACHE`` or the results directory below the hands cache."""
+    path = os.environ.get(RESULT_CACHE_ENV)
+    return Path(path) if path else cache_dir("results")
+
+
+class ResultCache:
+    """Directory of cached results, keyed by content hash and bounded in size."""
+
+    def __init__(
+        self, directory: str | os.PathLike | None = None, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024
+    ) -> None:
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the entry for ``key`` and mark it as recently used."""
+        path = self._path(key)
+        entry = load_json(path, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted meanwhile (e.g. by another node); the entry is still good
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        save_json(path, entry)
+
+    def evict(self) -> int:
+        """Remove the least recently used entries beyond the size limit; returns how many."""
+        entries = []
+        total = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            log.info("Evicted %d entries from the result cache %s", removed, self.directory)
+        return removed
+
+
+class CacheKeys:
+    """Computes the cache key of test files; every file's content is hashed once."""
+
+    def __init__(self, engine: str, args: Sequence[str], impact: ImpactMap, inputs: Sequence[str] = ()) -> None:
+        self.impact = impact
+        self._digests: Dict[str, str] = {}
+        base = hashlib.sha256()
+        for part in (f"hands-results-{FORMAT_VERSION}", engine, json.dumps(list(args)),
+                     f"{sys.implementation.name}-{sys.version_info.major}.{sys.version_info.minor}"):
+            base.update(part.encode() + b"\0")
+        for path in sorted(inputs):
+            base.update(f"{Path(path).as_posix()}\0{self._digest(path)}\0".encode())
+        self._base = base
+
+    def _digest(self, path: str) -> str:
+        digest = self._digests.get(path)
+        if digest is None:
+            try:
+                digest = file_digest(path)
+            except OSError:
+                digest = "missing"
+            self._digests[path] = digest
+        return digest
+
+    def key(self, item: str) -> Optional[str]:
+        """Return the key of test file ``item``, or None without recorded dependencies."""
+        path = relative_path(item)
+        if path is None:
+            return None
+        dependencies = self.impact.dependencies(path)
+        if not dependencies:
+            return None
+        key = self._base.copy()
+        for dependency in sorted({path, *dependencies}):
+            key.update(f"{dependency}\0{self._digest(dependency)}\0".encode())
+        return key.hexdigest()
+
+
+def group_by_file(records: Iterable[TestRecord], items: Sequence[str]) -> Dict[str, List[TestRecord]]:
+    """Assign the tests of an output to the test files ``items`` they came from.
+
+    pytest tests are found by node id ('file::test'), Robot tests by their
+    suite source and behave scenarios by their feature's title. Tests
+    that match no single item are left out.
+    """
+    by_path = {relative_path(item): item for item in items}
+    by_title: Dict[str, List[str]] = defaultdict(list)
+    for item in items:
+        if item.endswith(".feature"):
+            by_title[feature_name(item) or ""].append(item)
+    groups: Dict[str, List[TestRecord]] = defaultdict(list)
+    for record in records:
+        item = None
+        if " :: " in record.name:
+            titles = by_title.get(record.name.split(" :: ", 1)[0], [])
+            item = titles[0] if len(titles) == 1 else None
+        elif "::" in record.name:
+            item = by_path.get(relative_path(record.name.split("::", 1)[0]))
+        elif record.source:
+            item = by_path.get(relative_path(record.source))
+        if item is not None:
+            groups[item].append(record)
+    return groups
+
+
+def entry_for(top: str, records: Sequence[TestRecord]) -> Optional[dict]:
+    """Return the cache entry of one file's tests, or None unless they all passed or were skipped."""
+    if not records or any(record.status not in ("PASS", "SKIP") for record in records):
+        return None
+    return {
+        "top": top,
+        "created": time.time(),
+        "tests": [{"name": record.name, "suite": record.suite, "status": record.status,
+                   "elapsed": record.elapsed, "message": record.message, "tags": record.tags}
+                  for record in records],
+    }
+
+
+def write_replay(entries: Sequence[dict], path: str, name: str) -> int:
+    """Write the cached tests of ``entries`` as an output with top-level suite ``name``.
+
+    Tests keep their suite's long name: tests of the top-level suite are
+    placed in it directly, others in one child suite per original suite,
+    named with the rest of the long name. The output is meant to be merged
+    (flattened) with the run's own output. Returns the number of tests.
+    """
+    now = _rf_timestamp(datetime.now(timezone.utc))
+    suites: Dict[str, List[str]] = defaultdict(list)
+    counts: Dict[str, Counts] = defaultdict(Counts)
+    for entry in entries:
+        top = entry.get("top", "")
+        for test in entry["tests"]:
+            suite = test["suite"]
+            if top:
+                suite = "" if suite == top else suite[len(top) + 1:] if suite.startswith(top + ".") else suite
+            elapsed = test.get("elapsed")
+            message = f"Cached result, originally {elapsed:.3f}s" if elapsed is not None else "Cached result"
+            if test.get("message"):
+                message += "\n\n" + test["message"]
+            suites[suite].append(_test_xml(test["name"], test["status"], now, now, message,
+                                           [*test.get("tags", []), CACHED_TAG]))
+            counts[suite].add(test["status"])
+    with open(path, "w", encoding="UTF-8") as out:
+        out.write("<?xml version='1.0' encoding='UTF-8'?>\n")
+        out.write(_start_tag("robot", {"generator": "hands cache", "generated": now}) + "\n")
+        out.write(_start_tag("suite", {"name": name}) + "\n")
+        out.writelines(suites.pop("", []))
+        for suite, tests in suites.items():
+            out.write(_start_tag("suite", {"name": suite}) + "\n")
+            out.writelines(tests)
+            out.write(_start_tag("status", {"status": counts[suite].status, "starttime": now, "endtime": now})
+                      + "</status>\n</suite>\n")
+        out.write(_start_tag("status", {"status": "PASS", "starttime": now, "endtime": now}) + "</status>\n")
+        out.write("</suite>\n<statistics/>\n<errors/>\n</robot>\n")
+    return sum(len(entry["tests"]) for entry in entries)
+
+
+def _is_file_suite(output: str) -> bool:
+    """Return whether the top-level suite of ``output`` was built from a single file."""
+    for _, elem in iter_events(output, ("start",)):
+        if elem.tag == "suite":
+            return os.path.isfile(elem.get("source") or "")
+    return False
+
+
+def store_results(cache: ResultCache, keys: CacheKeys, output: str, items: Sequence[str]) -> int:
+    """Store the results of the test files ``items`` that passed in ``output``; returns how many."""
+    # Suite long names are stored relative to the top-level suite, unless that is a file's suite
+    top = "" if _is_file_suite(output) else _root_suite_name(output)
+    stored = 0
+    for item, tests in group_by_file(iter_tests(output), items).items():
+        entry = entry_for(top, tests)
+        key = keys.key(item) if entry else None
+        if key is not None:
+            entry["file"] = relative_path(item)
+            cache.put(key, entry)
+            stored += 1
+    return stored
+
+
+@dataclass
+class CachedRun:
+    """The cache lookups of one run: replayable entries (hits) and test files to run (misses)."""
+    cache: ResultCache
+    keys: CacheKeys
+    started: float  # epoch seconds; outputs older than this were not written by the run
+    name: Optional[str] = None  # top-level suite of a full run, if the engine knows it
+    hits: List[dict] = field(default_factory=list)
+    misses: List[str] = field(default_factory=list)
+
+    def store(self, output: str) -> int:
+        """Store the passing results of the test files that ran; returns how many."""
+        return store_results(self.cache, self.keys, output, self.misses)
+
+    def replay(self, output: str, merge_with_output: bool = True) -> None:
+        """Replace ``output`` with the run's results (if ``merge_with_output``) followed by the cached ones."""
+        name = self.name or next((entry["top"] for entry in self.hits if entry.get("top")), "")
+        with tempfile.TemporaryDirectory(prefix="hands-cache-") as tmp_dir:
+            replayed = str(Path(tmp_dir) / "cached.xml")
+            merged = str(Path(tmp_dir) / "merged.xml")
+            count = write_replay(self.hits, replayed, name)
+            if merge_with_output:
+                # A Robot run of a single file has that file's suite on top: keep it
+                merge_outputs([output, replayed], merged, name=name, flatten=[not _is_file_suite(output), True])
+            else:
+                merge_outputs([replayed], merged, name=name, flatten=True)
+            shutil.move(merged, output)
+        log.info("Replayed %d cached test results into %s", count, output)
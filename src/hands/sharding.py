@@ -0,0 +1,132 @@
+"""Duration-aware sharding of test files for CI fan-out."""
+from __future__ import annotations
+
+import logging
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .output_reader import iter_tests
+from .parallel import partition
+
+log = logging.getLogger(__name__)
+
+FEATURE_KEY = "feature:"
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse an 'i/n' shard spec (1-based).
+
+    Raises:
+        ValueError: If the spec is malformed or i is not in 1..n
+    """
+    try:
+        index, total = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected i/n such as 2/4") from None
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"Invalid shard '{spec}', i must be between 1 and n")
+    return index, total
+
+
+def feature_name(path: str | Path) -> Optional[str]:
+    """Return the title of a .feature file ('Feature: <title>')."""
+    try:
+        with open(path, encoding="utf-8") as source:
+            for line in source:
+                keyword, _, title = line.strip().partition(":")
+                if keyword == "Feature":
+                    return title.strip()
+    except OSError:
+        pass
+    return None
+
+
+def _normalize(path: str) -> str:
+    return Path(path).as_posix()
+
+
+class Durations:
+    """Expected runtime per test file, learned from a previous output.xml.
+
+    Tests are attributed to files by their pytest node id ('file::test'),
+    their Robot suite source, or - for behave's 'Feature :: Scenario'
+    names - the feature title.
+    """
+
+    def __init__(self, by_key: Optional[Dict[str, float]] = None) -> None:
+        """Create from a key -> seconds mapping."""
+        self.by_key: Dict[str, float] = by_key or {}
+
+    @classmethod
+    def load(cls, output_file: str) -> "Durations":
+        """Stream ``output_file`` and sum test durations per file."""
+        by_key: Dict[str, float] = {}
+        for test in iter_tests(output_file):
+            if test.elapsed is None:
+                continue
+            key = cls._key_for(test.name, test.source)
+            if key:
+                by_key[key] = by_key.get(key, 0.0) + test.elapsed
+        log.debug("Loaded durations for %d files from %s", len(by_key), output_file)
+        return cls(by_key)
+
+    @staticmethod
+    def _key_for(name: str, source: Optional[str]) -> Optional[str]:
+        if " :: " in name:
+            return FEATURE_KEY + name.split(" :: ", 1)[0]
+        if "::" in name:
+            return _normalize(name.split("::", 1)[0])
+        if source and Path(source).suffix:
+            return _normalize(source)
+        return None
+
+    def estimate(self, item: str) -> Optional[float]:
+        """Return the expected seconds for a test file, or None if unknown."""
+        if item.endswith(".feature"):
+            title = feature_name(item)
+            if title is not None and FEATURE_KEY + title in self.by_key:
+                return self.by_key[FEATURE_KEY + title]
+        for key in (_normalize(item), _normalize(str(Path(item).resolve()))):
+            if key in self.by_key:
+                return self.by_key[key]
+        # Outputs from another checkout: match on the trailing path parts
+        suffix = "/" + _normalize(item).lstrip("./")
+        matches = [value for key, value in self.by_key.items() if key.endswith(suffix)]
+        return matches[0] if len(matches) == 1 else None
+
+    def weight(self, items: Sequence[str]) -> Dict[str, float]:
+        """Expected seconds per item; unknown items get the mean of the known ones."""
+        known = {item: self.estimate(item) for item in items}
+        values = [value for value in known.values() if value is not None]
+        default = sum(values) / len(values) if values else 1.0
+        return {item: default if value is None else value for item, value in known.items()}
+
+
+def select_shard(
+    items: Sequence[str],
+    index: int,
+    total: int,
+    durations: Durations,
+) -> List[str]:
+    """
+    Return the items of shard ``index`` (1-based) out of ``total``.
+
+    Items with a known duration are bin-packed into ``total`` groups of
+    near-equal expected runtime; unknown items are spread by a stable hash
+    of their path. Every node computes the same split from the same inputs.
+    """
+    estimates = {item: durations.estimate(item) for item in items}
+    known = [item for item in items if estimates[item] is not None]
+    groups = partition(known, total, lambda item: estimates[item] or 0.0)
+    # partition() drops empty groups; pad so every shard index exists
+    groups += [[] for _ in range(total - len(groups))]
+    selected = set(groups[index - 1])
+    selected.update(
+        item for item in items
+        if estimates[item] is None and zlib.crc32(_normalize(item).encode()) % total == index - 1
+    )
+    log.info("Shard %d/%d: %d of %d files (%d with known duration)",
+             index, total, len(selected), len(items), len(known))
+    return [item for item in items if item in selected]
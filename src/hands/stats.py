@@ -0,0 +1,103 @@
+"""Summary statistics over Robot-style output.xml files with bounded memory.
+
+Files are streamed with output_reader.iter_tests, so no element tree is
+built. Per file, only the counters, a heap of the ``top`` slowest tests and
+per-tag counters are kept. With ``workers`` > 1, files are scanned in a
+process pool and the per-file statistics are combined afterwards.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .merge_xml import Counts
+from .output_reader import TestRecord, iter_tests
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class OutputStats:
+    """Counts, slowest tests and per-tag results of one or more output files."""
+    top: int = 10
+    files: int = 0
+    counts: Counts = field(default_factory=Counts)
+    elapsed: float = 0.0  # summed test time, seconds
+    # Min-heap of (seconds, long name) holding the ``top`` slowest tests
+    slowest_heap: List[Tuple[float, str]] = field(default_factory=list)
+    tags: Dict[str, Counts] = field(default_factory=dict)
+
+    def add(self, test: TestRecord) -> None:
+        """Count one test."""
+        self.counts.add(test.status)
+        for tag in test.tags:
+            counts = self.tags.get(tag)
+            if counts is None:
+                counts = self.tags[tag] = Counts()
+            counts.add(test.status)
+        if test.elapsed is None:
+            return
+        self.elapsed += test.elapsed
+        if len(self.slowest_heap) < self.top:
+            heapq.heappush(self.slowest_heap, (test.elapsed, test.longname))
+        elif test.elapsed > self.slowest_heap[0][0]:
+            heapq.heapreplace(self.slowest_heap, (test.elapsed, test.longname))
+
+    def update(self, other: "OutputStats") -> None:
+        """Fold in the statistics of other files."""
+        self.files += other.files
+        self.counts.update(other.counts)
+        self.elapsed += other.elapsed
+        for tag, counts in other.tags.items():
+            self.tags.setdefault(tag, Counts()).update(counts)
+        self.slowest_heap = heapq.nlargest(self.top, [*self.slowest_heap, *other.slowest_heap])
+        heapq.heapify(self.slowest_heap)
+
+    def slowest(self) -> List[Tuple[str, float]]:
+        """(long name, seconds) of the slowest tests, slowest first."""
+        return [(name, seconds) for seconds, name in sorted(self.slowest_heap, reverse=True)]
+
+    def failures_by_tag(self, limit: int = 0) -> List[Tuple[str, Counts]]:
+        """Tags with failures, most failures first (all tags for ``limit`` 0)."""
+        failing = sorted(((tag, counts) for tag, counts in self.tags.items() if counts.failed),
+                         key=lambda item: (-item[1].failed, item[0]))
+        return failing[:limit] if limit else failing
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready summary."""
+        return {
+            "files": self.files,
+            "total": self.counts.total,
+            "passed": self.counts.passed,
+            "failed": self.counts.failed,
+            "skipped": self.counts.skipped,
+            "elapsed": round(self.elapsed, 3),
+            "slowest": [{"name": name, "elapsed": round(seconds, 3)} for name, seconds in self.slowest()],
+            "tags": {tag: {"passed": counts.passed, "failed": counts.failed, "skipped": counts.skipped}
+                     for tag, counts in sorted(self.tags.items())},
+        }
+
+
+def file_stats(path: str, top: int = 10) -> OutputStats:
+    """Statistics of one output file."""
+    stats = OutputStats(top=top, files=1)
+    for test in iter_tests(path):
+        stats.add(test)
+    log.debug("Read %d tests from %s", stats.counts.total, path)
+    return stats
+
+
+def collect_stats(paths: Sequence[str], top: int = 10, workers: int = 1) -> OutputStats:
+    """Combined statistics of ``paths``, scanned by up to ``workers`` processes."""
+    combined = OutputStats(top=top)
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            for stats in pool.map(file_stats, paths, [top] * len(paths)):
+                combined.update(stats)
+    else:
+        for path in paths:
+            combined.update(file_stats(path, top))
+    return combined
@@ -1,12 +1,21 @@
 """Test engine implementations for different test frameworks."""
 from __future__ import annotations
 
+import fnmatch
 import logging
+import os
 import subprocess
 import sys
+import tempfile
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from .engine_registry import TestEngineFactory  # noqa: F401 (moved there, still importable from here)
+
+if TYPE_CHECKING:
+    from .output_reader import TestRecord
+    from .sharding import Durations
 
 log = logging.getLogger(__name__)
 
@@ -14,6 +23,16 @@ log = logging.getLogger(__name__)
 class BaseTestEngine(ABC):
     """Abstract base class for test engines."""
     
+    # Glob patterns of the files this engine runs, used to partition work
+    file_patterns: List[str] = []
+    # Extra arguments for partial runs whose outputs are merged afterwards
+    worker_args: List[str] = []
+    # Extra arguments for runs that record test impact (see hands.impact);
+    # the pytest plugin and the behave formatter record on their own
+    impact_args: List[str] = []
+    # Modules a warm process imports ahead of its runs (see hands.warm)
+    preload_modules: List[str] = []
+    
     def __init__(self, name: str) -> None:
         """Initialize the test engine with a name."""
         self.name = name
@@ -24,7 +43,8 @@ class BaseTestEngine(ABC):
         folder: Path, 
         output_file: str, 
         verbose: bool = False,
-        extra_args: List[str] | None = None
+        extra_args: List[str] | None = None,
+        targets: List[str] | None = None
     ) -> int:
         """
         Run tests and generate Robot Framework compatible output.
@@ -34,26 +54,119 @@ class BaseTestEngine(ABC):
             output_file: Output XML file path
             verbose: Enable verbose output
             extra_args: Additional arguments to pass to the test runner
+            targets: Files (or engine-specific ids) to run instead of the folder
             
         Returns:
             Exit code from the test run
         """
         pass
+    
+    def output_path(self, folder: Path, output_file: str) -> Path:
+        """Return where ``run_tests(folder, output_file)`` leaves the output."""
+        return Path(output_file)
+    
+    def suite_name(self, folder: Path) -> Optional[str]:
+        """Return the top-level suite name of a full run's output, if known before running."""
+        return None
+    
+    def collect_items(self, folder: Path) -> List[Path]:
+        """Return the test files below ``folder`` this engine would run.
+        
+        Uses one pruned walk (see hands.fs_scan), so virtualenvs, VCS and
+        build directories and .gitignore'd paths are never collected, and
+        listings of directories unchanged since the last run are reused.
+        """
+        from .fs_scan import FileScanner, ScanCache
+        
+        suffixes = tuple(sorted({os.path.splitext(pattern)[1] for pattern in self.file_patterns}))
+        cache = ScanCache(folder, suffixes)
+        items = sorted(
+            Path(path) for path in FileScanner(folder, suffixes, cache=cache)
+            if any(fnmatch.fnmatchcase(os.path.basename(path), pattern) for pattern in self.file_patterns)
+        )
+        cache.save()
+        return items
+    
+    def select_failed(
+        self, folder: Path, failed: List["TestRecord"]
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """
+        Return the targets and extra arguments that run only ``failed``.
+        
+        Args:
+            folder: Test folder of the run
+            failed: Failed tests of the previous output (see hands.rerun)
+        
+        Returns:
+            (targets, extra arguments); targets None runs the folder, an
+            empty list means none of the tests can be found any more
+        """
+        log.warning("Engine '%s' cannot select tests by name; running all of them", self.name)
+        return None, []
+    
+    def order_failed_first(
+        self, folder: Path, failed: List["TestRecord"]
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """Return the targets and extra arguments that run all tests, ``failed`` first."""
+        log.warning("Engine '%s' cannot reorder tests; running them in the usual order", self.name)
+        return None, []
+    
+    def run_parallel(
+        self,
+        folder: Path,
+        output_file: str,
+        workers: int,
+        verbose: bool = False,
+        extra_args: List[str] | None = None,
+        targets: List[str] | None = None,
+        durations: "Durations | None" = None
+    ) -> int:
+        """
+        Run the tests split across ``workers`` processes into one output.
+        
+        The default partitions the collected files and runs each partition
+        with this engine in a process pool (see hands.parallel). With
+        ``durations`` from a previous run, partitions are balanced by
+        expected runtime instead of file size.
+        
+        Returns:
+            Combined exit code of all partitions
+        """
+        from .parallel import partition, run_partitioned
+        
+        items = targets or [str(path) for path in self.collect_items(folder)]
+        if not items:
+            log.warning("No %s test files found in %s", self.name, folder)
+            return self.run_tests(folder, output_file, verbose, extra_args)
+        weight = durations.weight(items).__getitem__ if durations else None
+        partitions = partition(items, workers, weight)
+        return run_partitioned(self, folder, partitions, output_file, verbose, extra_args)
+    
+    def combine_exit_codes(self, codes: List[int]) -> int:
+        """Combine the exit codes of partial runs into one."""
+        return max(codes, default=0)
 
 
 class PytestEngine(BaseTestEngine):
     """Pytest test engine that generates Robot Framework XML."""
     
+    file_patterns = ["test_*.py", "*_test.py"]
+    preload_modules = ["pytest", "_pytest.config", "hands.pytest_robot_xml", "hands.impact"]
+    
     def __init__(self) -> None:
         """Initialize the pytest engine."""
         super().__init__("pytest")
     
+    def suite_name(self, folder: Path) -> Optional[str]:
+        return "Pytest Suite"
+    
     def run_tests(
         self, 
         folder: Path, 
         output_file: str, 
         verbose: bool = False,
-        extra_args: List[str] | None = None
+        extra_args: List[str] | None = None,
+        targets: List[str] | None = None
     ) -> int:
         """Run pytest tests with Robot XML output."""
         try:
@@ -61,9 +174,9 @@ class PytestEngine(BaseTestEngine):
             
             # Build pytest arguments
             args = [
-                str(folder),
+                *(targets or [str(folder)]),
                 f"--robot-output={output_file}",
-                "--robot-suite-name=Pytest Suite",
+                f"--robot-suite-name={self.suite_name(folder)}",
             ]
             
             if verbose:
@@ -82,21 +195,56 @@ class PytestEngine(BaseTestEngine):
         except Exception as exc:
             log.error("Pytest execution failed: %s", exc)
             return 1
+    
+    def select_failed(
+        self, folder: Path, failed: List["TestRecord"]
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """Test names in hands' pytest outputs are node ids, which pytest takes as targets."""
+        return list(dict.fromkeys(test.name for test in failed)), []
+    
+    def order_failed_first(
+        self, folder: Path, failed: List["TestRecord"]
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """The hands plugin moves the listed node ids to the front after collection."""
+        from .rerun import write_names
+        
+        return None, ["--robot-run-first", write_names(test.name for test in failed)]
+    
+    def combine_exit_codes(self, codes: List[int]) -> int:
+        """Ignore 'no tests collected' (5) unless no partition ran any test."""
+        ran = [code for code in codes if code != 5]
+        return max(ran) if ran else max(codes, default=0)
 
 
 class RobotEngine(BaseTestEngine):
     """Robot Framework test engine."""
     
+    file_patterns = ["*.robot"]
+    worker_args = ["--log", "NONE", "--report", "NONE"]
+    impact_args = ["--listener", "hands.impact.RobotImpactListener"]
+    preload_modules = ["robot.run", "robot.running", "robot.libraries.BuiltIn", "hands.impact"]
+    
     def __init__(self) -> None:
         """Initialize the Robot Framework engine."""
         super().__init__("robot")
     
+    def output_path(self, folder: Path, output_file: str) -> Path:
+        """Robot resolves a relative --output against --outputdir (folder.parent)."""
+        return folder.parent / output_file
+    
+    def suite_name(self, folder: Path) -> Optional[str]:
+        """Robot names the top-level suite after the folder."""
+        from robot.running import TestSuite
+        
+        return TestSuite.name_from_source(folder)
+    
     def run_tests(
         self, 
         folder: Path, 
         output_file: str, 
         verbose: bool = False,
-        extra_args: List[str] | None = None
+        extra_args: List[str] | None = None,
+        targets: List[str] | None = None
     ) -> int:
         """Run Robot Framework tests."""
         try:
@@ -116,7 +264,7 @@ class RobotEngine(BaseTestEngine):
                 args.extend(extra_args)
             
             # Add test folder/files
-            args.append(str(folder))
+            args.extend(targets or [str(folder)])
             
             log.info("Running robot with args: %s", args)
             return run_cli(args, exit=False)
@@ -127,51 +275,328 @@ class RobotEngine(BaseTestEngine):
         except Exception as exc:
             log.error("Robot Framework execution failed: %s", exc)
             return 1
+    
+    def select_failed(
+        self, folder: Path, failed: List["TestRecord"]
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """
+        Select the failed tests with --test, by long name.
+        
+        Each name is also given without the top-level suite, as parallel
+        sub-suite runs name them; --runemptysuite keeps sub-suites without
+        failures from failing the run.
+        """
+        from .rerun import robot_names, robot_pattern
+        
+        args = []
+        for test in failed:
+            for name in robot_names(test.longname):
+                args.extend(["--test", robot_pattern(name)])
+        return None, [*args, "--runemptysuite"]
+    
+    def order_failed_first(
+        self, folder: Path, failed: List["TestRecord"]
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """Reorder the suites with a pre-run modifier, so suite names stay as in a normal run."""
+        from .rerun import write_names
+        
+        names = write_names(test.longname for test in failed)
+        return None, ["--prerunmodifier", f"hands.rerun.RobotFailedFirst;{names}"]
+    
+    def suite_children(self, folder: Path) -> List[Path]:
+        """
+        Return the child suites of ``folder`` the way Robot would build them.
+        
+        Children are ``.robot`` files and directories containing any, sorted
+        by name; names starting with '.' or '_' are ignored as Robot does.
+        Only Robot's own rules apply: unlike collect_items(), build or
+        virtualenv names and .gitignore do not hide a suite Robot would run.
+        """
+        children = []
+        for path in sorted(folder.iterdir(), key=lambda path: path.name.lower()):
+            if path.name.startswith((".", "_")):
+                continue
+            if path.is_file() and path.suffix == ".robot":
+                children.append(path)
+            elif path.is_dir() and self._contains_suite(path):
+                children.append(path)
+        return children
+    
+    @staticmethod
+    def _contains_suite(directory: Path) -> bool:
+        """Return whether Robot would find a .robot file below ``directory``."""
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [name for name in dirs if not name.startswith((".", "_"))]
+            if any(name.endswith(".robot") and not name.startswith((".", "_")) for name in files):
+                return True
+        return False
+    
+    def run_parallel(
+        self,
+        folder: Path,
+        output_file: str,
+        workers: int,
+        verbose: bool = False,
+        extra_args: List[str] | None = None,
+        targets: List[str] | None = None,
+        durations: "Durations | None" = None
+    ) -> int:
+        """
+        Run the top-level sub-suites of ``folder`` in a process pool.
+        
+        Every child suite runs as its own Robot execution with a private
+        output directory; the outputs are merged back under a top-level
+        suite named like the folder, so suite names and ids match a serial
+        run. Explicit ``targets`` (e.g. a shard) and trees that cannot be
+        split - an ``__init__.robot`` at the top or fewer than two child
+        suites - fall back to partitioning the .robot files.
+        
+        Returns:
+            Combined exit code of all sub-suites
+        """
+        from .parallel import _file_size, run_partitioned
+        
+        output_file = str(self.output_path(folder, output_file))
+        children = [] if targets else self.suite_children(folder)
+        if (folder / "__init__.robot").exists() or len(children) < 2:
+            log.info("Cannot split %s into sub-suites, partitioning files instead", folder)
+            return super().run_parallel(folder, output_file, workers, verbose, extra_args, targets, durations)
+        
+        # --name belongs to the combined suite, not to every sub-suite
+        args, name = [], None
+        remaining = iter(extra_args or [])
+        for arg in remaining:
+            option, equals, value = arg.partition("=")
+            if option.lower() == "--name" or arg == "-N":
+                name = value if equals else next(remaining, None)
+            elif arg.startswith("-N"):
+                name = arg[2:]  # -NValue
+            else:
+                args.append(arg)
+        if name is None:
+            name = self.suite_name(folder)
+        
+        files = {child: [str(path) for path in self.collect_items(child)] if child.is_dir() else [str(child)]
+                 for child in children}
+        weight = durations.weight(sum(files.values(), [])) if durations else None
+        cost = {child: sum(weight[item] if weight else _file_size(item) for item in files[child])
+                for child in children}
+        suites_dir = Path(output_file).parent / f"{Path(output_file).stem}_suites"
+        return run_partitioned(
+            self, folder, [[str(child)] for child in children], output_file, verbose, args,
+            workers=workers,
+            partition_args=[["--outputdir", str(suites_dir / child.stem)] for child in children],
+            # Start the longest sub-suites first; the pool then fills the gaps
+            priority=[cost[child] for child in children],
+            flatten=False, name=name, source=str(folder.resolve()),
+        )
+    
+    def combine_exit_codes(self, codes: List[int]) -> int:
+        """
+        Robot's exit code is the number of failed tests, capped at 250.
+        
+        A partition without tests matching --include, --test or --suite exits
+        with 252; that is ignored unless no partition ran any test.
+        """
+        ran = [code for code in codes if code != 252]
+        if not ran:
+            return max(codes, default=0)
+        if any(code > 250 for code in ran):
+            return max(ran)
+        return min(sum(ran), 250)
 
 
 class BehaveEngine(BaseTestEngine):
     """Behave test engine that generates Robot Framework XML."""
     
-    def __init__(self) -> None:
-        """Initialize the behave engine."""
+    file_patterns = ["*.feature"]
+    preload_modules = ["behave.__main__", "behave.runner", "behave.formatter.pretty",
+                       "hands.behave_robot_xml", "hands.impact"]
+    
+    def __init__(self, in_process: bool = False) -> None:
+        """
+        Initialize the behave engine.
+        
+        Args:
+            in_process: Drive behave's runner in this process instead of a
+                ``python -m behave`` subprocess (saves the interpreter start
+                and behave import on every run; used by watch/daemon)
+        """
         super().__init__("behave")
+        self.in_process = in_process
+    
+    def _failed_locations(self, items: List[str], failed: List["TestRecord"]) -> List[str]:
+        """Return 'file:line' of the failed scenarios found in the feature files ``items``."""
+        from .rerun import behave_scenarios
+        
+        locations = behave_scenarios(items)
+        missing = sum(1 for test in failed if test.name not in locations)
+        if missing:
+            log.warning("%d failed scenarios are no longer in the feature files", missing)
+        return list(dict.fromkeys(locations[test.name] for test in failed if test.name in locations))
+    
+    def select_failed(
+        self, folder: Path, failed: List["TestRecord"]
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """Run the failed scenarios by location; their 'Feature :: Scenario' names are looked up in the files."""
+        return self._failed_locations([str(path) for path in self.collect_items(folder)], failed), []
+    
+    def order_failed_first(
+        self, folder: Path, failed: List["TestRecord"]
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """Run the feature files with failed scenarios first; behave runs files in the given order."""
+        items = [str(path) for path in self.collect_items(folder)]
+        first = {location.rsplit(":", 1)[0]: None for location in self._failed_locations(items, failed)}
+        return [*first, *(item for item in items if item not in first)], []
+    
+    def _behave_args(
+        self,
+        folder: Path,
+        output_file: str,
+        verbose: bool,
+        extra_args: List[str] | None,
+        targets: List[str] | None
+    ) -> List[str]:
+        """Build the behave arguments for one run."""
+        args = [
+            "--format", "hands.behave_robot_xml:RobotXmlFormatter",
+            "--outfile", output_file,
+            *(targets or [str(folder)]),
+        ]
+        
+        if verbose:
+            args.extend(["--verbose"])
+        
+        # Add extra arguments
+        if extra_args:
+            args.extend(extra_args)
+        return args
+    
+    def _command(
+        self,
+        folder: Path,
+        output_file: str,
+        verbose: bool,
+        extra_args: List[str] | None,
+        targets: List[str] | None
+    ) -> List[str]:
+        """Build the behave command line for one run."""
+        return [sys.executable, "-m", "behave", *self._behave_args(folder, output_file, verbose, extra_args, targets)]
+    
+    def _run_in_process(self, args: List[str]) -> int:
+        """
+        Run behave's runner in this process.
+        
+        Results still reach the caller through the RobotXmlFormatter and the
+        output file, as in a subprocess run, not as a ResultBatch returned
+        here. The output file is what ``hands run`` produces and what its
+        history, cache and rerun steps read, and under watch and the daemon
+        the run happens in a forked child or worker (see hands.warm and
+        hands.daemon), so the results cross a process boundary anyway. What
+        this saves is the interpreter start and the imports.
+        
+        Step definitions live in a process-wide registry; it is emptied
+        first so a repeated run loads the current step files instead of
+        failing on (or reusing) the previous run's definitions. behave's
+        main() rebinds ``behave.step_registry.registry`` on every run while
+        ``behave.given`` & co. and the runner keep the original, so both
+        are cleared.
+        """
+        import behave.runner
+        import behave.step_registry
+        from behave.__main__ import main as behave_main
+        
+        registries = {id(r): r for r in (behave.step_registry.registry,
+                                         getattr(behave.runner, "the_step_registry", None)) if r is not None}
+        for registry in registries.values():
+            if hasattr(registry, "clear"):
+                registry.clear()
+            else:
+                for step_definitions in registry.steps.values():
+                    step_definitions.clear()
+        return behave_main(args)
     
     def run_tests(
         self, 
         folder: Path, 
         output_file: str, 
         verbose: bool = False,
-        extra_args: List[str] | None = None
+        extra_args: List[str] | None = None,
+        targets: List[str] | None = None
     ) -> int:
         """Run behave tests with Robot XML output."""
         try:
-            # Build behave arguments
-            args = [
-                sys.executable, "-m", "behave",
-                "--format", "hands.behave_robot_xml:RobotXmlFormatter",
-                "--outfile", output_file,
-                str(folder),
-            ]
-            
-            if verbose:
-                args.extend(["--verbose"])
-            
-            # Add extra arguments
-            if extra_args:
-                args.extend(extra_args)
+            if self.in_process:
+                args = self._behave_args(folder, output_file, verbose, extra_args, targets)
+                log.info("Running behave in-process with args: %s", args)
+                return self._run_in_process(args)
             
+            args = self._command(folder, output_file, verbose, extra_args, targets)
             log.info("Running behave with args: %s", args)
             result = subprocess.run(args, capture_output=False)
             return result.returncode
             
+        except ImportError:
+            log.error("Behave is not installed")
+            return 1
         except Exception as exc:
             log.error("Behave execution failed: %s", exc)
             return 1
+    
+    def run_parallel(
+        self,
+        folder: Path,
+        output_file: str,
+        workers: int,
+        verbose: bool = False,
+        extra_args: List[str] | None = None,
+        targets: List[str] | None = None,
+        durations: "Durations | None" = None
+    ) -> int:
+        """
+        Run partitions of the feature files as concurrent behave processes.
+        
+        behave already runs in a subprocess, so the partitions are started
+        directly instead of going through a process pool. Each process writes
+        its own output.xml and console log; the logs are replayed in order
+        once all processes have finished, and the outputs merged. Partitions
+        are consecutive runs of the feature files, so the merged output keeps
+        the order of a serial run.
+        
+        Returns:
+            Combined exit code of all partitions
+        """
+        from .parallel import merge_partitions, partition_in_order
+        
+        items = targets or [str(path) for path in self.collect_items(folder)]
+        if not items:
+            log.warning("No behave feature files found in %s", folder)
+            return self.run_tests(folder, output_file, verbose, extra_args)
+        weight = durations.weight(items).__getitem__ if durations else None
+        partitions = partition_in_order(items, workers, weight)
+        
+        log.info("Running %d behave partitions in parallel", len(partitions))
+        with tempfile.TemporaryDirectory(prefix="hands-workers-") as tmp_dir:
+            outputs = [str(Path(tmp_dir) / f"worker{index}.xml") for index in range(len(partitions))]
+            logs = [Path(tmp_dir) / f"worker{index}.log" for index in range(len(partitions))]
+            processes = []
+            for part, out, log_path in zip(partitions, outputs, logs):
+                args = self._command(folder, out, verbose, extra_args, part)
+                log.debug("Starting behave worker: %s", args)
+                with open(log_path, "wb") as console:
+                    processes.append(subprocess.Popen(args, stdout=console, stderr=subprocess.STDOUT))
+            codes = [process.wait() for process in processes]
+            for log_path in logs:
+                sys.stdout.write(log_path.read_text(errors="replace"))
+            sys.stdout.flush()
+            return merge_partitions(self, outputs, codes, output_file)
 
 
 class GherkinPytestEngine(BaseTestEngine):
     """Gherkin parser with pytest execution engine."""
     
+    file_patterns = ["*.feature"]
+    
     def __init__(self) -> None:
         """Initialize the gherkin-pytest engine."""
         super().__init__("gherkin-pytest")
@@ -181,47 +606,11 @@ class GherkinPytestEngine(BaseTestEngine):
         folder: Path, 
         output_file: str, 
         verbose: bool = False,
-        extra_args: List[str] | None = None
+        extra_args: List[str] | None = None,
+        targets: List[str] | None = None
     ) -> int:
         """Run gherkin features through pytest."""
         # This would be implemented with a gherkin parser
         # For now, placeholder implementation
         log.warning("Gherkin-pytest engine not yet fully implemented")
         return 1
-
-
-class TestEngineFactory:
-    """Factory for creating test engine instances."""
-    
-    _engines = {
-        "pytest": PytestEngine,
-        "robot": RobotEngine,
-        "behave": BehaveEngine,
-        "gherkin-pytest": GherkinPytestEngine,
-    }
-    
-    @classmethod
-    def create_engine(cls, engine_name: str) -> BaseTestEngine:
-        """
-        Create a test engine instance.
-        
-        Args:
-            engine_name: Name of the engine to create
-            
-        Returns:
-            Test engine instance
-            
-        Raises:
-            ValueError: If engine name is not supported
-        """
-        if engine_name not in cls._engines:
-            available = ", ".join(cls._engines.keys())
-            raise ValueError(f"Unknown engine '{engine_name}'. Available: {available}")
-        
-        engine_class = cls._engines[engine_name]
-        return engine_class()
-    
-    @classmethod
-    def get_available_engines(cls) -> List[str]:
-        """Get list of available engine names."""
-        return list(cls._engines.keys())
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Run tests in processes forked from a warmed-up parent.
+
+Starting the interpreter and importing pytest, Robot Framework or behave
+often takes longer than the few tests a rerun needs. A warm parent imports
+the engine's ``preload_modules`` (and any modules named by the user) once;
+every run then happens in a child forked from it. The child starts with
+those modules loaded but imports the code under test afresh, so edits are
+always picked up - which is why the parent itself must never import test
+or project code.
+
+Where fork is not available the child is spawned instead: same results,
+cold start.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import multiprocessing
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from .test_engines import BaseTestEngine
+
+log = logging.getLogger(__name__)
+
+
+def preload(engines: Iterable["BaseTestEngine"], modules: Iterable[str] = ()) -> List[str]:
+    """Import the preload modules of ``engines`` and ``modules``; returns the names that failed."""
+    failed = []
+    for name in dict.fromkeys([*(name for engine in engines for name in engine.preload_modules), *modules]):
+        try:
+            importlib.import_module(name)
+        except Exception as exc:  # noqa: BLE001 (a module that fails only costs warmth)
+            log.warning("Cannot preload %s: %s", name, exc)
+            failed.append(name)
+    return failed
+
+
+def start_method() -> str:
+    """Return 'fork' where available, so children inherit the preloaded modules."""
+    return "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _run_child(
+    engine_name: str,
+    folder: Path,
+    output_file: str,
+    verbose: bool,
+    extra_args: List[str],
+    targets: Optional[List[str]],
+) -> None:
+    """Child process entry point: run the tests and exit with their exit code."""
+    from .engine_registry import TestEngineFactory
+
+    engine = TestEngineFactory.create_engine(engine_name)
+    if hasattr(engine, "in_process"):
+        engine.in_process = True  # behave: the child is the warm interpreter
+    sys.exit(engine.run_tests(folder, output_file, verbose, extra_args, targets))
+
+
+def run_forked(
+    engine_name: str,
+    folder: Path,
+    output_file: str,
+    verbose: bool = False,
+    extra_args: Optional[List[str]] = None,
+    targets: Optional[List[str]] = None,
+) -> int:
+    """
+    Run ``engine_name`` in a child of this process, like BaseTestEngine.run_tests.
+
+    Returns:
+        The run's exit code, or 3 if the child died from a signal
+    """
+    context = multiprocessing.get_context(start_method())
+    child = context.Process(
+        target=_run_child, name=f"hands-{engine_name}",
+        args=(engine_name, folder, output_file, verbose, list(extra_args or []), targets),
+    )
+    child.start()
+    try:
+        child.join()
+    except KeyboardInterrupt:
+        child.terminate()
+        child.join()
+        raise
+    if child.exitcode is None or child.exitcode < 0:
+        log.error("The %s run was killed (exit code %s)", engine_name, child.exitcode)
+        return 3
+    return child.exitcode
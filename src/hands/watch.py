@@ -0,0 +1,236 @@
+"""Watch a tree for changed files, for ``hands watch``.
+
+InotifyWatcher uses Linux inotify through ctypes, so no dependency is
+needed; elsewhere, or when the inotify limits are exhausted, PollingWatcher
+compares the mtime and size of every file once per interval. Both walk the
+tree like engine detection (see hands.fs_scan): VCS, virtualenv, cache and
+build directories and .gitignore'd directories are not watched.
+
+wait_for_changes debounces: it returns once no further change arrived for
+the debounce delay, so an editor's burst of writes or a branch switch is
+one batch.
+"""
+from __future__ import annotations
+
+import ctypes
+import errno
+import fnmatch
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from .fs_scan import DEFAULT_IGNORE_PATTERNS, DEFAULT_IGNORES, FileScanner
+
+log = logging.getLogger(__name__)
+
+# Files editors write next to the one being saved (vim probes with '4913')
+NOISE_SUFFIXES = (".pyc", ".pyo", ".swp", ".swx", ".tmp", "~")
+NOISE_PREFIXES = (".#",)
+NOISE_NAMES = frozenset({"4913"})
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+# Completed writes only (not every IN_MODIFY), so files held open and
+# appended to, such as logs, do not keep the debounce from settling
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+_EVENT = struct.Struct("iIII")
+
+
+def _ignored_dir(name: str) -> bool:
+    return name in DEFAULT_IGNORES or any(fnmatch.fnmatchcase(name, pattern) for pattern in DEFAULT_IGNORE_PATTERNS)
+
+
+def is_noise(path: str, root: str) -> bool:
+    """Return whether ``path`` is an editor temporary or lies in a directory (below ``root``) never watched."""
+    name = os.path.basename(path)
+    if name in NOISE_NAMES or name.endswith(NOISE_SUFFIXES) or name.startswith(NOISE_PREFIXES):
+        return True
+    return any(_ignored_dir(part) for part in os.path.relpath(path, root).split(os.sep)[:-1])
+
+
+def _scan(root: str, files: bool) -> Tuple[list, list]:
+    """Return (files, directories) of the pruned tree below ``root``; files only if asked."""
+    scanner = FileScanner(root, None if files else ())
+    found = list(scanner)
+    return found, scanner.directories
+
+
+class Watcher(ABC):
+    """Reports the files below ``root`` that were created, changed or removed."""
+
+    def __init__(self, root: str | os.PathLike) -> None:
+        self.root = os.path.abspath(root)
+
+    @abstractmethod
+    def changes(self, timeout: Optional[float] = None) -> Set[str]:
+        """Return the paths changed since the last call, waiting up to ``timeout`` seconds for one.
+
+        With ``timeout`` None, waits until something changes; an empty set
+        means nothing changed in time.
+        """
+
+    def close(self) -> None:
+        """Release the watcher's resources."""
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # noqa: ANN001
+        self.close()
+
+
+class InotifyWatcher(Watcher):
+    """Linux inotify watches on every directory of the tree, added as directories appear.
+
+    Raises:
+        OSError: If inotify is unavailable or its watch limit is reached
+    """
+
+    def __init__(self, root: str | os.PathLike) -> None:
+        super().__init__(root)
+        try:
+            self._libc = ctypes.CDLL(None, use_errno=True)
+            init = self._libc.inotify_init1
+        except (OSError, AttributeError) as exc:
+            raise OSError(errno.ENOSYS, f"inotify is not available: {exc}") from exc
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_init1: {os.strerror(ctypes.get_errno())}")
+        self.directories: Dict[int, str] = {}
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, directory: str, files: bool = False) -> list:
+        """Watch ``directory`` and the directories below it; returns its files if ``files``."""
+        found, directories = _scan(directory, files)
+        for path in directories:
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK | IN_ONLYDIR)
+            if wd >= 0:
+                self.directories[wd] = path
+                continue
+            code = ctypes.get_errno()
+            if code == errno.ENOSPC:
+                raise OSError(code, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            log.debug("Cannot watch %s: %s", path, os.strerror(code))
+        log.debug("Watching %d directories below %s", len(directories), directory)
+        return found
+
+    def changes(self, timeout: Optional[float] = None) -> Set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        changed: Set[str] = set()
+        if not ready:
+            return changed
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    log.warning("inotify dropped events; treating every file as changed")
+                    changed.update(_scan(self.root, True)[0])
+                    continue
+                if mask & IN_IGNORED:
+                    self.directories.pop(wd, None)
+                    continue
+                directory = self.directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if not mask & IN_ISDIR:
+                    changed.add(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO) and not _ignored_dir(os.fsdecode(name)):
+                    # Its files may have been written before the watch was added
+                    changed.update(self._add_tree(path, files=True))
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher(Watcher):
+    """Compares the mtime and size of every file in the tree once per ``interval`` seconds."""
+
+    def __init__(self, root: str | os.PathLike, interval: float = 0.5) -> None:
+        super().__init__(root)
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        files = {}
+        for path in _scan(self.root, True)[0]:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def changes(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic()))
+            time.sleep(wait)
+            snapshot = self._snapshot()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+
+def create_watcher(root: str | os.PathLike, polling: bool = False, interval: float = 0.5) -> Watcher:
+    """Return an InotifyWatcher on Linux (unless ``polling``), else a PollingWatcher."""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except OSError as exc:
+            log.warning("Cannot use inotify (%s); polling every %.1fs instead", exc, interval)
+    return PollingWatcher(root, interval)
+
+
+def wait_for_changes(watcher: Watcher, debounce: float = 0.2, ignore: Iterable[str] = ()) -> Set[str]:
+    """
+    Wait for a batch of changes and return the changed paths.
+
+    The batch ends once nothing changed for ``debounce`` seconds. Noise
+    (see is_noise) and the files and directories in ``ignore``, such as
+    the run's own output, are left out and never start a batch.
+    """
+    ignored = tuple(os.path.abspath(path) for path in ignore)
+    prefixes = tuple(os.path.join(path, "") for path in ignored)
+
+    def relevant(paths: Set[str]) -> Set[str]:
+        return {path for path in paths
+                if not (is_noise(path, watcher.root) or path in ignored or path.startswith(prefixes))}
+
+    changed: Set[str] = set()
+    while not changed:
+        changed = relevant(watcher.changes())
+    while True:
+        more = relevant(watcher.changes(debounce))
+        if not more:
+            return changed
+        changed |= more
@@ -0,0 +1,21 @@
+"""Shared fixtures for the hands test suite."""
+from pathlib import Path
+
+import pytest
+
+from hands.cache import CACHE_DIR_ENV
+from hands.daemon import DAEMON_SOCKET_ENV
+from hands.history import HISTORY_DB_ENV, RUN_ID_ENV
+from hands.impact import IMPACT_DB_ENV, IMPACT_RUN_ENV
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keep on-disk caches out of the working directory, history and impact recording off and runs local."""
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "hands_cache"))
+    monkeypatch.setenv(DAEMON_SOCKET_ENV, str(tmp_path / "daemon.sock"))
+    # Set (not deleted) so that monkeypatch also undoes what `hands run` exports
+    monkeypatch.setenv(HISTORY_DB_ENV, "")
+    monkeypatch.setenv(RUN_ID_ENV, "")
+    monkeypatch.setenv(IMPACT_DB_ENV, "")
+    monkeypatch.setenv(IMPACT_RUN_ENV, "")
@@ -0,0 +1,78 @@
+"""Tests for running behave through hands.test_engines.BehaveEngine."""
+from pathlib import Path
+from types import SimpleNamespace
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from hands.history import HISTORY_DB_ENV
+from hands.output_reader import elapsed_seconds, iter_tests
+from hands.test_engines import BehaveEngine
+
+pytest.importorskip("behave")
+
+
+def _features(root: Path) -> Path:
+    features = root / "features"
+    (features / "steps").mkdir(parents=True)
+    (features / "steps" / "steps.py").write_text(
+        "import time\nfrom behave import given\n\n@given('the value {n:d}')\ndef step(context, n):\n"
+        "    time.sleep(n / 100)\n    assert n < 3\n")
+    (features / "numbers.feature").write_text(
+        "Feature: Numbers\n  Scenario: Small\n    Given the value 1\n"
+        "  Scenario: Large\n    Given the value 5\n    And the value 1\n")
+    return features
+
+
+def test_in_process_runs_repeatedly(tmp_path: Path) -> None:
+    features = _features(tmp_path)
+    engine = BehaveEngine(in_process=True)
+
+    for run in range(2):
+        out = tmp_path / f"out{run}.xml"
+        assert engine.run_tests(features, str(out)) == 1
+        assert [(test.name, test.status) for test in iter_tests(str(out))] == [
+            ("Numbers :: Small", "PASS"), ("Numbers :: Large", "FAIL")]
+
+
+def test_steps_written_as_timed_keywords(tmp_path: Path) -> None:
+    features = _features(tmp_path)
+    out = tmp_path / "out.xml"
+    BehaveEngine(in_process=True).run_tests(features, str(out))
+
+    small, large = ET.parse(out).getroot().iter("test")
+    (given,) = small.findall("kw")
+    assert given.get("name") == "Given the value 1"
+    assert elapsed_seconds(given.find("status")) >= 0.005
+    failed, not_run = large.findall("kw")
+    assert (failed.find("status").get("status"), not_run.find("status").get("status")) == ("FAIL", "NOT RUN")
+    assert elapsed_seconds(failed.find("status")) >= 0.04
+    assert elapsed_seconds(large.find("status")) >= elapsed_seconds(failed.find("status"))
+
+
+def test_scenario_ends_with_its_last_step(tmp_path: Path) -> None:
+    features = _features(tmp_path)
+    (features / "environment.py").write_text(
+        "import time\n\ndef after_scenario(context, scenario):\n    time.sleep(0.2)\n")
+    out = tmp_path / "out.xml"
+    BehaveEngine(in_process=True).run_tests(features, str(out))
+
+    for test in ET.parse(out).getroot().iter("test"):
+        last_step_end = test.findall("kw")[-1].find("status").get("endtime")
+        assert test.find("status").get("endtime") == last_step_end
+        assert elapsed_seconds(test.find("status")) < 0.2
+
+
+def test_formatter_without_scenarios_releases_history(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from behave.formatter.base import StreamOpener
+    from hands.behave_robot_xml import RobotXmlFormatter
+
+    monkeypatch.setenv(HISTORY_DB_ENV, str(tmp_path / "history.sqlite3"))
+    formatter = RobotXmlFormatter(StreamOpener(filename=str(tmp_path / "out.xml")), SimpleNamespace())
+    recorder = formatter.writer._history
+    assert recorder.store is not None
+
+    formatter.close()
+
+    assert recorder.store is None and not (tmp_path / "out.xml").exists()
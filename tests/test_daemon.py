@@ -0,0 +1,135 @@
+"""Tests for the warm worker daemon in hands.daemon and `hands run` handing runs to it."""
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from hands import daemon as daemon_module, engine_registry
+from hands.daemon import DAEMON_SOCKET_ENV, Channel, _connect, _run, request, socket_path, supported
+from hands.main import app
+from hands.output_reader import iter_tests
+
+pytestmark = pytest.mark.skipif(not supported(), reason="the daemon needs fork and Unix sockets")
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+
+def test_channel_frames_messages_and_passes_descriptors(tmp_path: Path) -> None:
+    left, right = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    sender, receiver = Channel(left), Channel(right)
+    with open(tmp_path / "shared.txt", "w") as shared:
+        sender.send({"targets": ["tests/test_x.py"] * 5_000}, [shared.fileno()])
+        sender.send({"rc": 1})
+
+    message, fds = receiver.receive()
+    assert len(message["targets"]) == 5_000 and len(fds) == 1
+    with os.fdopen(fds[0], "w") as passed:
+        passed.write("via the descriptor")
+    assert receiver.receive() == ({"rc": 1}, [])
+    sender.close()
+    with pytest.raises(ConnectionError):
+        receiver.receive()
+    assert (tmp_path / "shared.txt").read_text() == "via the descriptor"
+
+
+def test_socket_directory_must_be_private(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(DAEMON_SOCKET_ENV)
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+    directory = tmp_path / f"hands-{os.getuid()}"
+
+    assert request("status") is None and not directory.exists()  # clients never create it
+    assert Path(socket_path(create=True)).parent == directory
+    assert directory.stat().st_mode & 0o777 == 0o700
+
+    directory.chmod(0o755)
+    with pytest.raises(RuntimeError, match="not a private directory"):
+        socket_path()
+    assert _connect() is None
+
+
+def test_daemon_of_another_user_is_not_used(monkeypatch: pytest.MonkeyPatch) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="hands-"), "daemon.sock")
+    monkeypatch.setenv(DAEMON_SOCKET_ENV, path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    try:
+        channel = _connect()
+        assert channel is not None
+        channel.close()
+
+        monkeypatch.setattr(daemon_module, "_peer_uid", lambda sock, path: os.getuid() + 1)
+        assert _connect() is None
+    finally:
+        server.close()
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def test_interrupted_worker_run_exits_130(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    class Interrupted:
+        def run_tests(self, *args: object) -> int:
+            raise KeyboardInterrupt
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(engine_registry.TestEngineFactory, "create_engine", lambda name: Interrupted())
+    message = {"engine": "pytest", "folder": ".", "output": "output.xml", "verbose": False, "args": [],
+               "targets": None, "cwd": str(tmp_path), "env": dict(os.environ), "path": list(sys.path)}
+
+    assert _run(message) == 130
+
+
+def _wait_for(condition, timeout: float = 30.0):  # noqa: ANN001, ANN202
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = condition()
+        if value:
+            return value
+        time.sleep(0.1)
+    raise AssertionError("timed out")
+
+
+def test_run_uses_daemon_which_restarts_on_manifest_change(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "target.py").write_text("VALUE = 1\n")
+    (tmp_path / "tests" / "test_value.py").write_text(
+        "import os\nimport target\n\ndef test_value():\n    assert target.VALUE == 1\n\n"
+        "def test_stdin_is_not_the_terminal():\n    assert os.read(0, 1) == b''\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # Unix socket paths must be short; pytest's tmp_path can be too long
+    socket_dir = tempfile.mkdtemp(prefix="hands-")
+    monkeypatch.setenv(DAEMON_SOCKET_ENV, os.path.join(socket_dir, "daemon.sock"))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([SRC, os.environ.get("PYTHONPATH", "")])}
+    daemon = subprocess.Popen([sys.executable, "-c", "from hands.main import app; app()",
+                               "daemon", "start", "--engine", "pytest", "--workers", "1"], env=env)
+    runner = CliRunner()
+    command = ["run", "--engine", "pytest", "--folder", "tests", "--no-history", "--", "-p", "no:cacheprovider"]
+    try:
+        first = _wait_for(lambda: request("status"))
+        assert first["pid"] == daemon.pid and first["engines"] == ["pytest"]
+
+        assert runner.invoke(app, command).exit_code == 0
+        (tmp_path / "target.py").write_text("VALUE = 2\n")
+        assert runner.invoke(app, command).exit_code == 1
+        assert [test.status for test in iter_tests("output.xml")] == ["FAIL", "PASS"]
+        assert request("status")["runs"] == 2
+        assert "target" not in sys.modules  # the runs happened in daemon workers
+
+        (tmp_path / "requirements.txt").write_text("pytest\n")
+        restarted = _wait_for(lambda: (request("status") or {}).get("started", 0) > first["started"] and 1)
+        assert restarted and request("status")["runs"] == 0
+
+        assert request("stop")["stopped"] == daemon.pid
+        assert daemon.wait(timeout=30) == 0
+        assert request("status") is None
+    finally:
+        if daemon.poll() is None:
+            daemon.kill()
+        shutil.rmtree(socket_dir, ignore_errors=True)
@@ -0,0 +1,54 @@
+"""Tests for engine discovery through entry points in hands.engine_registry."""
+from importlib.metadata import EntryPoint
+from pathlib import Path
+from typing import List
+
+import pytest
+from typer.testing import CliRunner
+
+from hands import engine_registry
+from hands.main import app
+from hands.test_engines import BaseTestEngine, PytestEngine
+
+
+class DummyEngine(BaseTestEngine):
+    def __init__(self) -> None:
+        super().__init__("dummy")
+
+    def run_tests(self, folder: Path, output_file: str, verbose: bool = False,
+                  extra_args: List[str] | None = None, targets: List[str] | None = None) -> int:
+        return 0
+
+
+def _plugins(monkeypatch: pytest.MonkeyPatch, **specs: str) -> None:
+    plugins = {name: EntryPoint(name, spec, engine_registry.ENTRY_POINT_GROUP) for name, spec in specs.items()}
+    monkeypatch.setattr(engine_registry, "_plugin_engines", lambda: plugins)
+
+
+def test_builtin_engines_load_without_scanning_plugins(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail() -> dict:
+        raise AssertionError("entry points scanned")
+    monkeypatch.setattr(engine_registry, "_plugin_engines", fail)
+
+    assert isinstance(engine_registry.TestEngineFactory.create_engine("pytest"), PytestEngine)
+
+
+def test_plugin_engine_is_loaded_on_demand(monkeypatch: pytest.MonkeyPatch) -> None:
+    _plugins(monkeypatch, dummy=f"{__name__}:DummyEngine", broken=f"{__name__}:_plugins")
+
+    assert engine_registry.engine_names()[-2:] == ["broken", "dummy"]
+    assert engine_registry.TestEngineFactory.create_engine("dummy").name == "dummy"
+    with pytest.raises(ValueError, match="not refer to a BaseTestEngine"):
+        engine_registry.load_engine_class("broken")
+    with pytest.raises(ValueError, match="Unknown engine 'nope'"):
+        engine_registry.load_engine_class("nope")
+
+
+def test_list_engines_shows_plugin_engines(monkeypatch: pytest.MonkeyPatch) -> None:
+    _plugins(monkeypatch, dummy=f"{__name__}:DummyEngine", missing="not_installed_pkg.engine:Engine")
+
+    listed = CliRunner().invoke(app, ["list-engines"])
+
+    assert listed.exit_code == 0
+    lines = [line.strip() for line in listed.output.splitlines()]
+    assert "✓ dummy" in lines and "✗ missing" in lines and "gherkin-pytest" in listed.output
@@ -0,0 +1,86 @@
+"""Tests for the pruned filesystem walk in hands.fs_scan and engine detection."""
+import os
+from pathlib import Path
+
+from hands.engine_detector import EngineDetector
+from hands.fs_scan import FileScanner, ScanCache
+
+
+def _touch(root: Path, *paths: str) -> None:
+    for path in paths:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text("")
+
+
+def _scan(root: Path, **options) -> list:
+    return sorted(Path(path).relative_to(root).as_posix() for path in FileScanner(root, **options))
+
+
+def test_skips_ignored_dirs_and_gitignore(tmp_path: Path) -> None:
+    _touch(tmp_path, "tests/test_a.py", ".venv/lib/test_x.py", "node_modules/x/test_y.py",
+           "pkg.egg-info/test_z.py", "out/test_gen.py", "logs/run.log", "keep/out/test_b.py",
+           "keep/skip.py", "keep/important.py")
+    (tmp_path / ".gitignore").write_text("# generated\n/out/\n*.log\nkeep/*.py\n!keep/important.py\n")
+
+    assert _scan(tmp_path) == [".gitignore", "keep/important.py", "keep/out/test_b.py", "tests/test_a.py"]
+    assert _scan(tmp_path, suffixes=(".py",), use_gitignore=False) == [
+        "keep/important.py", "keep/out/test_b.py", "keep/skip.py", "out/test_gen.py", "tests/test_a.py"]
+
+
+def test_budget_truncates(tmp_path: Path) -> None:
+    _touch(tmp_path, "a/b/c/test_deep.py", "test_top.py")
+
+    shallow = FileScanner(tmp_path, (".py",), max_depth=1)
+    assert [Path(path).name for path in shallow] == ["test_top.py"]
+    assert shallow.truncated
+
+    limited = FileScanner(tmp_path, max_entries=1)
+    list(limited)
+    assert limited.truncated and limited.entries == 2
+
+
+def test_detector_prefers_features_and_prunes(tmp_path: Path) -> None:
+    _touch(tmp_path, "suite/a.robot", ".venv/lib/site/steps.feature")
+    detector = EngineDetector()
+
+    assert detector.detect_engine(tmp_path, []) == "robot"
+
+    _touch(tmp_path, "features/login.feature")
+    assert detector.detect_engine(tmp_path, []) == "behave"
+
+
+def test_cache_relists_only_changed_dirs(tmp_path: Path) -> None:
+    root = tmp_path / "tree"
+    _touch(root, "a/test_a.py", "b/test_b.py", "b/c/test_c.py")
+    old = 1_000_000_000
+    for directory in (root, root / "a", root / "b", root / "b" / "c"):
+        os.utime(directory, (old, old))
+
+    first = ScanCache(root, (".py",))
+    assert len(list(FileScanner(root, (".py",), cache=first))) == 3
+    first.save()
+
+    (root / "b" / "c" / "test_new.py").write_text("")
+    os.utime(root / "b" / "c", (old + 1, old + 1))
+    second = ScanCache(root, (".py",))
+
+    assert sorted(Path(path).name for path in FileScanner(root, (".py",), cache=second)) == [
+        "test_a.py", "test_b.py", "test_c.py", "test_new.py"]
+    assert (second.hits, second.misses) == (3, 1)
+
+
+def test_detector_reuses_result_until_tree_changes(tmp_path: Path) -> None:
+    root = tmp_path / "tree"
+    _touch(root, "suite/a.robot")
+    old = 1_000_000_000
+    for directory in (root, root / "suite"):
+        os.utime(directory, (old, old))
+    detector = EngineDetector()
+
+    assert detector.detect_engine(root, []) == "robot"
+    key = f"engine:{detector.max_depth}:{detector.max_entries}"
+    assert ScanCache(root, EngineDetector.SUFFIXES).result(key) == "robot"
+
+    _touch(root, "suite/login.feature")
+    os.utime(root / "suite", (old + 1, old + 1))
+    assert detector.detect_engine(root, []) == "behave"
@@ -0,0 +1,93 @@
+"""Tests for the run history store in hands.history and `hands history`."""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from hands.history import HISTORY_DB_ENV, RUN_ID_ENV, HistoryStore
+from hands.main import app
+from hands.report_xml import TestResult as Result, write_robot_output
+
+T0 = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _result(name: str, status: str, seconds: float, tags: list) -> Result:
+    return Result(name, status, T0, T0 + timedelta(seconds=seconds), tags=tags)
+
+
+def test_queries_cover_the_recent_runs(tmp_path: Path) -> None:
+    with HistoryStore(tmp_path / "history.db") as store:
+        for run in range(4):
+            run_id = store.begin_run(engine="pytest")
+            store.add_rows(run_id, [
+                ("S.fast", "PASS", 0.0, 0.1, ["unit"]),
+                ("S.slow", "FAIL" if run % 2 else "PASS", 0.0, 1.0 + run, ["api", "unit"]),
+            ])
+            store.finish_run(run_id, rc=run % 2)
+
+        assert [(name, mean, count) for name, mean, _, count in store.slowest(top=1, runs=2)] == [
+            ("S.slow", 3.5, 2)]
+        assert [(status, elapsed) for _, _, status, elapsed in store.trend("S.slow", runs=None)] == [
+            ("PASS", 1.0), ("FAIL", 2.0), ("PASS", 3.0), ("FAIL", 4.0)]
+        assert store.failure_rates(runs=None) == [("api", 4, 2), ("unit", 8, 2)]
+        assert [(run.tests, run.failed, run.rc) for run in store.recent_runs(2)] == [(2, 1, 1), (2, 0, 0)]
+        assert store.find_tests("%slo%") == ["S.slow"]
+
+
+def test_writers_of_one_run_share_it(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    db = tmp_path / "history.db"
+    monkeypatch.setenv(HISTORY_DB_ENV, str(db))
+    monkeypatch.setenv(RUN_ID_ENV, "run-1")
+
+    write_robot_output("Suite", [_result("a", "PASS", 1, ["t"])], str(tmp_path / "a.xml"))
+    write_robot_output("Suite", [_result("b", "FAIL", 2, [])], str(tmp_path / "b.xml"))
+
+    with HistoryStore(db) as store:
+        (run,) = store.recent_runs()
+        assert (run.key, run.tests, run.failed) == ("run-1", 2, 1)
+        assert [name for name, *_ in store.slowest()] == ["Suite.b", "Suite.a"]
+
+
+def test_run_records_robot_output_and_cli_queries_it(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("robot")
+    suite = tmp_path / "suite"
+    suite.mkdir()
+    (suite / "checks.robot").write_text(
+        "*** Test Cases ***\nQuick\n    [Tags]    smoke\n    No Operation\n"
+        "Broken\n    [Tags]    smoke\n    Fail    boom\n")
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+
+    ran = runner.invoke(app, ["run", "--engine", "robot", "--folder", str(suite), "--", "--log", "NONE",
+                              "--report", "NONE"])
+    tags = runner.invoke(app, ["history", "tags"])
+    trend = runner.invoke(app, ["history", "trend", "%Broken"])
+
+    assert ran.exit_code == 1, ran.output
+    assert "smoke" in tags.output and "50.0%" in tags.output
+    assert "FAIL" in trend.output and "Suite.Checks.Broken" in trend.output
+
+
+def test_cached_results_are_recorded_without_duration(tmp_path: Path) -> None:
+    from hands.main import _finish_history
+    from hands.result_cache import CACHED_TAG
+
+    db = tmp_path / "history.db"
+    partial, full = tmp_path / "partial.xml", tmp_path / "full.xml"
+    write_robot_output("S", [_result("ran", "PASS", 2, []), _result("cached", "PASS", 0, [CACHED_TAG])],
+                       str(partial))
+    write_robot_output("S", [_result("cached", "PASS", 0, [CACHED_TAG])], str(full))
+
+    store = HistoryStore(db)
+    run_id = store.begin_run(engine="pytest")
+    store.add_rows(run_id, [("S.ran", "PASS", 0.0, 2.0, [])])  # what the writer recorded
+    _finish_history((store, run_id, 0.0), partial, 0, replayed=True)
+    store = HistoryStore(db)
+    _finish_history((store, store.begin_run(engine="pytest"), 0.0), full, 0, replayed=True)
+
+    with HistoryStore(db) as store:
+        assert [(run.tests, run.failed) for run in store.recent_runs()] == [(1, 0), (2, 0)]
+        assert [row[2:] for row in store.trend("S.cached")] == [("PASS", None)] * 2
+        assert [name for name, *_ in store.slowest()] == ["S.ran"]
+        assert [name for name, *_ in store.slowest(runs=0)] == ["S.ran"]
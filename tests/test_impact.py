@@ -0,0 +1,84 @@
+"""Tests for test impact analysis in hands.impact and `hands run --changed`."""
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from hands.impact import ImpactMap, ImpactRecorder, select_tests
+from hands.main import app
+from hands.output_reader import iter_tests
+
+
+def test_map_replaces_earlier_runs_and_merges_one_run(tmp_path: Path) -> None:
+    with ImpactMap(tmp_path / "impact.db") as impact:
+        impact.record("run-1", {"tests/test_a.py": {"tests/test_a.py", "a.py", "old.py"}})
+        impact.record("run-2", {"tests/test_a.py": {"tests/test_a.py", "a.py"}})
+        # Another process of run 2, e.g. an xdist worker with other tests of the file
+        impact.record("run-2", {"tests/test_a.py": {"shared.py"}, "tests/test_b.py": {"b.py", "shared.py"}})
+
+        assert impact.dependencies("tests/test_a.py") == ["a.py", "shared.py", "tests/test_a.py"]
+        assert impact.affected_tests(["old.py"]) == set()
+        assert impact.affected_tests(["shared.py"]) == {"tests/test_a.py", "tests/test_b.py"}
+
+
+def test_select_runs_affected_changed_and_unknown_tests(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    items = ["tests/test_a.py", "tests/test_b.py", "tests/test_c.py", "tests/test_new.py"]
+    with ImpactMap(tmp_path / "impact.db") as impact:
+        impact.record("run-1", {"tests/test_a.py": {"a.py"}, "tests/test_b.py": {"b.py"},
+                                "tests/test_c.py": {"c.py"}})
+
+        assert select_tests(items, impact, ["b.py", str(tmp_path / "tests" / "test_c.py")]) == [
+            "tests/test_b.py", "tests/test_c.py", "tests/test_new.py"]
+        assert select_tests(items, impact, ["README.md"]) == ["tests/test_new.py"]
+
+
+def test_recorder_attributes_the_code_that_runs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / "impact_used.py").write_text("def work():\n    return 1\n")
+    (tmp_path / "impact_unused.py").write_text("def work():\n    return 2\n")
+    used = importlib.import_module("impact_used")
+    unused = importlib.import_module("impact_unused")
+    monkeypatch.delitem(sys.modules, "impact_used")
+    monkeypatch.delitem(sys.modules, "impact_unused")
+
+    recorder = ImpactRecorder(tmp_path / "impact.db", "run-1", "pytest")
+    try:
+        recorder.begin("tests/test_work.py")
+        used.work()
+        recorder.add("data/fixture.resource")
+        recorder.end()
+        unused.work()
+    finally:
+        recorder.close()
+
+    with ImpactMap(tmp_path / "impact.db") as impact:
+        assert impact.dependencies("tests/test_work.py") == [
+            "data/fixture.resource", "impact_used.py", "tests/test_work.py"]
+
+
+def test_run_changed_runs_only_affected_robot_suites(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("robot")
+    suite = tmp_path / "suite"
+    suite.mkdir()
+    (suite / "Numbers.py").write_text("def double(value):\n    return int(value) * 2\n")
+    (suite / "math.robot").write_text(
+        "*** Settings ***\nLibrary    Numbers.py\n*** Test Cases ***\nDouble\n"
+        "    ${result}=    Double    2\n    Should Be Equal As Integers    ${result}    4\n")
+    (suite / "plain.robot").write_text("*** Test Cases ***\nPlain\n    No Operation\n")
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+    options = ["run", "--engine", "robot", "--folder", "suite", "--no-history"]
+    quiet = ["--", "--log", "NONE", "--report", "NONE"]
+
+    recorded = runner.invoke(app, [*options, "--record-impact", *quiet])
+    selected = runner.invoke(app, [*options, "--changed", "suite/Numbers.py", *quiet])
+    unaffected = runner.invoke(app, [*options, "--changed", "README.md", *quiet])
+
+    assert recorded.exit_code == 0, recorded.output
+    assert selected.exit_code == 0, selected.output
+    assert [test.name for test in iter_tests(str(tmp_path / "output.xml"))] == ["Double"]
+    assert unaffected.exit_code == 0 and "No test files are affected" in unaffected.output
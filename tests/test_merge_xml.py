@@ -0,0 +1,92 @@
+"""Tests for the streaming output merger in hands.merge_xml."""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+from hands.merge_xml import MergeCache, merge_outputs
+from hands.report_xml import TestResult as Result, write_robot_output
+
+T0 = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+ROBOT_OUTPUT = Path(__file__).parent / "examples" / "robot_output.xml"
+
+
+def _shard(path: Path, name: str, statuses: str, offset: int = 0) -> str:
+    results = [
+        Result(f"test_{i}", {"P": "PASS", "F": "FAIL", "S": "SKIP"}[code],
+               T0 + timedelta(seconds=offset + i), T0 + timedelta(seconds=offset + i + 1), tags=["smoke"])
+        for i, code in enumerate(statuses)
+    ]
+    write_robot_output(name, results, str(path))
+    return str(path)
+
+
+def test_merge_outputs_nests_inputs_and_recomputes_statistics(tmp_path) -> None:
+    first = _shard(tmp_path / "a.xml", "A", "PPF")
+    second = _shard(tmp_path / "b.xml", "B", "PS", offset=10)
+    out = tmp_path / "merged.xml"
+
+    summary = merge_outputs([first, second], str(out))
+
+    assert (summary.total.passed, summary.total.failed, summary.total.skipped) == (3, 1, 1)
+    root = ET.parse(out).getroot()
+    top = root.find("suite")
+    assert (top.get("id"), top.get("name")) == ("s1", "A & B")
+    assert [(s.get("id"), s.get("name")) for s in top.findall("suite")] == [("s1-s1", "A"), ("s1-s2", "B")]
+    assert [t.get("id") for t in top.iter("test")] == ["s1-s1-t1", "s1-s1-t2", "s1-s1-t3", "s1-s2-t1", "s1-s2-t2"]
+    status = top.find("status")
+    assert (status.get("status"), status.get("starttime"), status.get("endtime")) == (
+        "FAIL", "20250101 12:00:00.000", "20250101 12:00:12.000")
+    total = root.find("statistics/total/stat")
+    assert (total.get("pass"), total.get("fail"), total.get("skip")) == ("3", "1", "1")
+    tag = root.find("statistics/tag/stat")
+    assert (tag.text, tag.get("pass"), tag.get("fail")) == ("smoke", "3", "1")
+    assert [s.text for s in root.findall("statistics/suite/stat")] == ["A & B", "A & B.A", "A & B.B"]
+
+
+def test_merge_outputs_keeps_robot_structure(tmp_path) -> None:
+    out = tmp_path / "merged.xml"
+
+    summary = merge_outputs([str(ROBOT_OUTPUT)], str(out), name="Nightly")
+
+    source = ET.parse(ROBOT_OUTPUT).getroot()
+    merged = ET.parse(out).getroot()
+    assert summary.total.total == len(list(source.iter("test"))) == len(list(merged.iter("test")))
+    assert len(list(merged.iter("kw"))) == len(list(source.iter("kw")))
+    assert len(merged.findall("errors/msg")) == len(source.findall("errors/msg"))
+    assert merged.find("suite/suite/suite").get("id") == "s1-s1-s1"
+
+
+def test_merge_cache_reuses_unchanged_inputs(tmp_path) -> None:
+    inputs = [_shard(tmp_path / f"{name}.xml", name, "PF", offset) for offset, name in enumerate("ABC")]
+    cache = MergeCache(tmp_path / "cache")
+    plain, first, second = (tmp_path / name for name in ("plain.xml", "first.xml", "second.xml"))
+
+    merge_outputs(inputs, str(plain))
+    cold = merge_outputs(inputs, str(first), cache=cache)
+    _shard(tmp_path / "B.xml", "B", "PP", 1)
+    warm = merge_outputs(inputs, str(second), cache=MergeCache(tmp_path / "cache"))
+
+    def body(path: Path) -> list:
+        return [ET.tostring(child) for child in ET.parse(path).getroot().find("suite")]
+
+    assert (cold.cached, warm.cached) == (0, 2)
+    assert body(first) == body(plain)
+    assert [t.get("id") for t in ET.parse(second).getroot().iter("test")][-2:] == ["s1-s3-t1", "s1-s3-t2"]
+    assert (warm.total.passed, warm.total.failed) == (4, 2)
+    assert [s.longname for s in warm.suites] == ["A & B & C", "A & B & C.A", "A & B & C.B", "A & B & C.C"]
+    assert len(list((tmp_path / "cache").glob("*.xml"))) == 3
+
+
+def test_merge_outputs_flatten_joins_partial_runs(tmp_path) -> None:
+    first = _shard(tmp_path / "w1.xml", "Pytest Suite", "PP")
+    second = _shard(tmp_path / "w2.xml", "Pytest Suite", "F", offset=5)
+    out = tmp_path / "merged.xml"
+
+    summary = merge_outputs([first, second], str(out), flatten=True)
+
+    top = ET.parse(out).getroot().find("suite")
+    assert top.get("name") == "Pytest Suite"
+    assert top.findall("suite") == []
+    assert [t.get("id") for t in top.findall("test")] == ["s1-t1", "s1-t2", "s1-t3"]
+    assert (top.find("status").get("status"), summary.total.failed) == ("FAIL", 1)
+    assert [s.id for s in summary.suites] == ["s1"]
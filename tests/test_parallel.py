@@ -0,0 +1,106 @@
+"""Tests for partitioning work across processes in hands.parallel."""
+from pathlib import Path
+
+import pytest
+
+from hands.output_reader import iter_tests
+from hands.parallel import partition, partition_in_order
+from hands.test_engines import BehaveEngine, RobotEngine
+
+
+def test_partition_balances_weights_and_keeps_order() -> None:
+    weights = {"a": 5.0, "b": 1.0, "c": 4.0, "d": 2.0, "e": 2.0}
+
+    groups = partition(list(weights), 2, weights.__getitem__)
+
+    assert sorted(sum(weights[item] for item in group) for group in groups) == [7.0, 7.0]
+    assert groups == [["a", "e"], ["b", "c", "d"]]
+
+
+def test_partition_drops_empty_groups() -> None:
+    assert partition(["a", "b"], 8, lambda item: 1.0) == [["a"], ["b"]]
+    assert partition([], 4) == []
+
+
+def test_partition_in_order_keeps_items_consecutive() -> None:
+    weights = {"a": 5.0, "b": 1.0, "c": 4.0, "d": 2.0, "e": 2.0}
+
+    assert partition_in_order(list(weights), 2, weights.__getitem__) == [["a", "b"], ["c", "d", "e"]]
+    assert partition_in_order(list(weights), 8, weights.__getitem__) == [["a"], ["b", "c"], ["d", "e"]]
+    assert partition_in_order([], 4) == []
+
+
+def test_robot_runs_sub_suites_in_parallel(tmp_path: Path) -> None:
+    pytest.importorskip("robot")
+    folder = tmp_path / "my_tests"
+    for suite, status in (("build/nested/three", "1"), ("sub_a/one", "1"), ("sub_b/two", "2"), ("top", "1")):
+        path = folder / f"{suite}.robot"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"*** Test Cases ***\nCheck\n    Should Be Equal    1    {status}\n")
+    (folder / "_ignored").mkdir()
+    (folder / "_ignored" / "skipped.robot").write_text("*** Test Cases ***\nCheck\n    Fail    ignored\n")
+    # Robot does not read .gitignore or skip build directories, so neither may the split
+    (folder / ".gitignore").write_text("sub_a/\n")
+    engine = RobotEngine()
+
+    assert [path.name for path in engine.suite_children(folder)] == ["build", "sub_a", "sub_b", "top.robot"]
+
+    rc = engine.run_parallel(folder, str(tmp_path / "out.xml"), workers=2)
+
+    assert rc == 1
+    tests = list(iter_tests(str(tmp_path / "out.xml")))
+    assert [(test.longname, test.status) for test in tests] == [
+        ("My Tests.Build.Nested.Three.Check", "PASS"),
+        ("My Tests.Sub A.One.Check", "PASS"),
+        ("My Tests.Sub B.Two.Check", "FAIL"),
+        ("My Tests.Top.Check", "PASS"),
+    ]
+
+
+@pytest.mark.parametrize("name_args", [["--name", "Renamed"], ["--name=Renamed"], ["-N", "Renamed"]])
+def test_robot_sub_suites_take_the_combined_name(tmp_path: Path, name_args: list) -> None:
+    pytest.importorskip("robot")
+    folder = tmp_path / "my_tests"
+    folder.mkdir()
+    for suite in ("one", "two"):
+        (folder / f"{suite}.robot").write_text("*** Test Cases ***\nCheck\n    No Operation\n")
+
+    rc = RobotEngine().run_parallel(folder, str(tmp_path / "out.xml"), workers=2, extra_args=name_args)
+
+    assert rc == 0
+    assert [test.longname for test in iter_tests(str(tmp_path / "out.xml"))] == [
+        "Renamed.One.Check", "Renamed.Two.Check"]
+
+
+def test_robot_partitions_without_matching_tests_are_ignored(tmp_path: Path) -> None:
+    pytest.importorskip("robot")
+    folder = tmp_path / "my_tests"
+    folder.mkdir()
+    (folder / "smoke.robot").write_text("*** Test Cases ***\nQuick\n    [Tags]    smoke\n    No Operation\n")
+    (folder / "slow.robot").write_text("*** Test Cases ***\nLong\n    No Operation\n")
+    engine = RobotEngine()
+
+    rc = engine.run_parallel(folder, str(tmp_path / "out.xml"), workers=2, extra_args=["--include", "smoke"])
+
+    assert rc == 0
+    assert [test.longname for test in iter_tests(str(tmp_path / "out.xml"))] == ["My Tests.Smoke.Quick"]
+    assert engine.combine_exit_codes([252, 252]) == 252
+    assert engine.combine_exit_codes([252, 2, 1]) == 3
+
+
+def test_behave_partitions_merge_in_feature_order(tmp_path: Path) -> None:
+    pytest.importorskip("behave")
+    features = tmp_path / "features"
+    (features / "steps").mkdir(parents=True)
+    (features / "steps" / "steps.py").write_text(
+        "from behave import given\n\n@given('the value {n:d}')\ndef step(context, n):\n    assert n < 3\n")
+    # Equal sizes: a balanced split that ignores order would pair f1 with f3
+    for index, value in ((1, 1), (2, 5), (3, 2)):
+        (features / f"f{index}.feature").write_text(
+            f"Feature: F{index}\n  Scenario: Check\n    Given the value {value}\n")
+
+    rc = BehaveEngine().run_parallel(features, str(tmp_path / "out.xml"), workers=2)
+
+    assert rc == 1
+    assert [(test.name, test.status) for test in iter_tests(str(tmp_path / "out.xml"))] == [
+        ("F1 :: Check", "PASS"), ("F2 :: Check", "FAIL"), ("F3 :: Check", "PASS")]
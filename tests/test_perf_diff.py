@@ -0,0 +1,78 @@
+"""Tests for duration comparison in hands.perf_diff and `hands perf-diff`."""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from hands.main import app
+from hands.perf_diff import Thresholds, betainc, perf_diff, welch_p_value
+from hands.report_xml import TestResult as Result, write_robot_output
+
+T0 = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _run(path: Path, durations: dict, suite: str = "Suite") -> str:
+    results, start = [], T0
+    for name, seconds in durations.items():
+        end = start + timedelta(seconds=seconds)
+        results.append(Result(name, "PASS", start, end))
+        start = end
+    write_robot_output(suite, results, str(path))
+    return str(path)
+
+
+def test_betainc_and_welch_match_reference_values() -> None:
+    assert betainc(1, 1, 0.3) == pytest.approx(0.3)
+    assert betainc(2, 5, 0.2) == pytest.approx(0.34464)
+    # Welch's worked example (Welch's t-test article, example 1)
+    a = [27.5, 21.0, 19.0, 23.6, 17.0, 17.9, 16.9, 20.1, 21.9, 22.6, 23.1, 19.6, 19.0, 21.7, 21.4]
+    b = [27.1, 22.0, 20.8, 23.4, 23.4, 23.5, 25.8, 22.0, 24.8, 20.2, 21.9, 22.1, 22.9, 20.5, 24.4]
+    assert welch_p_value(a, b) == pytest.approx(0.021378, abs=1e-6)
+    assert welch_p_value([1.0], [2.0]) is None
+
+
+def test_perf_diff_requires_significance_with_several_runs(tmp_path: Path) -> None:
+    baseline = [_run(tmp_path / f"b{i}.xml", {"steady": 1.0 + i / 100, "noisy": (1.0, 3.0, 1.0)[i]})
+                for i in range(3)]
+    current = [_run(tmp_path / f"c{i}.xml", {"steady": 2.0 + i / 100, "noisy": (3.0, 1.0, 3.0)[i]})
+               for i in range(3)]
+
+    diff = perf_diff(baseline, current)
+
+    verdicts = {change.name: change.verdict for change in diff.tests}
+    assert verdicts == {"Suite.steady": "regression", "Suite.noisy": "unchanged"}
+
+
+def test_perf_diff_single_runs_use_thresholds(tmp_path: Path) -> None:
+    baseline = _run(tmp_path / "base.xml", {"slower": 1.0, "tiny": 0.01, "faster": 2.0, "gone": 1.0})
+    current = _run(tmp_path / "cur.xml", {"slower": 1.5, "tiny": 0.03, "faster": 1.0, "new": 1.0})
+
+    diff = perf_diff([baseline], [current], Thresholds(ratio=0.2, min_delta=0.05))
+
+    verdicts = {change.name: change.verdict for change in diff.tests}
+    assert verdicts == {"Suite.slower": "regression", "Suite.tiny": "unchanged", "Suite.faster": "improvement"}
+    assert (diff.only_baseline, diff.only_current) == (1, 1)
+
+
+def test_suite_names_may_contain_dots(tmp_path: Path) -> None:
+    baseline = _run(tmp_path / "base.xml", {"a": 1.0, "b": 1.0}, suite="v1.2 API")
+    current = _run(tmp_path / "cur.xml", {"a": 2.0, "b": 1.0}, suite="v1.2 API")
+
+    diff = perf_diff([baseline], [current])
+
+    assert [(change.name, change.baseline, change.current) for change in diff.suites] == [("v1.2 API", 2.0, 3.0)]
+
+
+def test_cli_exits_non_zero_on_regression(tmp_path: Path) -> None:
+    _run(tmp_path / "base.xml", {"a": 1.0})
+    _run(tmp_path / "cur.xml", {"a": 2.0})
+    runner = CliRunner()
+
+    slower = runner.invoke(app, ["perf-diff", str(tmp_path / "base.xml"), str(tmp_path / "cur.xml")])
+    faster = runner.invoke(app, ["perf-diff", str(tmp_path / "cur.xml"), str(tmp_path / "base.xml"),
+                                 "--json", str(tmp_path / "diff.json")])
+
+    assert slower.exit_code == 1, slower.output
+    assert faster.exit_code == 0, faster.output
+    assert '"verdict": "improvement"' in (tmp_path / "diff.json").read_text()
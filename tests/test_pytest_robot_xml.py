@@ -0,0 +1,155 @@
+"""Tests for the hands.pytest_robot_xml plugin, including xdist roles."""
+from pathlib import Path
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from hands.output_reader import elapsed_seconds, iter_tests
+
+pytest_plugins = ["pytester"]
+
+TESTS = """
+import pytest
+
+def test_pass():
+    pass
+
+def test_fail():
+    assert False
+
+@pytest.mark.parametrize("value", range(4))
+def test_param(value):
+    pass
+"""
+
+
+def _statuses(path: Path) -> dict:
+    return {test.name: test.status for test in iter_tests(str(path))}
+
+
+def test_writes_output(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_sample=TESTS)
+
+    pytester.runpytest_inprocess("--robot-output", "out.xml").assert_outcomes(passed=5, failed=1)
+
+    statuses = _statuses(pytester.path / "out.xml")
+    assert len(statuses) == 6
+    assert statuses["test_sample.py::test_fail"] == "FAIL"
+
+
+def test_worker_ships_fixture_times_instead_of_writing(pytester: pytest.Pytester) -> None:
+    pytester.makeconftest("""
+import pytest
+
+fixtures = []
+
+def pytest_configure(config):
+    config.workerinput = {}  # what pytest-xdist sets in its workers
+
+@pytest.fixture(autouse=True)
+def ready():
+    yield
+
+def pytest_runtest_logreport(report):
+    fixtures.extend(getattr(report, "robot_xml_fixtures", []))
+
+def pytest_sessionfinish(session):
+    assert [name for name, *_ in fixtures].count("ready") == 6
+""")
+    pytester.makepyfile(test_sample=TESTS)
+
+    result = pytester.runpytest_inprocess("--robot-output", "out.xml")
+
+    result.assert_outcomes(passed=5, failed=1)
+    assert not (pytester.path / "out.xml").exists()
+
+
+def test_xdist_controller_writes_one_output(pytester: pytest.Pytester) -> None:
+    pytest.importorskip("xdist")
+    pytester.makepyfile(test_sample=TESTS)
+
+    pytester.runpytest_subprocess("-n", "2", "--robot-output", "out.xml").assert_outcomes(passed=5, failed=1)
+
+    assert len(_statuses(pytester.path / "out.xml")) == 6
+
+
+PHASES = """
+import time
+import pytest
+
+@pytest.fixture(scope="session")
+def slow_session():
+    time.sleep(0.05)
+
+@pytest.fixture
+def slow_teardown(slow_session):
+    yield
+    time.sleep(0.05)
+
+@pytest.fixture
+def broken_teardown():
+    yield
+    raise RuntimeError("cleanup")
+
+def test_timed(slow_teardown):
+    pass
+
+def test_teardown_error(broken_teardown):
+    assert False
+"""
+
+
+def test_phases_written_as_setup_and_teardown_keywords(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_phases=PHASES)
+
+    result = pytester.runpytest_inprocess("--robot-output", "out.xml", "--robot-fixture-durations", "2")
+
+    result.assert_outcomes(passed=1, failed=1, errors=1)
+    result.stdout.fnmatch_lines(["*slowest 2 fixture setups*", "*1x*slow_session (session)*"])
+    timed, failed = ET.parse(pytester.path / "out.xml").getroot().iter("test")
+    setup, call, teardown = timed.findall("kw")
+    assert [(kw.get("name"), kw.get("type")) for kw in (setup, call, teardown)] == [
+        ("setup", "SETUP"), ("call", None), ("teardown", "TEARDOWN")]
+    assert elapsed_seconds(setup.find("status")) >= 0.04
+    assert elapsed_seconds(teardown.find("status")) >= 0.04
+    assert elapsed_seconds(timed.find("status")) >= 0.09
+    assert failed.find("status").get("status") == "FAIL"
+    assert "Also teardown failed:" in failed.find("status").text
+    assert [kw.find("status").get("status") for kw in failed.findall("kw")] == ["PASS", "FAIL", "FAIL"]
+
+
+def test_tests_without_teardown_are_written_as_failed(pytester: pytest.Pytester) -> None:
+    pytester.makeconftest("""
+import time
+from _pytest.reports import TestReport
+
+def pytest_runtest_protocol(item, nextitem):
+    if item.name != "test_pass":
+        return None
+    # Like an xdist worker that crashed before the teardown was reported
+    now = time.time()
+    for when in ("setup", "call"):
+        item.ihook.pytest_runtest_logreport(report=TestReport(
+            item.nodeid, item.location, {}, "passed", None, when, start=now, stop=now))
+    return True
+""")
+    pytester.makepyfile(test_sample=TESTS)
+
+    pytester.runpytest_inprocess("--robot-output", "out.xml")
+
+    tests = {test.name: test for test in iter_tests(str(pytester.path / "out.xml"))}
+    assert len(tests) == 6
+    crashed = tests["test_sample.py::test_pass"]
+    assert crashed.status == "FAIL" and "no teardown was reported" in crashed.message
+
+
+def test_run_first_moves_listed_tests_to_the_front(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_sample=TESTS)
+    first = pytester.path / "first.json"
+    first.write_text('["test_sample.py::test_param[2]", "test_sample.py::test_fail"]')
+
+    pytester.runpytest_inprocess("--robot-output", "out.xml", "--robot-run-first", str(first))
+
+    assert [test.name for test in iter_tests(str(pytester.path / "out.xml"))][:3] == [
+        "test_sample.py::test_fail", "test_sample.py::test_param[2]", "test_sample.py::test_pass"]
@@ -0,0 +1,125 @@
+"""Tests for the Robot XML writer in hands.report_xml."""
+from datetime import datetime, timedelta, timezone
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from hands.report_xml import (
+    KeywordResult,
+    ResultBatch,
+    RobotXmlWriter,
+    TestResult as Result,
+    _epoch_ns,
+    _rf_timestamp,
+    _rf_timestamps,
+    write_robot_output,
+)
+
+T0 = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _result(index: int, status: str = "PASS", **kwargs) -> Result:
+    start = T0 + timedelta(seconds=index)
+    return Result(name=f"test_{index}", status=status, start=start,
+                      end=start + timedelta(milliseconds=250), **kwargs)
+
+
+def test_write_robot_output_accepts_generator(tmp_path) -> None:
+    out = tmp_path / "output.xml"
+    results = (_result(i, "FAIL" if i == 1 else "PASS") for i in range(3))
+    write_robot_output("Suite", results, str(out))
+
+    root = ET.parse(out).getroot()
+    suite = root.find("suite")
+    assert [t.get("name") for t in suite.iter("test")] == ["test_0", "test_1", "test_2"]
+    status = suite.find("status")
+    assert status.get("status") == "FAIL"
+    assert status.get("starttime") == "20250101 12:00:00.000"
+    assert status.get("endtime") == "20250101 12:00:02.250"
+    stat = root.find("statistics/total/stat")
+    assert (stat.get("pass"), stat.get("fail"), stat.get("skip")) == ("2", "1", "0")
+
+
+def test_write_robot_output_escapes_content(tmp_path) -> None:
+    out = tmp_path / "output.xml"
+    write_robot_output('Suite "<&>"', [_result(0, "FAIL", message="a < b & c", tags=["x&y"])], str(out))
+
+    root = ET.parse(out).getroot()
+    assert root.find("suite").get("name") == 'Suite "<&>"'
+    assert root.find("suite/test/status").text == "a < b & c"
+    assert root.find("suite/test/tags/tag").text == "x&y"
+
+
+def test_write_robot_output_rejects_empty_suite(tmp_path) -> None:
+    out = tmp_path / "output.xml"
+    with pytest.raises(ValueError):
+        write_robot_output("Suite", [], str(out))
+    assert not out.exists()
+
+
+def test_writer_streams_tests_before_close(tmp_path) -> None:
+    out = tmp_path / "output.xml"
+    writer = RobotXmlWriter("Suite", str(out))
+    writer.add(_result(0))
+    writer._fh.flush()
+    assert '<test name="test_0">' in out.read_text(encoding="UTF-8")
+    writer.close()
+    assert writer.count == 1
+    ET.parse(out)
+
+
+def test_result_batch_round_trips_rows() -> None:
+    batch = ResultBatch()
+    batch.append(_result(0, tags=["smoke", "api"]))
+    batch.append(_result(1, "FAIL", message="boom", tags=["api"]))
+    batch.append_row("raw", "ERROR", 0, 1_500_000)
+
+    assert len(batch) == 3
+    assert batch[0].to_result() == _result(0, tags=["smoke", "api"])
+    assert (batch[1].status, batch[1].message, batch[1].tags) == ("FAIL", "boom", ["api"])
+    assert (batch[-1].status, batch[-1].message, batch[-1].tags) == ("SKIP", None, None)
+    assert batch._tag_table == ["smoke", "api"]
+    batch.clear()
+    assert len(batch) == 0 and list(batch) == []
+
+
+def test_rf_timestamps_matches_rf_timestamp() -> None:
+    moments = [T0, T0 + timedelta(microseconds=999_999), T0 + timedelta(days=40, milliseconds=7)]
+    assert _rf_timestamps(_epoch_ns(m) for m in moments) == [_rf_timestamp(m) for m in moments]
+
+
+def test_write_robot_output_from_batch_matches_results(tmp_path) -> None:
+    results = [_result(i, "FAIL" if i % 3 else "PASS", message=f"m{i}", tags=["t"]) for i in range(10)]
+    batch = ResultBatch()
+    batch.extend(results)
+    write_robot_output("Suite", results, str(tmp_path / "a.xml"))
+    write_robot_output("Suite", batch, str(tmp_path / "b.xml"))
+
+    def body(name: str) -> list:
+        return [ET.tostring(t) for t in ET.parse(tmp_path / name).getroot().iter("test")]
+
+    assert body("a.xml") == body("b.xml")
+
+
+def test_keywords_written_inside_test(tmp_path) -> None:
+    keywords = [
+        KeywordResult("Setup", "PASS", T0, T0 + timedelta(milliseconds=5), type="SETUP"),
+        KeywordResult("Given a step", "FAIL", T0 + timedelta(milliseconds=5), T0 + timedelta(milliseconds=200),
+                      message="boom"),
+        KeywordResult("Then another", "NOT RUN", T0 + timedelta(milliseconds=200), T0 + timedelta(milliseconds=200)),
+    ]
+    result = _result(0, "FAIL", message="boom", keywords=keywords)
+    batch = ResultBatch()
+    batch.append(result)
+    assert batch[0].to_result() == result
+    write_robot_output("Suite", [result], str(tmp_path / "a.xml"))
+    write_robot_output("Suite", batch, str(tmp_path / "b.xml"))
+
+    test = ET.parse(tmp_path / "a.xml").getroot().find("suite/test")
+    assert ET.tostring(test) == ET.tostring(ET.parse(tmp_path / "b.xml").getroot().find("suite/test"))
+    kws = test.findall("kw")
+    assert [(kw.get("name"), kw.get("type"), kw.find("status").get("status")) for kw in kws] == [
+        ("Setup", "SETUP", "PASS"), ("Given a step", None, "FAIL"), ("Then another", None, "NOT RUN")]
+    assert kws[1].find("status").get("endtime") == "20250101 12:00:00.200"
+    assert kws[1].find("status").text == "boom"
+    assert test.find("status").get("status") == "FAIL"
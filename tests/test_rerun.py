@@ -0,0 +1,60 @@
+"""Tests for `hands run --last-failed/--failed-first` and hands.rerun."""
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from hands.main import app
+from hands.output_reader import TestRecord as Record, iter_tests
+from hands.test_engines import BehaveEngine
+
+FEATURE = """Feature: Numbers
+  Scenario: plain
+    Given a step
+
+  Scenario Outline: doubled <value>
+    Given a step
+    Examples:
+      | value |
+      | 1     |
+      | 2     |
+"""
+
+
+def test_behave_failures_become_locations(tmp_path: Path) -> None:
+    pytest.importorskip("behave")
+    (tmp_path / "numbers.feature").write_text(FEATURE)
+    failed = [Record("Numbers :: doubled 2 -- @1.2 ", "Suite", None, "FAIL"),
+              Record("Numbers :: plain", "Suite", None, "FAIL"),
+              Record("Numbers :: removed", "Suite", None, "FAIL")]
+
+    targets, args = BehaveEngine().select_failed(tmp_path, failed)
+
+    path = str(tmp_path / "numbers.feature")
+    assert (targets, args) == ([f"{path}:10", f"{path}:2"], [])
+
+
+def test_robot_reruns_and_reorders_failures(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("robot")
+    suite = tmp_path / "suite"
+    suite.mkdir()
+    (suite / "alpha.robot").write_text("*** Test Cases ***\nFirst\n    No Operation\n")
+    (suite / "beta.robot").write_text(
+        "*** Test Cases ***\nPasses\n    No Operation\nFails [1]\n    Fail    boom\n")
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+    options = ["run", "--engine", "robot", "--folder", "suite", "--no-history"]
+    quiet = ["--", "--log", "NONE", "--report", "NONE"]
+
+    def names() -> list:
+        return [test.longname for test in iter_tests(str(tmp_path / "output.xml"))]
+
+    assert runner.invoke(app, [*options, *quiet]).exit_code == 1
+    rerun = runner.invoke(app, [*options, "--last-failed", *quiet])
+    assert rerun.exit_code == 1, rerun.output
+    assert names() == ["Suite.Beta.Fails [1]"]
+
+    reordered = runner.invoke(app, [*options, "--failed-first", *quiet])
+    assert reordered.exit_code == 1, reordered.output
+    assert names() == ["Suite.Beta.Fails [1]", "Suite.Beta.Passes", "Suite.Alpha.First"]
+    assert not list((tmp_path / "hands_cache" / "rerun").glob("*.json"))
@@ -0,0 +1,83 @@
+"""Tests for the result cache in hands.result_cache and `hands run --cache`."""
+import os
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from hands.impact import ImpactMap
+from hands.main import app
+from hands.output_reader import iter_tests
+from hands.result_cache import CACHED_TAG, CacheKeys, ResultCache, write_replay
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "results", max_bytes=10_000)
+    for index, key in enumerate(("aa1", "bb2", "cc3")):
+        cache.put(key, {"tests": [], "padding": "x" * 4_000})
+        os.utime(cache._path(key), (1_000 + index, 1_000 + index))
+    assert cache.get("aa1") is not None  # used last now
+
+    assert cache.evict() == 1
+    assert [cache.get(key) is not None for key in ("aa1", "bb2", "cc3")] == [True, False, True]
+
+
+def test_keys_follow_test_and_dependency_contents(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    for name in ("test_a.py", "lib.py", "data.json"):
+        (tmp_path / name).write_text("1")
+    with ImpactMap(tmp_path / "impact.db") as impact:
+        impact.record("run-1", {"test_a.py": {"test_a.py", "lib.py"}})
+
+        def key(*inputs: str) -> str:
+            return CacheKeys("pytest", [], impact, inputs).key("test_a.py")
+
+        first = key()
+        assert CacheKeys("pytest", [], impact).key("test_new.py") is None
+        assert CacheKeys("pytest", ["-k", "x"], impact).key("test_a.py") != first
+        assert key("data.json") != first
+        (tmp_path / "data.json").write_text("2")
+        assert key() == first
+        (tmp_path / "lib.py").write_text("2")
+        assert key() != first
+
+
+def test_replay_keeps_original_duration_and_message(tmp_path: Path) -> None:
+    entry = {"tests": [
+        {"name": "Skipped", "suite": "Suite", "status": "SKIP", "elapsed": 0.25, "message": "not on Linux"},
+        {"name": "Passed", "suite": "Suite", "status": "PASS", "elapsed": 1.5},
+    ]}
+
+    assert write_replay([entry], str(tmp_path / "replay.xml"), "Suite") == 2
+
+    messages = [test.message for test in iter_tests(str(tmp_path / "replay.xml"))]
+    assert messages == ["Cached result, originally 0.250s\n\nnot on Linux", "Cached result, originally 1.500s"]
+
+
+def test_run_replays_unchanged_robot_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("robot")
+    suite = tmp_path / "suite"
+    suite.mkdir()
+    (suite / "Numbers.py").write_text("def double(value):\n    return int(value) * 2\n")
+    (suite / "math.robot").write_text(
+        "*** Settings ***\nLibrary    Numbers.py\n*** Test Cases ***\nDouble\n"
+        "    ${result}=    Double    2\n    Should Be Equal As Integers    ${result}    4\n")
+    (suite / "plain.robot").write_text("*** Test Cases ***\nPlain\n    No Operation\nBroken\n    Fail    boom\n")
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+    command = ["run", "--engine", "robot", "--folder", "suite", "--no-history", "--cache", "--",
+               "--log", "NONE", "--report", "NONE"]
+
+    def results() -> list:
+        return [(test.longname, test.status, CACHED_TAG in test.tags)
+                for test in iter_tests(str(tmp_path / "output.xml"))]
+
+    assert runner.invoke(app, command).exit_code == 1
+    assert runner.invoke(app, command).exit_code == 1
+    assert results() == [("Suite.Plain.Plain", "PASS", False), ("Suite.Plain.Broken", "FAIL", False),
+                         ("Suite.Math.Double", "PASS", True)]
+
+    (suite / "plain.robot").write_text("*** Test Cases ***\nPlain\n    No Operation\n")
+    assert runner.invoke(app, command).exit_code == 0
+    assert runner.invoke(app, command).exit_code == 0
+    assert results() == [("Suite.Math.Double", "PASS", True), ("Suite.Plain.Plain", "PASS", True)]
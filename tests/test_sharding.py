@@ -0,0 +1,79 @@
+"""Tests for duration-aware sharding in hands.sharding."""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from hands.main import app
+from hands.output_reader import iter_tests
+from hands.report_xml import TestResult as Result, write_robot_output
+from hands.sharding import Durations, parse_shard, select_shard
+
+
+def test_parse_shard() -> None:
+    assert parse_shard("2/4") == (2, 4)
+    for spec in ("0/4", "5/4", "2", "a/b", "1/0"):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_durations_from_output(tmp_path: Path) -> None:
+    out = tmp_path / "output.xml"
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def result(name: str, start: float, end: float) -> Result:
+        return Result(name, "PASS", base + timedelta(seconds=start), base + timedelta(seconds=end))
+
+    write_robot_output("Pytest", [
+        result("tests/test_a.py::test_one", 0.0, 2.0),
+        result("tests/test_a.py::test_two", 2.0, 3.0),
+        result("tests/test_b.py::test_one", 3.0, 3.5),
+    ], str(out))
+
+    durations = Durations.load(str(out))
+
+    assert durations.estimate("tests/test_a.py") == pytest.approx(3.0)
+    assert durations.estimate("./tests/test_b.py") == pytest.approx(0.5)
+    assert durations.estimate("tests/test_c.py") is None
+    assert durations.weight(["tests/test_a.py", "tests/test_c.py"])["tests/test_c.py"] == pytest.approx(3.0)
+
+
+def test_shards_cover_every_item_once() -> None:
+    items = [f"tests/test_{index}.py" for index in range(20)]
+    durations = Durations({item: float(index % 5 + 1) for index, item in enumerate(items[:12])})
+
+    shards = [select_shard(items, index, 3, durations) for index in (1, 2, 3)]
+
+    assert sorted(sum(shards, [])) == sorted(items)
+    loads = [sum(durations.by_key.get(item, 0.0) for item in shard) for shard in shards]
+    assert max(loads) - min(loads) <= 1.0
+    assert shards == [select_shard(items, index, 3, durations) for index in (1, 2, 3)]
+
+
+def test_shards_ignore_each_nodes_own_output(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("robot")
+    suite = tmp_path / "suite"
+    suite.mkdir()
+    names = "abcdef"
+    for name in names:
+        (suite / f"{name}.robot").write_text(f"*** Test Cases ***\nTest {name.upper()}\n    No Operation\n")
+    monkeypatch.chdir(tmp_path)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def previous(slow: str) -> list:
+        # Each node's own last output disagrees on which file is slow
+        return [Result(f"{suite / name}.robot::Test", "PASS", base,
+                       base + timedelta(seconds=100.0 if name == slow else 1.0)) for name in names]
+
+    write_robot_output("Node 1", previous("a"), "node-1.xml")
+    write_robot_output("Node 2", previous("f"), "node-2.xml")
+    runner = CliRunner()
+    for index in (1, 2):
+        result = runner.invoke(app, ["run", "--engine", "robot", "--folder", "suite", "--no-history",
+                                     "--shard", f"{index}/2", "--output", f"node-{index}.xml",
+                                     "--", "--log", "NONE", "--report", "NONE"])
+        assert result.exit_code == 0, result.output
+
+    ran = [test.name for index in (1, 2) for test in iter_tests(f"node-{index}.xml")]
+    assert sorted(ran) == [f"Test {name.upper()}" for name in names]
@@ -0,0 +1,60 @@
+"""Cold-start budget of the hands CLI, measured with python -X importtime.
+
+The CLI must not import rich, the engine modules or any test framework
+before a command needs them. Set HANDS_STARTUP_BUDGET_MS to tune the time
+budget for slow machines.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+pytest.importorskip("typer")
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+# Import time hands itself may add on top of typer, in milliseconds
+BUDGET_MS = float(os.environ.get("HANDS_STARTUP_BUDGET_MS", "60"))
+DEFERRED = ("rich", "robot", "behave", "pytest", "hands.test_engines", "hands.engine_detector",
+            "hands.merge_xml", "snark")
+
+
+def _import_times(code: str) -> Dict[str, int]:
+    """Run ``code`` in a fresh interpreter; return cumulative import time (us) per module."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([SRC, os.environ.get("PYTHONPATH", "")])}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, env=env, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def _deferred_imports(times: Dict[str, int]) -> list:
+    return sorted(name for name in times if name.split(".")[0] in DEFERRED or name in DEFERRED)
+
+
+def test_import_defers_heavy_modules() -> None:
+    times = _import_times("import hands.main")
+
+    assert _deferred_imports(times) == []
+
+
+def test_cold_start_budget() -> None:
+    own = []
+    for _ in range(3):
+        times = _import_times("import hands.main")
+        own.append((times["hands.main"] - times.get("typer", 0)) / 1000)
+
+    assert min(own) < BUDGET_MS, f"hands adds {min(own):.1f} ms to import time (budget {BUDGET_MS} ms)"
+
+
+def test_list_engines_does_not_import_frameworks() -> None:
+    times = _import_times("import sys; from hands.main import app; sys.argv = ['hands', 'list-engines']; app()")
+
+    assert [name for name in _deferred_imports(times) if not name.startswith(("rich", "hands"))] == []
@@ -0,0 +1,59 @@
+"""Tests for output statistics in hands.stats and `hands stats`."""
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from hands.main import app
+from hands.output_reader import iter_tests
+from hands.report_xml import TestResult as Result, write_robot_output
+from hands.stats import collect_stats
+
+T0 = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+ROBOT_OUTPUT = Path(__file__).parent / "examples" / "robot_output.xml"
+
+
+def _output(path: Path, tests: list) -> str:
+    results = [Result(name, status, T0, T0 + timedelta(seconds=seconds), tags=tags)
+               for name, status, seconds, tags in tests]
+    write_robot_output("Suite", results, str(path))
+    return str(path)
+
+
+def test_iter_tests_reads_robot7_tags_but_not_keyword_tags() -> None:
+    tests = list(iter_tests(str(ROBOT_OUTPUT)))
+
+    first = tests[0]
+    assert (first.longname, first.tags, first.status) == ("Robot.Robot Examples.Test Basic Addition",
+                                                          ["basic", "math"], "PASS")
+    assert round(first.elapsed, 6) == 0.000939
+    assert len(tests) == 14
+
+
+def test_collect_stats_combines_files_with_a_pool(tmp_path: Path) -> None:
+    paths = [
+        _output(tmp_path / "a.xml", [("a1", "PASS", 1, ["api"]), ("a2", "FAIL", 5, ["api", "slow"])]),
+        _output(tmp_path / "b.xml", [("b1", "FAIL", 3, ["api"]), ("b2", "SKIP", 0.5, [])]),
+        _output(tmp_path / "c.xml", [("c1", "PASS", 4, ["ui"])]),
+    ]
+
+    serial = collect_stats(paths, top=2)
+    pooled = collect_stats(paths, top=2, workers=3)
+
+    assert serial.to_dict() == pooled.to_dict()
+    assert (serial.files, serial.counts.total, serial.counts.failed, serial.elapsed) == (3, 5, 2, 13.5)
+    assert serial.slowest() == [("Suite.a2", 5.0), ("Suite.c1", 4.0)]
+    assert [(tag, counts.failed, counts.total) for tag, counts in serial.failures_by_tag()] == [
+        ("api", 2, 3), ("slow", 1, 1)]
+
+
+def test_cli_prints_json(tmp_path: Path) -> None:
+    _output(tmp_path / "a.xml", [("a1", "PASS", 1, ["api"]), ("a2", "FAIL", 2, ["api"])])
+
+    result = CliRunner().invoke(app, ["stats", str(tmp_path / "*.xml"), "--json", "-"])
+
+    assert result.exit_code == 0, result.output
+    data = json.loads(result.output)
+    assert (data["total"], data["failed"], data["slowest"][0]["name"]) == (2, 1, "Suite.a2")
+    assert data["tags"]["api"] == {"passed": 1, "failed": 1, "skipped": 0}
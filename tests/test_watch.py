@@ -0,0 +1,62 @@
+"""Tests for the file watchers in hands.watch and warm runs in hands.warm."""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from hands.output_reader import iter_tests
+from hands.warm import run_forked
+from hands.watch import InotifyWatcher, PollingWatcher, wait_for_changes
+
+
+def _touch(path: Path, text: str) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+def test_inotify_reports_files_and_new_directories(tmp_path: Path) -> None:
+    _touch(tmp_path / "src" / "calc.py", "1")
+    try:
+        watcher = InotifyWatcher(tmp_path)
+    except OSError as exc:
+        pytest.skip(f"inotify not available: {exc}")
+    with watcher:
+        changed = _touch(tmp_path / "src" / "calc.py", "2")
+        created = _touch(tmp_path / "src" / "new" / "deep" / "module.py", "1")
+        _touch(tmp_path / "src" / "__pycache__" / "calc.cpython-311.pyc", "x")
+        _touch(tmp_path / "src" / ".calc.py.swp", "x")
+
+        assert wait_for_changes(watcher, debounce=0.1) == {changed, created}
+
+
+def test_polling_debounces_and_skips_ignored_paths(tmp_path: Path) -> None:
+    source = tmp_path / "lib.py"
+    _touch(source, "1")
+    watcher = PollingWatcher(tmp_path, interval=0.05)
+    _touch(source, "22")
+    _touch(tmp_path / "output.xml", "<robot/>")
+    removed = tmp_path / "gone.py"
+
+    assert wait_for_changes(watcher, debounce=0.1, ignore=[str(tmp_path / "output.xml")]) == {str(source)}
+    _touch(removed, "1")
+    assert wait_for_changes(watcher, debounce=0.1) == {str(removed)}
+    removed.unlink()
+    assert wait_for_changes(watcher, debounce=0.1) == {str(removed)}
+
+
+def test_forked_runs_import_the_code_under_test_afresh(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    _touch(tmp_path / "warm_target.py", "VALUE = 1\n")
+    _touch(tmp_path / "tests" / "test_value.py",
+           "import warm_target\n\ndef test_value():\n    assert warm_target.VALUE == 1\n")
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(tmp_path), os.environ.get("PYTHONPATH", "")]))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    run = ["pytest", Path("tests"), "output.xml", False, ["-q", "-p", "no:cacheprovider"]]
+
+    assert run_forked(*run) == 0
+    _touch(tmp_path / "warm_target.py", "VALUE = 2\n")
+    assert run_forked(*run) == 1
+    assert [test.status for test in iter_tests("output.xml")] == ["FAIL"]
+    assert "warm_target" not in sys.modules  # only ever imported by the children